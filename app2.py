@@ -1,19 +1,18 @@
 
 import sys
-import threading
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QGroupBox, QFormLayout, QLabel, QLineEdit, QPushButton, QTextEdit
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QPainter
 from PyQt5.QtChart import QChart, QChartView, QLineSeries
-from motor.filteredmotorController import FilteredMotorController
-from trajectory_handler.sineGenerator import SineTrajectoryHandler
-from main_impedance_single import ImpedanceController  # 假设该类在 impedance_controller.py 中
+from controller.realtimeProcess import ControlProcess, STATUS_NAMES, STATUS_RUNNING
 
 
 class MainWindow(QMainWindow):
+    MAX_CHART_POINTS = 1000  # 图表最多显示的点数
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("阻抗控制界面")
@@ -35,9 +34,16 @@ class MainWindow(QMainWindow):
         container.setLayout(main_layout)
         self.setCentralWidget(container)
 
-        # 初始化控制器相关变量
-        self.controller_thread = None
-        self.controller_running = False
+        # 控制循环运行在独立进程中，启动后立即在后台连接 ODrive，界面只通过共享内存与其交换数据
+        self.control_process = ControlProcess()
+        self.control_process.start()
+        self.last_status = None
+        self.last_tick = 0
+
+        # 定时读取控制进程的状态并刷新界面
+        self.status_timer = QTimer(self)
+        self.status_timer.timeout.connect(self.poll_control_process)
+        self.status_timer.start(50)
 
     def create_settings_panel(self):
         """创建左侧参数设置区域"""
@@ -76,6 +82,11 @@ class MainWindow(QMainWindow):
         trajectory_group.setLayout(trajectory_layout)
         layout.addWidget(trajectory_group)
 
+        # 运行中修改参数后按回车或切换输入框即下发
+        for line_edit in (self.kp_input, self.kd_input, self.ki_input, self.kf_input,
+                          self.amplitude_input, self.frequency_input):
+            line_edit.editingFinished.connect(self.update_parameters)
+
         # 操作按钮
         self.start_button = QPushButton("开始运行")
         self.stop_button = QPushButton("结束运行")
@@ -120,6 +131,49 @@ class MainWindow(QMainWindow):
         """在日志区域显示消息"""
         self.log_output.append(message)
 
+    @property
+    def controller_running(self):
+        return self.control_process.is_running()
+
+    def poll_control_process(self):
+        """定时读取控制进程的运行状态和最新数据"""
+        status = self.control_process.read_status()
+        code = int(status["status"])
+        if code != self.last_status:
+            self.log_message(f"控制进程状态: {STATUS_NAMES.get(code, code)}")
+            if self.last_status == STATUS_RUNNING:
+                self.log_message(f"最大周期耗时: {status['max_tick_time'] * 1000:.2f} ms, "
+                                 f"超时周期: {int(status['overruns'])} 次")
+            self.last_status = code
+
+        if code == STATUS_RUNNING and status["tick"] != self.last_tick:
+            self.last_tick = status["tick"]
+            state = self.control_process.read_state()
+            self.series.append(state["t"], state["position"])
+            if self.series.count() > self.MAX_CHART_POINTS:
+                self.series.removePoints(0, self.series.count() - self.MAX_CHART_POINTS)
+
+    def read_parameters(self):
+        """读取界面上的增益和轨迹参数"""
+        return dict(
+            Kp=float(self.kp_input.text()),
+            Kd=float(self.kd_input.text()),
+            Ki=float(self.ki_input.text()),
+            Kf=float(self.kf_input.text()),
+            amplitude=float(self.amplitude_input.text()),
+            frequency=float(self.frequency_input.text()),
+        )
+
+    def update_parameters(self):
+        """运行中修改参数后立即下发，下一个控制周期生效，无需重启控制器"""
+        if not self.controller_running:
+            return
+        try:
+            version = self.control_process.update_parameters(**self.read_parameters())
+            self.log_message(f"参数已更新（版本 {version}）")
+        except ValueError as e:
+            self.log_message(f"参数格式错误: {e}")
+
     def start_controller(self):
         """启动阻抗控制器"""
         if self.controller_running:
@@ -128,58 +182,32 @@ class MainWindow(QMainWindow):
 
         try:
             # 获取参数
-            Kp = float(self.kp_input.text())
-            Kd = float(self.kd_input.text())
-            Ki = float(self.ki_input.text())
-            Kf = float(self.kf_input.text())
+            parameters = self.read_parameters()
             duration = float(self.duration_input.text())
-            amplitude = float(self.amplitude_input.text())
-            frequency = float(self.frequency_input.text())
-
-            # 初始化电机和轨迹生成器
-            motor = FilteredMotorController()
-            motor.initialize_odrive()
-            motor.set_torque_control_mode()
-            trajectory_handler = SineTrajectoryHandler(amplitude=amplitude, frequency=frequency)
-
-            # 创建控制器实例
-            self.controller = ImpedanceController(
-                motor_controller=motor,
-                trajectory_handler=trajectory_handler,
-                duration=duration,
-                Kp=Kp,
-                Kd=Kd,
-                Ki=Ki,
-                Kf=Kf
-            )
-
-            # 启动控制器线程
-            self.controller_thread = threading.Thread(target=self.run_controller)
-            self.controller_thread.start()
-            self.controller_running = True
+
+            # 参数写入共享内存，控制进程在下一次检查命令时启动控制
+            self.series.clear()
+            self.last_tick = 0
+            self.control_process.start_run(duration=duration, **parameters)
             self.log_message("控制器已启动！")
 
         except Exception as e:
             self.log_message(f"启动控制器时发生错误: {e}")
 
-    def run_controller(self):
-        """运行阻抗控制器"""
-        try:
-            self.controller.run()
-            self.log_message("阻抗控制完成！")
-        except Exception as e:
-            self.log_message(f"运行控制器时发生错误: {e}")
-        finally:
-            self.controller_running = False
-
     def stop_controller(self):
         """停止阻抗控制器"""
         if self.controller_running:
-            self.controller_running = False
+            self.control_process.stop_run()
             self.log_message("控制器已停止！")
         else:
             self.log_message("控制器未在运行中！")
 
+    def closeEvent(self, event):
+        """关闭窗口时结束控制进程"""
+        self.status_timer.stop()
+        self.control_process.shutdown()
+        super().closeEvent(event)
+
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -0,0 +1,132 @@
+import numpy as np
+from utils.legModel import LegModel, load_leg_models
+
+
+class FeedforwardModel:
+    """
+    基于腿部模型的前馈力矩：按参考轨迹的位置、速度、加速度计算惯性、重力和摩擦补偿，
+        前馈力矩 = scale * (惯量 * 加速度 + 重力 * sin(位置 - 重力零位) + 摩擦(速度))
+    反馈只需修正模型误差和外界扰动，跟踪不再依赖滤波后（有延迟）的误差信号。
+    支持标量（单腿，传入 LegModel）或数组（多腿，传入按腿排列的 LegModel 列表）；
+    参数按腿排列，输入可以是 (腿数,) 的单个周期，也可以是 (采样数, 腿数) 的整段轨迹。
+    """
+    def __init__(self, leg_model, scale=1.0):
+        """
+        :param leg_model: LegModel，或按腿排列的 LegModel 列表
+        :param scale: 前馈比例，0 表示关闭，1 表示完全补偿；模型不够准确时可以先取较小的值
+        """
+        if isinstance(leg_model, LegModel):
+            self.inertia = leg_model.inertia
+            self.viscous = leg_model.viscous
+            self.coulomb = leg_model.coulomb
+            self.coulomb_velocity = leg_model.coulomb_velocity
+            self.gravity = leg_model.gravity
+            self.gravity_offset = leg_model.gravity_offset
+        else:
+            self.inertia = np.array([model.inertia for model in leg_model], dtype=float)
+            self.viscous = np.array([model.viscous for model in leg_model], dtype=float)
+            self.coulomb = np.array([model.coulomb for model in leg_model], dtype=float)
+            self.coulomb_velocity = np.array([model.coulomb_velocity for model in leg_model], dtype=float)
+            self.gravity = np.array([model.gravity for model in leg_model], dtype=float)
+            self.gravity_offset = np.array([model.gravity_offset for model in leg_model], dtype=float)
+        self.scale = scale
+
+    @classmethod
+    def load(cls, path, names=None, scale=1.0):
+        """
+        从 save_leg_models（例如 data_utils.system_identification 的辨识结果）保存的文件构造。
+        :param path: JSON 文件路径
+        :param names: 可选，按腿排列的名称，例如 ["left", "right"]；默认按文件中的顺序，只有一条腿时构造单腿模型
+        :param scale: 前馈比例
+        """
+        models = load_leg_models(path)
+        if names is None:
+            names = list(models)
+        if len(names) == 1:
+            return cls(models[names[0]], scale)
+        return cls([models[name] for name in names], scale)
+
+    def torque(self, position, velocity, acceleration):
+        """
+        计算前馈力矩。
+        :param position: 参考位置
+        :param velocity: 参考速度
+        :param acceleration: 参考加速度
+        :return: 前馈力矩，形状与输入相同
+        """
+        torque = (self.inertia * acceleration
+                  + self.viscous * velocity
+                  + self.coulomb * np.tanh(velocity / self.coulomb_velocity)
+                  + self.gravity * np.sin(position - self.gravity_offset))
+        return self.scale * torque
+
+    def peak_torque(self, position, velocity, acceleration):
+        """
+        计算一段轨迹（例如 CoupledGaitTrajectory.period_profile 预先计算的一个周期）上每条腿的最大前馈力矩。
+        :return: 按腿排列的最大力矩绝对值
+        """
+        return np.max(np.abs(self.torque(position, velocity, acceleration)), axis=0)
+
+
+if __name__ == "__main__":
+    import math
+    import time
+    from controller.impedanceLaw import VectorImpedanceLaw
+    from utils.butterworthFilter import MultiButterworthFilter
+
+    # 仿真两条腿（含重力和摩擦）跟踪 1 Hz 步态，反馈使用滤波后的位置、速度（30 Hz，即速度等级系数表在该步态频率下的截止频率），
+    # 对比有无前馈和不同反馈增益
+    fs = 1000
+    dt = 1.0 / fs
+    models = [LegModel(inertia=0.05, viscous=0.02, coulomb=0.05, gravity=0.8),
+              LegModel(inertia=0.06, viscous=0.03, coulomb=0.04, gravity=0.9)]
+    # 辨识得到的模型带 10% 误差
+    identified = [LegModel(inertia=m.inertia * 1.1, viscous=m.viscous * 0.9, coulomb=m.coulomb,
+                           gravity=m.gravity * 1.1) for m in models]
+    truth = FeedforwardModel(models)
+    omega = 2 * math.pi * 1.0
+    t = np.arange(0, 6, dt)
+    phases = np.stack((omega * t, omega * t + math.pi), axis=1)
+    desired_position = 0.5 * np.cos(phases)
+    desired_velocity = -0.5 * omega * np.sin(phases)
+    desired_acceleration = -0.5 * omega ** 2 * np.cos(phases)
+
+    def simulate(Kp, Kd, feedforward):
+        law = VectorImpedanceLaw(2, Kp=Kp, Kd=Kd, Ki=0.0, Kf=0.0, max_torque=6.0)
+        position_filter = MultiButterworthFilter(2, 30, fs, 2)
+        velocity_filter = MultiButterworthFilter(2, 30, fs, 2)
+        position = desired_position[0].copy()
+        velocity = desired_velocity[0].copy()
+        errors = np.empty_like(desired_position)
+        for k in range(t.size):
+            measured_position = position_filter.filter_signal(position)
+            measured_velocity = velocity_filter.filter_signal(velocity)
+            torque = law.compute_target_torque(desired_position[k], measured_position,
+                                               desired_velocity[k], measured_velocity, dt)
+            if feedforward is not None:
+                torque = torque + feedforward.torque(desired_position[k], desired_velocity[k], desired_acceleration[k])
+            torque = np.clip(torque, -6.0, 6.0)
+            # 真实动力学：前馈模型在零加速度下给出除惯性外的全部被动力矩
+            acceleration = (torque - truth.torque(position, velocity, 0.0)) / truth.inertia
+            velocity = velocity + acceleration * dt
+            position = position + velocity * dt
+            errors[k] = desired_position[k] - position
+        return np.sqrt(np.mean(errors[fs:] ** 2, axis=0))
+
+    feedforward = FeedforwardModel(identified)
+    for Kp, Kd, model in ((20.0, 1.0, None), (20.0, 1.0, feedforward), (5.0, 0.3, None), (5.0, 0.3, feedforward)):
+        rms = simulate(Kp, Kd, model)
+        print(f"Kp={Kp:4.1f} Kd={Kd:.1f} {'有前馈' if model is not None else '无前馈'}: "
+              f"RMS 误差 左 {rms[0]:.4f} / 右 {rms[1]:.4f}")
+
+    # 每周期计算开销，以及一次预先计算整个步态周期
+    times = []
+    for k in range(5000):
+        start = time.perf_counter()
+        feedforward.torque(desired_position[k], desired_velocity[k], desired_acceleration[k])
+        times.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    peak = feedforward.peak_torque(desired_position[:fs], desired_velocity[:fs], desired_acceleration[:fs])
+    profile_time = time.perf_counter() - start
+    print(f"每周期前馈计算 {np.mean(times) * 1e6:.1f} us；预先计算一个周期 ({fs} 点) {profile_time * 1e6:.0f} us，"
+          f"峰值前馈力矩 左 {peak[0]:.2f} / 右 {peak[1]:.2f} Nm")
@@ -0,0 +1,239 @@
+import json
+import math
+import numpy as np
+from controller.impedanceLaw import VectorImpedanceLaw
+
+GAIN_NAMES = ("Kp", "Kd", "Ki")
+
+
+class GainSchedule:
+    """
+    按 速度等级 × 步态相位区间 预先计算的增益表。
+
+    控制循环中按当前速度等级和每个关节的步态相位在相邻两个相位区间之间线性插值，查表开销与表的大小无关。
+    挂接到 VectorImpedanceLaw 后，控制律的 Kp、Kd、Ki 成为本类增益数组的视图，每个周期一次写入；
+    在线自适应（VectorImpedanceLaw.adapt）作为表值之上的残差修正保留，残差每个周期按 residual_decay 衰减回表值。
+    """
+    def __init__(self, table, speed_levels, residual_decay=0.999):
+        """
+        :param table: 增益表，形状为 (速度等级数, 相位区间数, 3, 关节数)，第三维依次为 Kp、Kd、Ki
+        :param speed_levels: 与表第一维对应的速度等级
+        :param residual_decay: 在线自适应残差每个周期的衰减系数，1 表示不衰减
+        """
+        self.table = np.array(table, dtype=float)
+        self.speed_levels = list(speed_levels)
+        if self.table.ndim != 4 or self.table.shape[0] != len(self.speed_levels) or self.table.shape[2] != 3:
+            raise ValueError(f"增益表形状应为 ({len(self.speed_levels)}, 相位区间数, 3, 关节数)，实际为 {self.table.shape}。")
+        self.phase_bins = self.table.shape[1]
+        self.num_joints = self.table.shape[3]
+        self.residual_decay = residual_decay
+        # 首尾相接：第 phase_bins 行与第 0 行相同，插值时不需要取模；按 (区间, 关节, 增益) 排列，每个关节的三个增益连续存放
+        wrapped = np.concatenate((self.table, self.table[:, :1]), axis=1)
+        self._wrapped = np.ascontiguousarray(wrapped.transpose(0, 1, 3, 2))
+        self._scale = self.phase_bins / (2 * math.pi)
+        self._level = self._wrapped[0]
+        # 按 (关节, 增益) 排列，gains[:, 0] 即各关节的 Kp
+        self._gains = np.empty((self.num_joints, 3))
+        self._base = np.empty((self.num_joints, 3))
+        self._residual = np.zeros((self.num_joints, 3))
+        self.law = None
+
+    @classmethod
+    def constant(cls, speed_levels, phase_bins, num_joints, Kp=1.0, Kd=0.1, Ki=0.01, **options):
+        """
+        所有速度等级和相位区间使用相同增益的表，作为离线学习的初始值。
+        """
+        table = np.empty((len(speed_levels), phase_bins, 3, num_joints))
+        for i, value in enumerate((Kp, Kd, Ki)):
+            table[:, :, i, :] = value
+        return cls(table, speed_levels, **options)
+
+    def attach(self, law):
+        """
+        将控制律的 Kp、Kd、Ki 替换为本类增益数组的视图，之后由 update 写入。
+        :param law: VectorImpedanceLaw，关节数需与表一致
+        """
+        if law.num_joints != self.num_joints:
+            raise ValueError(f"控制律关节数 {law.num_joints} 与增益表关节数 {self.num_joints} 不一致。")
+        self.law = law
+        self._gains[:] = np.stack((law.Kp, law.Kd, law.Ki), axis=1)
+        self._residual[:] = 0.0
+        law.Kp, law.Kd, law.Ki = self._gains.T
+
+    def select_level(self, speed_level):
+        """
+        切换速度等级，只在速度等级变化时调用。
+        """
+        self._level = self._wrapped[self.speed_levels.index(speed_level)]
+
+    def update(self, gait_phases):
+        """
+        按各关节的步态相位插值表值，叠加残差后写入增益。
+        :param gait_phases: 按关节排列的步态相位 (弧度)
+        :return: 增益数组 (3, 关节数)
+        """
+        # 关节数很少，逐个关节插值比对整个数组做花式索引快
+        level = self._level
+        for j in range(self.num_joints):
+            x = (gait_phases[j] % (2 * math.pi)) * self._scale
+            lower = min(int(x), self.phase_bins - 1)
+            low = level[lower, j]
+            base = self._base[j]
+            np.subtract(level[lower + 1, j], low, out=base)
+            base *= x - lower
+            base += low
+        if self.residual_decay != 1.0:
+            self._residual *= self.residual_decay
+        np.add(self._base, self._residual, out=self._gains)
+        return self._gains.T
+
+    def absorb_adaptation(self):
+        """
+        在控制律的 adapt() 之后调用：把在线调整量记为表值之上的残差。
+        """
+        np.subtract(self._gains, self._base, out=self._residual)
+
+    def lookup(self, speed_level, gait_phase):
+        """
+        查询单个速度等级和相位下的表值（不含残差），用于分析和显示，不在控制循环中使用。
+        :return: {增益名称: 按关节排列的数组}
+        """
+        level = self._wrapped[self.speed_levels.index(speed_level)]
+        x = (gait_phase % (2 * math.pi)) * self._scale
+        lower = min(int(x), self.phase_bins - 1)
+        values = level[lower] + (x - lower) * (level[lower + 1] - level[lower])
+        return {name: values[:, i].copy() for i, name in enumerate(GAIN_NAMES)}
+
+    @property
+    def residual(self):
+        """
+        在线自适应残差 (3, 关节数)，依次为 Kp、Kd、Ki。
+        """
+        return self._residual.T
+
+    @classmethod
+    def learn(cls, sessions, speed_levels=range(1, 11), phase_bins=16, num_joints=2,
+              Kp=1.0, Kd=0.1, Ki=0.01, passes=1, **options):
+        """
+        从记录的控制过程离线学习增益表。
+
+        每个 (速度等级, 相位区间) 各自维护一组增益，按时间顺序重放记录中的位置、速度误差，
+        对样本所在的区间应用与在线自适应相同的规则（VectorImpedanceLaw.adapt），相当于让在线规则按相位分别收敛。
+        记录中的误差是在记录时的增益下产生的，重放不考虑增益变化对误差的影响，因此学习结果适合作为初始值，
+        运行时可以再叠加在线残差修正。没有样本的区间保持初始增益。
+        :param sessions: 记录列表，每条记录为 load_session 的返回值
+        :param passes: 重放次数
+        :return: GainSchedule
+        """
+        schedule = cls.constant(speed_levels, phase_bins, num_joints, Kp, Kd, Ki, **options)
+        size = phase_bins * num_joints
+        for level_index, level in enumerate(schedule.speed_levels):
+            level_sessions = [session for session in sessions if session["speed_level"] == level]
+            if not level_sessions:
+                continue
+            # 每个 (相位区间, 关节) 作为控制律的一个“关节”，只有样本所在的位置误差非零，其余增益保持不变
+            law = VectorImpedanceLaw(size)
+            law.Kp, law.Kd, law.Ki = (schedule.table[level_index, :, i, :].reshape(size) for i in range(3))
+            for _ in range(passes):
+                for session in level_sessions:
+                    # 表值位于各区间起点，样本归入最近的表值
+                    phases = np.mod(session["gait_phase"], 2 * math.pi)
+                    bins = np.rint(phases * schedule._scale).astype(int) % phase_bins
+                    slots = bins * num_joints + np.arange(num_joints)
+                    for index, position_error, velocity_error in zip(
+                            slots, session["position_error"], session["velocity_error"]):
+                        law.position_error[:] = 0.0
+                        law.velocity_error[:] = 0.0
+                        law.position_error[index] = position_error
+                        law.velocity_error[index] = velocity_error
+                        law.adapt()
+            for i, gains in enumerate((law.Kp, law.Kd, law.Ki)):
+                schedule.table[level_index, :, i, :] = gains.reshape(phase_bins, num_joints)
+        return cls(schedule.table, schedule.speed_levels, **options)
+
+    def to_dict(self):
+        return {"speed_levels": self.speed_levels, "residual_decay": self.residual_decay,
+                "table": self.table.tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["table"], data["speed_levels"], residual_decay=data.get("residual_decay", 0.999))
+
+    def save(self, path):
+        with open(path, mode='w', encoding='utf-8') as file:
+            json.dump(self.to_dict(), file)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, mode='r', encoding='utf-8') as file:
+            return cls.from_dict(json.load(file))
+
+
+def save_session(path, speed_level, gait_phase, position_error, velocity_error):
+    """
+    保存一次控制过程的记录，用于离线学习增益表。
+    :param gait_phase: 每个周期各关节的步态相位，形状 (周期数, 关节数)，下同
+    """
+    np.savez(path, speed_level=speed_level, gait_phase=gait_phase,
+             position_error=position_error, velocity_error=velocity_error)
+
+
+def load_session(path):
+    """
+    :return: {"speed_level", "gait_phase", "position_error", "velocity_error"}
+    """
+    with np.load(path) as data:
+        return {
+            "speed_level": int(data["speed_level"]),
+            "gait_phase": data["gait_phase"],
+            "position_error": data["position_error"],
+            "velocity_error": data["velocity_error"],
+        }
+
+
+if __name__ == "__main__":
+    import time
+
+    # 模拟记录：支撑相（相位 0 附近）误差大，摆动相误差小，两个速度等级
+    rng = np.random.default_rng(0)
+    sessions = []
+    for level in (3, 7):
+        phase = np.cumsum(np.full(5000, 2 * math.pi * 0.1 * level / 1000))
+        gait_phase = np.stack((phase, phase + math.pi), axis=1)
+        position_error = 0.2 * np.cos(gait_phase) ** 8 * level / 5 + rng.normal(0, 0.01, gait_phase.shape)
+        velocity_error = 0.5 * position_error
+        sessions.append({"speed_level": level, "gait_phase": gait_phase,
+                         "position_error": position_error, "velocity_error": velocity_error})
+
+    start = time.perf_counter()
+    schedule = GainSchedule.learn(sessions, phase_bins=16)
+    print(f"离线学习耗时 {time.perf_counter() - start:.2f} s")
+    for level in (3, 7):
+        for degrees in (0, 90, 180):
+            gains = schedule.lookup(level, math.radians(degrees))
+            print(f"速度等级 {level} 相位 {degrees:3d}°: Kp {gains['Kp'][0]:.3f}  Kd {gains['Kd'][0]:.3f}  Ki {gains['Ki'][0]:.4f}")
+
+    # 控制循环中的查表开销
+    law = VectorImpedanceLaw(2)
+    schedule.attach(law)
+    schedule.select_level(7)
+    phases = np.zeros(2)
+    times = []
+    for n in range(20000):
+        phases[0] = n * 0.001
+        phases[1] = phases[0] + math.pi
+        begin = time.perf_counter()
+        schedule.update(phases)
+        times.append(time.perf_counter() - begin)
+    times = np.array(times) * 1e6
+    print(f"update 每周期耗时: 平均 {times.mean():.1f} us, P99 {np.percentile(times, 99):.1f} us")
+
+    # 残差修正：自适应调整后残差随时间衰减回表值
+    law.position_error[:] = 0.5
+    law.velocity_error[:] = 0.5
+    law.adapt()
+    schedule.absorb_adaptation()
+    print(f"自适应后 Kp 残差 {schedule.residual[0, 0]:.4f}", end="")
+    for n in range(1000):
+        schedule.update(phases)
+    print(f"，1000 个周期后 {schedule.residual[0, 0]:.4f}")
@@ -0,0 +1,252 @@
+import time
+import numpy as np
+
+# 归零结束原因
+REASON_CONTACT = "contact"        # 外部力矩超过阈值
+REASON_STALL = "stall"            # 力矩已加满但关节停止运动（顶到限位）
+REASON_MAX_TRAVEL = "max_travel"  # 达到最大行程仍未接触
+REASON_TIMEOUT = "timeout"        # 超时
+REASON_NO_MOTION = "no_motion"    # 力矩已加满但关节从未离开起点（搜索力矩不足以克服静摩擦等）
+
+REASON_NAMES = {
+    REASON_CONTACT: "检测到外界阻力",
+    REASON_STALL: "检测到堵转",
+    REASON_MAX_TRAVEL: "达到最大行程",
+    REASON_TIMEOUT: "超时",
+    REASON_NO_MOTION: "未运动",
+}
+
+
+class HomingError(Exception):
+    """
+    归零无法进行：至少一条腿在搜索力矩下没有运动，继续使用起点作为零位是错误的。
+    """
+    def __init__(self, message, results):
+        super().__init__(message)
+        self.results = results
+
+
+class ApproachProfile:
+    """
+    单条腿的接触搜索参数：以恒定力矩（带起始斜坡）向一个方向缓慢运动，直到满足停止条件。
+    位置、速度使用电机控制器返回的单位。
+    """
+    def __init__(self, torque=0.1, ramp_time=0.05, max_travel=np.pi, timeout=5.0,
+                 contact_torque=1.0, stall_velocity=0.05, stall_time=0.1, min_travel=0.02):
+        """
+        :param torque: 搜索力矩 (Nm)，符号决定运动方向
+        :param ramp_time: 力矩从 0 增加到 torque 的时间 (秒)
+        :param max_travel: 最大行程，超过后停止并判定为未接触
+        :param timeout: 超时时间 (秒)
+        :param contact_torque: 外部力矩阈值 (Nm)，None 表示不使用该条件
+        :param stall_velocity: 堵转速度阈值，None 表示不使用堵转条件
+        :param stall_time: 速度持续低于阈值多长时间判定为堵转 (秒)
+        :param min_travel: 堵转判定为接触所需的最小行程；行程不足时的堵转判定为未运动，归零失败
+        """
+        self.torque = torque
+        self.ramp_time = ramp_time
+        self.max_travel = max_travel
+        self.timeout = timeout
+        self.contact_torque = contact_torque
+        self.stall_velocity = stall_velocity
+        self.stall_time = stall_time
+        self.min_travel = min_travel
+
+
+class HomingResult:
+    """
+    单条腿的归零结果。
+    """
+    def __init__(self, name, reason, time_to_home, start_position, position):
+        self.name = name
+        self.reason = reason
+        self.success = reason in (REASON_CONTACT, REASON_STALL)
+        self.time_to_home = time_to_home
+        self.start_position = start_position
+        self.position = position  # 停止时的位置，归零成功时即为零位
+        self.travel = abs(position - start_position)
+
+
+class LegHoming:
+    """
+    单条腿的接触搜索状态机，每个控制周期调用一次 step，各腿之间互不影响。
+    """
+    def __init__(self, name, profile):
+        self.name = name
+        self.profile = profile
+        self.result = None
+        self._start_time = None
+        self._start_position = None
+        self._still_since = None
+
+    @property
+    def active(self):
+        return self.result is None
+
+    def start(self, now, position):
+        self._start_time = now
+        self._start_position = position
+        self._still_since = None
+        self.result = None
+
+    def step(self, now, position, velocity, external_torque):
+        """
+        :return: 本周期的力矩指令，结束后返回 0
+        """
+        profile = self.profile
+        elapsed = now - self._start_time
+        ramp_done = elapsed >= profile.ramp_time
+
+        reason = None
+        if profile.contact_torque is not None and ramp_done and abs(external_torque) > profile.contact_torque:
+            reason = REASON_CONTACT
+        elif abs(position - self._start_position) >= profile.max_travel:
+            reason = REASON_MAX_TRAVEL
+        elif elapsed >= profile.timeout:
+            reason = REASON_TIMEOUT
+        elif profile.stall_velocity is not None and ramp_done:
+            # 力矩加满后速度持续低于阈值：走过最小行程后为顶到限位或被外界挡住，否则是根本没有动起来
+            if abs(velocity) < profile.stall_velocity:
+                if self._still_since is None:
+                    self._still_since = now
+                elif now - self._still_since >= profile.stall_time:
+                    moved = abs(position - self._start_position) >= profile.min_travel
+                    reason = REASON_STALL if moved else REASON_NO_MOTION
+            else:
+                self._still_since = None
+
+        if reason is not None:
+            self.result = HomingResult(self.name, reason, elapsed, self._start_position, position)
+            return 0.0
+        return profile.torque * min(elapsed / profile.ramp_time, 1.0) if profile.ramp_time > 0 else profile.torque
+
+
+class HomingRoutine:
+    """
+    多条腿同时进行的接触搜索（归零）。
+
+    所有腿在同一个控制周期内读取状态、各自判断停止条件，已结束的腿力矩置零，其他腿继续搜索，
+    总耗时由最慢的一条腿决定，而不是等所有腿同时满足条件。
+    电机控制器可以是单电机（MotorController 及其子类）或多电机（MultiMotorController 及其子类）。
+    """
+    def __init__(self, motor_controller, profiles, rate=1000, names=None):
+        """
+        :param motor_controller: 电机控制器，需要提供滤波后的位置、速度以及 estimate_external_torque
+        :param profiles: 按轴排列的 ApproachProfile 列表
+        :param rate: 控制频率 (Hz)
+        :param names: 可选，按轴排列的名称
+        """
+        self.motor_controller = motor_controller
+        self.multi_axis = hasattr(motor_controller, "num_axes")
+        num_axes = motor_controller.num_axes if self.multi_axis else 1
+        if len(profiles) != num_axes:
+            raise ValueError(f"归零参数数量 {len(profiles)} 与电机数量 {num_axes} 不一致。")
+        if names is None:
+            names = getattr(motor_controller, "names", None) or [f"motor{i + 1}" for i in range(num_axes)]
+        self.legs = [LegHoming(name, profile) for name, profile in zip(names, profiles)]
+        self.period = 1.0 / rate
+        self.results = []
+        self.total_time = None
+
+    def _write(self, commands):
+        if self.multi_axis:
+            self.motor_controller.set_input_torque(commands)
+        else:
+            self.motor_controller.set_input_torque(float(commands[0]))
+
+    def _read(self, commands):
+        motor = self.motor_controller
+        motor.advance_tick()
+        position = np.atleast_1d(motor.get_pos_estimate_filtered())
+        velocity = np.atleast_1d(motor.get_vel_estimate_filtered())
+        external = np.atleast_1d(motor.estimate_external_torque(commands if self.multi_axis else float(commands[0])))
+        return position, velocity, external
+
+    def run(self):
+        """
+        执行归零，所有腿结束后返回。有腿在搜索力矩下没有运动时抛出 HomingError（力矩已置零，结果见异常的 results）。
+        :return: 按轴排列的 HomingResult 列表
+        """
+        commands = np.zeros(len(self.legs))
+        start = time.perf_counter()
+        position, _, _ = self._read(commands)
+        for i, leg in enumerate(self.legs):
+            leg.start(start, float(position[i]))
+
+        next_tick = start
+        try:
+            while any(leg.active for leg in self.legs):
+                now = time.perf_counter()
+                position, velocity, external = self._read(commands)
+                for i, leg in enumerate(self.legs):
+                    if leg.active:
+                        commands[i] = leg.step(now, float(position[i]), float(velocity[i]), float(external[i]))
+                self._write(commands)
+
+                next_tick += self.period
+                delay = next_tick - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_tick = time.perf_counter()
+        finally:
+            commands[:] = 0.0
+            self._write(commands)
+
+        self.total_time = time.perf_counter() - start
+        self.results = [leg.result for leg in self.legs]
+        stuck = [result.name for result in self.results if result.reason == REASON_NO_MOTION]
+        if stuck:
+            raise HomingError(f"{', '.join(stuck)} 在搜索力矩下没有运动，请增大搜索力矩或检查机械卡滞。", self.results)
+        return self.results
+
+    @property
+    def success(self):
+        return bool(self.results) and all(result.success for result in self.results)
+
+    def report(self):
+        """
+        打印每条腿的归零结果和总耗时。
+        """
+        for result in self.results:
+            print(f"  {result.name}: {REASON_NAMES[result.reason]}，耗时 {result.time_to_home * 1000:.0f} ms，"
+                  f"行程 {result.travel:.3f}，零位 {result.position:.4f}")
+        if self.total_time is not None:
+            print(f"  归零总耗时: {self.total_time * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    from motor.deviceManager import ODriveDeviceManager
+    from motor.doubleMotorController import FilteredDoubleMotorController
+    from motor.simulatedDevice import simulated_finder
+    from utils.lazyImport import wait_for_preloads
+
+    # 模拟测试：左腿限位在 +0.3，右腿（反向安装）限位在 -0.6，两条腿同时搜索、各自停止
+    manager = ODriveDeviceManager(finder=simulated_finder())
+    motor = FilteredDoubleMotorController("SIM_L", "SIM_R", device_manager=manager)
+    motor.initialize_odrive()
+    motor.motors[0].odrv0.axis0.set_position_limits(-1.0, 0.3)
+    motor.motors[1].odrv0.axis0.set_position_limits(-0.6, 1.0)
+    motor.set_torque_control_mode()
+    wait_for_preloads()
+
+    routine = HomingRoutine(motor, [ApproachProfile(torque=0.1), ApproachProfile(torque=-0.1)])
+    routine.run()
+    print("归零成功" if routine.success else "归零失败")
+    routine.report()
+    motor.stop_motor()
+
+    # 右腿库仑摩擦大于搜索力矩，几乎不动：不能把起点当作零位
+    from utils.legModel import LegModel
+    manager = ODriveDeviceManager(finder=simulated_finder(leg_models={"SIM_R": LegModel(coulomb=0.2)}))
+    motor = FilteredDoubleMotorController("SIM_L", "SIM_R", device_manager=manager)
+    motor.initialize_odrive()
+    motor.motors[0].odrv0.axis0.set_position_limits(-1.0, 0.3)
+    motor.set_torque_control_mode()
+    routine = HomingRoutine(motor, [ApproachProfile(torque=0.1), ApproachProfile(torque=-0.1)])
+    try:
+        routine.run()
+    except HomingError as e:
+        print(f"归零失败: {e}")
+        routine.report()
+    motor.stop_motor()
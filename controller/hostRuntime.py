@@ -0,0 +1,310 @@
+import asyncio
+import csv
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from motor.deviceManager import get_device_manager
+from utils.lazyImport import wait_for_preloads
+
+
+class LoopHealth:
+    """
+    单个控制单元的周期健康指标：周期开始时刻相对计划时刻的延迟、每周期耗时、超时周期数。
+    数据写入预分配数组，超出容量后覆盖最旧的记录。
+    """
+    def __init__(self, period, capacity=100000):
+        self.period = period
+        self.lateness = np.zeros(capacity)
+        self.durations = np.zeros(capacity)
+        self.capacity = capacity
+        self.ticks = 0
+        self.overruns = 0  # 结束时刻晚于下一周期计划开始时刻的周期数
+        self.started_at = None
+        self.stopped_at = None
+
+    def record(self, lateness, duration):
+        index = self.ticks % self.capacity
+        self.lateness[index] = lateness
+        self.durations[index] = duration
+        self.ticks += 1
+        if lateness + duration > self.period:
+            self.overruns += 1
+
+    def summary(self):
+        """
+        :return: 指标字典，时间单位为毫秒
+        """
+        n = min(self.ticks, self.capacity)
+        elapsed = (self.stopped_at or time.perf_counter()) - (self.started_at or time.perf_counter())
+        if n == 0:
+            return {"ticks": 0, "rate": 0.0, "overrun_ratio": 0.0, "lateness_p99": 0.0, "duration_mean": 0.0,
+                    "duration_max": 0.0}
+        return {
+            "ticks": self.ticks,
+            "rate": self.ticks / elapsed if elapsed > 0 else 0.0,
+            "overrun_ratio": self.overruns / self.ticks,
+            "lateness_p99": float(np.percentile(self.lateness[:n], 99)) * 1000,
+            "duration_mean": float(self.durations[:n].mean()) * 1000,
+            "duration_max": float(self.durations[:n].max()) * 1000,
+        }
+
+
+class TelemetrySink:
+    """
+    所有单元共享的遥测输出：控制周期只把数据追加到内存队列，由独立的协程定期批量写入 CSV，不阻塞控制周期。
+    """
+    def __init__(self, path=None, flush_interval=0.1, max_pending=100000):
+        """
+        :param path: 可选，CSV 文件路径，None 时只计数不写文件
+        :param flush_interval: 批量写入间隔 (秒)
+        :param max_pending: 队列上限，写入跟不上时丢弃最旧的数据
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self._pending = deque(maxlen=max_pending)
+        self.rows_written = 0
+        if path is not None:
+            with open(path, mode='w', newline='') as file:
+                csv.writer(file).writerow(["unit", "t", "values..."])
+
+    def record(self, unit, t, values):
+        self._pending.append((unit, t) + tuple(values))
+
+    def _write(self, rows):
+        if self.path is not None:
+            with open(self.path, mode='a', newline='') as file:
+                csv.writer(file).writerows(rows)
+        self.rows_written += len(rows)
+
+    async def flush(self, executor=None):
+        rows = []
+        while self._pending:
+            rows.append(self._pending.popleft())
+        if rows:
+            await asyncio.get_running_loop().run_in_executor(executor, self._write, rows)
+
+    async def run(self, stop_event, executor=None):
+        while not stop_event.is_set():
+            try:
+                await asyncio.wait_for(stop_event.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush(executor)
+
+
+class ControlUnit:
+    """
+    运行时中的一个外骨骼单元：一个电机控制器 + 一个阻抗控制器，按固定频率执行控制周期。
+    """
+    def __init__(self, name, motor_controller, controller, rate=1000):
+        """
+        :param name: 单元名称
+        :param motor_controller: 电机控制器（MotorController 或 MultiMotorController 及其子类）
+        :param controller: 提供 control_step(t, dt) 的控制器，例如 ImpedanceController、DualLegImpedanceController
+        :param rate: 控制频率 (Hz)
+        """
+        self.name = name
+        self.motor_controller = motor_controller
+        self.controller = controller
+        self.period = 1.0 / rate
+        self.health = LoopHealth(self.period)
+        self.error = None
+
+    def motors(self):
+        return getattr(self.motor_controller, "motors", [self.motor_controller])
+
+    def setup(self):
+        self.motor_controller.initialize_odrive()
+        self.motor_controller.set_torque_control_mode()
+
+    def step(self, t, dt):
+        return self.controller.control_step(t, dt)
+
+    def run(self, duration, telemetry=None, stop_event=None):
+        """
+        在单元专用的线程中运行控制循环：按绝对时刻调度，每个周期直接在本线程内等待并执行，不经过事件循环或线程池。
+        :param duration: 运行时长 (秒)
+        :param telemetry: 可选，TelemetrySink
+        :param stop_event: 可选，threading.Event，置位后提前结束
+        """
+        period = self.period
+        start = next_tick = last = time.perf_counter()
+        self.health.started_at = start
+        try:
+            while next_tick - start < duration and not (stop_event is not None and stop_event.is_set()):
+                delay = next_tick - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                now = time.perf_counter()
+                try:
+                    result = self.step(now - start, now - last)
+                except Exception as e:
+                    self.error = e
+                    print(f"单元 {self.name} 出错，已停止该单元: {e}")
+                    break
+                self.health.record(now - next_tick, time.perf_counter() - now)
+                last = now
+                if telemetry is not None and result is not None:
+                    telemetry.record(self.name, now - start, result)
+
+                # 按绝对时刻调度，落后一个周期以上时重新对齐，不追赶
+                next_tick += period
+                if time.perf_counter() - next_tick > period:
+                    next_tick = time.perf_counter()
+        finally:
+            self.health.stopped_at = time.perf_counter()
+            self.motor_controller.stop_motor()
+
+
+class HostRuntime:
+    """
+    单进程多单元运行时。
+
+    每个单元在自己的线程中按绝对时刻调度并直接执行控制周期（见 ControlUnit.run），周期之间不经过事件循环，
+    USB 等待期间释放 GIL，因此一个单元的 I/O 不会阻塞其他单元。
+    事件循环只负责启动时对所有单元统一并行搜索设备、初始化电机，以及把遥测数据批量写入共享的 TelemetrySink。
+    """
+    def __init__(self, device_manager=None, telemetry=None, max_workers=None):
+        """
+        :param device_manager: 可选，设备管理器，各单元的电机控制器应使用同一个管理器
+        :param telemetry: 可选，TelemetrySink
+        :param max_workers: 可选，设备初始化使用的线程数，默认每个单元一个；控制循环总是每个单元一个专用线程
+        """
+        self.device_manager = device_manager if device_manager is not None else get_device_manager()
+        self.telemetry = telemetry
+        self.max_workers = max_workers
+        self.units = []
+
+    def add_unit(self, name, motor_controller, controller, rate=1000):
+        unit = ControlUnit(name, motor_controller, controller, rate)
+        self.units.append(unit)
+        return unit
+
+    def discover(self):
+        """
+        并行搜索所有单元的 USB 设备。
+        """
+        serials = [motor.odrv_serial for unit in self.units for motor in unit.motors() if motor.TRANSPORT == "usb"]
+        if serials:
+            print(f"正在并行寻找 {len(serials)} 个 ODrive...")
+            self.device_manager.discover(serials)
+            self.device_manager.report()
+
+    async def run_async(self, duration):
+        """
+        :param duration: 运行时长 (秒)
+        """
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers or max(len(self.units), 1),
+                                      thread_name_prefix="unit-setup")
+        unit_executor = ThreadPoolExecutor(max_workers=max(len(self.units), 1), thread_name_prefix="unit-loop")
+        abort = threading.Event()
+        try:
+            await loop.run_in_executor(executor, self.discover)
+            await asyncio.gather(*(loop.run_in_executor(executor, unit.setup) for unit in self.units))
+            await loop.run_in_executor(executor, wait_for_preloads)
+
+            stop_event = asyncio.Event()
+            telemetry_task = None
+            if self.telemetry is not None:
+                telemetry_task = asyncio.create_task(self.telemetry.run(stop_event))
+            try:
+                await asyncio.gather(*(loop.run_in_executor(unit_executor, unit.run, duration, self.telemetry, abort)
+                                       for unit in self.units))
+            finally:
+                # 被取消（例如 Ctrl+C）时通知各单元的控制循环结束
+                abort.set()
+            stop_event.set()
+            if telemetry_task is not None:
+                await telemetry_task
+        finally:
+            unit_executor.shutdown(wait=True)
+            executor.shutdown(wait=True)
+
+    def run(self, duration):
+        asyncio.run(self.run_async(duration))
+
+    def report(self):
+        """
+        打印每个单元的周期健康指标。
+        """
+        print(f"{'单元':<10}{'周期数':>8}{'频率(Hz)':>10}{'超时率':>8}{'延迟P99(ms)':>13}{'耗时均值(ms)':>14}")
+        for unit in self.units:
+            s = unit.health.summary()
+            print(f"{unit.name:<10}{s['ticks']:>8}{s['rate']:>10.0f}{s['overrun_ratio'] * 100:>7.1f}%"
+                  f"{s['lateness_p99']:>13.3f}{s['duration_mean']:>14.3f}"
+                  + (f"  错误: {unit.error}" if unit.error is not None else ""))
+        if self.telemetry is not None:
+            print(f"遥测记录: {self.telemetry.rows_written} 行")
+
+
+if __name__ == "__main__":
+    import sys
+    from motor.deviceManager import ODriveDeviceManager
+    from motor.filteredmotorController import FilteredMotorController
+    from motor.motorController import MotorController
+    from motor.simulatedDevice import simulated_finder
+    from trajectory_handler.sineGenerator import SineTrajectoryHandler
+    from main_impedance_single import ImpedanceController
+
+    class PDController:
+        """
+        负载测试用的轻量控制器：只有读状态 + PD 力矩输出，用于测量运行时本身的开销。
+        """
+        def __init__(self, motor_controller, Kp=1.0, Kd=0.05):
+            self.motor_controller = motor_controller
+            self.Kp = Kp
+            self.Kd = Kd
+
+        def control_step(self, t, dt):
+            self.motor_controller.advance_tick()
+            position = self.motor_controller.get_pos_estimate()
+            velocity = self.motor_controller.get_vel_estimate()
+            torque = -self.Kp * position - self.Kd * velocity
+            self.motor_controller.set_input_torque(torque)
+            return position, velocity, torque
+
+    def pd_unit(serial, rate, manager):
+        motor = MotorController(serial, device_manager=manager)
+        return motor, PDController(motor)
+
+    def impedance_unit(serial, rate, manager):
+        motor = FilteredMotorController(serial, sampling_freq=rate, device_manager=manager)
+        return motor, ImpedanceController(motor, SineTrajectoryHandler(amplitude=0.5, frequency=0.5), duration,
+                                          plot=False)
+
+    # 负载测试：python -m controller.hostRuntime [USB 单次访问延迟(ms)]
+    io_latency = float(sys.argv[1]) / 1000 if len(sys.argv) > 1 else 0.0001
+    duration = 2.0
+
+    def load_test(make_unit, num_units, rate):
+        manager = ODriveDeviceManager(finder=simulated_finder(io_latency))
+        runtime = HostRuntime(manager, TelemetrySink())
+        for i in range(num_units):
+            motor, controller = make_unit(f"SIM{i}", rate, manager)
+            runtime.add_unit(f"unit{i}", motor, controller, rate)
+        runtime.run(duration)
+        summaries = [unit.health.summary() for unit in runtime.units]
+        achieved = min(s["rate"] for s in summaries)
+        overrun = max(s["overrun_ratio"] for s in summaries)
+        step_time = max(s["duration_mean"] for s in summaries)
+        return achieved, overrun, step_time
+
+    results = []
+    for label, make_unit in (("PD 控制器", pd_unit), ("阻抗控制器", impedance_unit)):
+        for rate in (500, 1000):
+            sustained = 0
+            for num_units in (1, 2, 4, 8, 16, 32):
+                achieved, overrun, step_time = load_test(make_unit, num_units, rate)
+                ok = achieved >= 0.95 * rate and overrun < 0.05
+                results.append(f"  {label} {rate:>4} Hz x {num_units:>2} 单元: 最低实际频率 {achieved:6.0f} Hz, "
+                               f"超时率 {overrun * 100:5.1f}%, 周期耗时 {step_time:6.3f} ms {'通过' if ok else '未达标'}")
+                if not ok:
+                    break
+                sustained = num_units
+            results.append(f"  => {label} {rate} Hz 下单进程可稳定运行 {sustained} 个单元")
+
+    print(f"模拟 USB 单次访问延迟 {io_latency * 1000:.2f} ms，每个单元运行 {duration:.0f} 秒")
+    print("\n".join(results))
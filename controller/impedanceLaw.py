@@ -0,0 +1,124 @@
+import numpy as np
+
+
+class VectorImpedanceLaw:
+    """
+    向量化阻抗控制律。
+
+    所有关节的增益、积分项、误差和限幅都以数组形式保存（按关节下标），
+    PID + 力反馈、限幅和自适应增益调整对所有关节一次完成，每个周期的 Python 开销不随关节数量增加。
+    中间结果写入预分配的缓冲区，调用方如需保留结果应自行拷贝。
+    """
+    # 自适应调整步长
+    LEARNING_RATE_KP = 0.01
+    LEARNING_RATE_KD = 0.005
+    LEARNING_RATE_KI = 0.001
+    # 误差阈值：大于阈值时增大增益，否则减小
+    POSITION_ERROR_THRESHOLD = 0.1
+    VELOCITY_ERROR_THRESHOLD = 0.1
+    # 自适应增益范围
+    KP_RANGE = (0.1, 10.0)
+    KD_RANGE = (0.01, 5.0)
+    KI_RANGE = (0.001, 0.1)
+
+    def __init__(self, num_joints, Kp=1.0, Kd=0.1, Ki=0.01, Kf=0.5, max_torque=6.0, integral_limit=1.0):
+        """
+        :param num_joints: 关节数量
+        :param Kp: 比例增益，标量或按关节排列的数组，下同
+        :param Kd: 微分增益
+        :param Ki: 积分增益
+        :param Kf: 外力反馈增益
+        :param max_torque: 输出力矩限幅
+        :param integral_limit: 积分项限幅
+        """
+        self.num_joints = num_joints
+        self.Kp = self._as_array(Kp)
+        self.Kd = self._as_array(Kd)
+        self.Ki = self._as_array(Ki)
+        self.Kf = self._as_array(Kf)
+        self.max_torque = self._as_array(max_torque)
+        self.integral_limit = self._as_array(integral_limit)
+
+        self.integral_error = np.zeros(num_joints)
+        self.position_error = np.zeros(num_joints)
+        self.velocity_error = np.zeros(num_joints)
+        self.target_torque = np.zeros(num_joints)
+        self.adjusted_torque = np.zeros(num_joints)
+        self._buffer = np.zeros(num_joints)
+        self._abs_buffer = np.zeros(num_joints)
+
+    def _as_array(self, value):
+        """
+        将标量或序列转换为按关节排列的浮点数组。
+        """
+        array = np.empty(self.num_joints)
+        array[:] = value
+        return array
+
+    def reset(self):
+        """
+        清空积分项。
+        """
+        self.integral_error[:] = 0.0
+
+    def compute_target_torque(self, desired_position, current_position, desired_velocity, current_velocity, dt):
+        """
+        计算所有关节的 PID 力矩。
+        :return: 目标力矩数组（内部缓冲区）
+        """
+        np.subtract(desired_position, current_position, out=self.position_error)
+        np.subtract(desired_velocity, current_velocity, out=self.velocity_error)
+
+        # 积分项累加并限幅
+        np.multiply(self.position_error, dt, out=self._buffer)
+        self.integral_error += self._buffer
+        np.clip(self.integral_error, -self.integral_limit, self.integral_limit, out=self.integral_error)
+
+        np.multiply(self.Kp, self.position_error, out=self.target_torque)
+        np.multiply(self.Kd, self.velocity_error, out=self._buffer)
+        self.target_torque += self._buffer
+        np.multiply(self.Ki, self.integral_error, out=self._buffer)
+        self.target_torque += self._buffer
+        return self.target_torque
+
+    def apply_force_feedback(self, external_torque):
+        """
+        叠加外力反馈并限幅。
+        :param external_torque: 按关节排列的外部力矩估计
+        :return: 最终输出力矩数组（内部缓冲区）
+        """
+        np.multiply(self.Kf, external_torque, out=self._buffer)
+        np.add(self.target_torque, self._buffer, out=self.adjusted_torque)
+        np.clip(self.adjusted_torque, -self.max_torque, self.max_torque, out=self.adjusted_torque)
+        return self.adjusted_torque
+
+    def adapt(self):
+        """
+        根据最近一次计算的误差自适应调整所有关节的 Kp、Kd 和 Ki：
+        误差大于阈值时按误差大小增大增益，否则减小增益。
+        """
+        # Kp
+        np.abs(self.position_error, out=self._abs_buffer)
+        np.greater(self._abs_buffer, self.POSITION_ERROR_THRESHOLD, out=self._buffer)
+        self._buffer *= 2.0
+        self._buffer -= 1.0
+        self._buffer *= self._abs_buffer
+        self._buffer *= self.LEARNING_RATE_KP
+        self.Kp += self._buffer
+
+        # Kd
+        np.abs(self.velocity_error, out=self._abs_buffer)
+        np.greater(self._abs_buffer, self.VELOCITY_ERROR_THRESHOLD, out=self._buffer)
+        self._buffer *= 2.0
+        self._buffer -= 1.0
+        self._buffer *= self._abs_buffer
+        self._buffer *= self.LEARNING_RATE_KD
+        self.Kd += self._buffer
+
+        # Ki（防止积分误差过大）
+        np.multiply(self.position_error, self.LEARNING_RATE_KI, out=self._buffer)
+        self.Ki += self._buffer
+
+        np.clip(self.Kp, *self.KP_RANGE, out=self.Kp)
+        np.clip(self.Kd, *self.KD_RANGE, out=self.Kd)
+        np.clip(self.Ki, *self.KI_RANGE, out=self.Ki)
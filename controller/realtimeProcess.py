@@ -0,0 +1,235 @@
+import os
+import time
+import multiprocessing
+from utils.sharedBlock import SharedBlock, ParameterBlock
+from utils.realtime import GCGuard, TickMetrics
+from utils.lazyImport import wait_for_preloads
+
+# 界面 -> 控制进程：命令
+COMMAND_FIELDS = ("command", "duration")
+# 界面 -> 控制进程：增益与轨迹参数，运行中更新时在下一个控制周期生效
+PARAMETER_FIELDS = ("Kp", "Kd", "Ki", "Kf", "amplitude", "frequency")
+# 控制进程 -> 界面：最近一个控制周期的状态
+STATE_FIELDS = ("t", "position", "velocity", "target_torque", "adjusted_torque")
+# 控制进程 -> 界面：运行状态与周期统计
+STATUS_FIELDS = ("status", "tick", "tick_time", "max_tick_time", "overruns")
+
+COMMAND_NONE = 0
+COMMAND_START = 1
+COMMAND_STOP = 2
+COMMAND_SHUTDOWN = 3
+
+STATUS_CONNECTING = 0
+STATUS_IDLE = 1
+STATUS_RUNNING = 2
+STATUS_ERROR = 3
+STATUS_NAMES = {
+    STATUS_CONNECTING: "正在连接",
+    STATUS_IDLE: "空闲",
+    STATUS_RUNNING: "运行中",
+    STATUS_ERROR: "错误",
+}
+
+IDLE_POLL_INTERVAL = 0.01  # 空闲时检查命令的间隔 (秒)
+
+
+class ControlProcess:
+    """
+    独立的实时控制进程。
+
+    电机连接、阻抗控制循环都在子进程中运行，不与界面进程共享 GIL；
+    界面与控制进程之间只通过固定布局的共享内存块（命令、参数、状态、运行状态）交换数据，
+    读写都不加锁，界面卡顿不会阻塞控制循环，控制循环也从不等待界面。
+    """
+    def __init__(self, odrv_serial=None, cpu=None, period=0.001):
+        """
+        :param odrv_serial: 可选，ODrive 序列号
+        :param cpu: 可选，控制进程绑定的 CPU 核编号（仅 Linux 支持）
+        :param period: 控制周期 (秒)
+        """
+        self.command = SharedBlock(COMMAND_FIELDS, create=True)
+        self.parameters = ParameterBlock(PARAMETER_FIELDS, create=True)
+        self.state = SharedBlock(STATE_FIELDS, create=True)
+        self.status = SharedBlock(STATUS_FIELDS, create=True)
+        # 使用 spawn 启动，避免 fork 界面进程中的 Qt 状态
+        context = multiprocessing.get_context("spawn")
+        self.process = context.Process(
+            target=_control_process_main,
+            args=((self.command.name, self.parameters.name, self.state.name, self.status.name),
+                  odrv_serial, cpu, period),
+            name="impedance-control", daemon=True)
+
+    def start(self):
+        """
+        启动控制进程，进程启动后立即开始连接 ODrive。
+        """
+        self.process.start()
+
+    def start_run(self, Kp, Kd, Ki, Kf, amplitude, frequency, duration):
+        """
+        通知控制进程按给定参数开始阻抗控制。
+        """
+        self.parameters.push(Kp=Kp, Kd=Kd, Ki=Ki, Kf=Kf, amplitude=amplitude, frequency=frequency)
+        self.command.write(command=COMMAND_START, duration=duration)
+
+    def update_parameters(self, **changes):
+        """
+        运行中在线修改增益或轨迹参数，不重新连接电机，也不重置滤波器和积分项。
+        :param changes: PARAMETER_FIELDS 中的部分参数
+        :return: 参数版本号
+        """
+        return self.parameters.push(**changes)
+
+    def stop_run(self):
+        """
+        通知控制进程停止阻抗控制，电机停止但连接保留。
+        """
+        self.command.write(command=COMMAND_STOP)
+
+    def read_state(self):
+        """
+        :return: 最近一个控制周期的状态字典
+        """
+        self.state.read()
+        return self.state.as_dict()
+
+    def read_status(self):
+        """
+        :return: 运行状态字典，status 字段取值见 STATUS_NAMES
+        """
+        self.status.read()
+        return self.status.as_dict()
+
+    def is_running(self):
+        return self.read_status()["status"] == STATUS_RUNNING
+
+    def shutdown(self, timeout=2.0):
+        """
+        停止控制进程并释放共享内存。
+        """
+        if self.process.is_alive():
+            self.command.write(command=COMMAND_SHUTDOWN)
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join()
+        for block in (self.command, self.parameters, self.state, self.status):
+            block.close()
+
+
+def _pin_to_cpu(cpu):
+    if cpu is None:
+        return
+    if not hasattr(os, "sched_setaffinity"):
+        print("当前系统不支持绑定 CPU 核，忽略该设置。")
+        return
+    os.sched_setaffinity(0, {cpu})
+    print(f"控制进程已绑定到 CPU {cpu}")
+
+
+def _control_process_main(block_names, odrv_serial, cpu, period):
+    """
+    控制进程入口：连接电机，之后按命令块启动/停止阻抗控制，每个周期把状态写入共享内存。
+    """
+    _pin_to_cpu(cpu)
+    command = SharedBlock(COMMAND_FIELDS, block_names[0])
+    parameters = ParameterBlock(PARAMETER_FIELDS, block_names[1])
+    state = SharedBlock(STATE_FIELDS, block_names[2])
+    status = SharedBlock(STATUS_FIELDS, block_names[3])
+    status.write(status=STATUS_CONNECTING)
+
+    try:
+        # 电机和控制器模块只在控制进程中导入，界面进程不需要 odrive
+        from motor.filteredmotorController import FilteredMotorController
+        from trajectory_handler.sineGenerator import SineTrajectoryHandler
+        from main_impedance_single import ImpedanceController
+
+        motor = FilteredMotorController(odrv_serial)
+        motor.initialize_odrive()
+    except Exception as e:
+        print(f"控制进程连接 ODrive 失败: {e}")
+        status.write(status=STATUS_ERROR)
+        return
+    status.write(status=STATUS_IDLE)
+
+    controller = None
+    metrics = None
+    # 从 0 开始：连接期间界面写入的命令（例如提前点击开始）在连接完成后照常执行
+    last_version = 0
+    start_time = last_time = next_tick = 0.0
+    max_tick_time = 0.0
+    overruns = 0
+
+    def finish():
+        motor.stop_motor()
+        controller.analyze_performance()
+        metrics.report()
+        status.write(status=STATUS_IDLE)
+
+    try:
+        with GCGuard() as guard:
+            while True:
+                if command.current_version() != last_version and command.read() is not None:
+                    last_version = command.version
+                    code = int(command.get("command"))
+                    if code == COMMAND_SHUTDOWN:
+                        break
+                    if code == COMMAND_START and controller is None:
+                        motor.set_torque_control_mode()
+                        parameters.poll()
+                        trajectory_handler = SineTrajectoryHandler(amplitude=parameters.get("amplitude"),
+                                                                   frequency=parameters.get("frequency"))
+                        controller = ImpedanceController(
+                            motor, trajectory_handler, command.get("duration"),
+                            Kp=parameters.get("Kp"), Kd=parameters.get("Kd"),
+                            Ki=parameters.get("Ki"), Kf=parameters.get("Kf"),
+                            plot=False, parameters=parameters)
+                        wait_for_preloads()
+                        metrics = TickMetrics()
+                        max_tick_time = 0.0
+                        overruns = 0
+                        start_time = last_time = next_tick = time.perf_counter()
+                        status.write(status=STATUS_RUNNING, tick=0, tick_time=0.0, max_tick_time=0.0, overruns=0)
+                    elif code == COMMAND_STOP and controller is not None:
+                        finish()
+                        controller = None
+
+                if controller is None:
+                    guard.collect_in_slack(IDLE_POLL_INTERVAL)
+                    time.sleep(IDLE_POLL_INTERVAL)
+                    continue
+
+                now = time.perf_counter()
+                t = now - start_time
+                dt = now - last_time
+                last_time = now
+                if t >= controller.duration:
+                    finish()
+                    controller = None
+                    continue
+
+                metrics.begin_tick()
+                state.write(values=(t,) + tuple(controller.control_step(t, dt)))
+                elapsed = metrics.end_tick()
+                if elapsed > period:
+                    overruns += 1
+                max_tick_time = max(max_tick_time, elapsed)
+                status.write(tick=metrics.count, tick_time=elapsed, max_tick_time=max_tick_time, overruns=overruns)
+
+                # 按绝对时刻调度下一个周期，超时后重新对齐，不累积误差
+                next_tick += period
+                slack = next_tick - time.perf_counter()
+                if slack > 0:
+                    guard.collect_in_slack(slack)
+                    slack = next_tick - time.perf_counter()
+                    if slack > 0:
+                        time.sleep(slack)
+                else:
+                    next_tick = time.perf_counter()
+    except Exception as e:
+        print(f"控制进程运行出错: {e}")
+        status.write(status=STATUS_ERROR)
+    finally:
+        motor.stop_motor()
+        for block in (command, parameters, state, status):
+            block.close()
@@ -34,7 +34,8 @@ class DataCollectorThread(QThread):
             current_time = time.time()
             elapsed_time = current_time - start_time
 
-            # 获取左右腿当前状态
+            # 获取左右腿当前状态，每个周期只采样一次硬件
+            self.motor_controller.advance_tick()
             position_left, position_right = self.motor_controller.get_pos_estimate_filtered()
             velocity_left, velocity_right = self.motor_controller.get_vel_estimate_filtered()
             torque_left, torque_right = self.motor_controller.get_torque_estimate_filtered()
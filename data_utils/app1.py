@@ -7,6 +7,8 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import QThread, pyqtSignal, Qt
 from motor.doubleMotorController import FilteredDoubleMotorController
+from motor.deviceManager import ODriveDeviceManager
+from motor.simulatedDevice import simulated_finder
 
 
 class DataCollectorThread(QThread):
@@ -35,14 +37,11 @@ class DataCollectorThread(QThread):
             current_time = time.time()
             elapsed_time = current_time - start_time
 
-            # # 获取左右腿当前状态
-            # position_left, position_right = self.motor_controller.get_pos_estimate()
-            # velocity_left, velocity_right = self.motor_controller.get_vel_estimate()
-            # torque_left, torque_right = self.motor_controller.get_torque_estimate()
-            # 获取左右腿当前状态
-            position_left, position_right = self.motor_controller.get_fake_pos_estimate()
-            velocity_left, velocity_right = self.motor_controller.get_fake_vel_estimate()
-            torque_left, torque_right = self.motor_controller.get_fake_torque_estimate()
+            # 获取左右腿当前状态，两个轴的位置、速度、力矩一次并行读取
+            position, velocity, torque = self.motor_controller.read_state()
+            position_left, position_right = position
+            velocity_left, velocity_right = velocity
+            torque_left, torque_right = torque
 
             # 将数据写入 CSV 文件
             with open(self.data_file, mode='a', newline='') as file:
@@ -98,13 +97,18 @@ class ReplayThread(QThread):
 
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, simulated=True):
+        """
+        :param simulated: 是否使用模拟设备，不连接硬件也可以调试界面和数据采集
+        """
         super().__init__()
         self.setWindowTitle("数据采集与重放")
         self.setGeometry(100, 100, 800, 600)
 
         # 初始化电机控制器
-        self.motor_controller = FilteredDoubleMotorController("1", "2")
+        device_manager = ODriveDeviceManager(finder=simulated_finder()) if simulated else None
+        self.motor_controller = FilteredDoubleMotorController("1", "2", device_manager=device_manager)
+        self.motor_controller.initialize_odrive()
 
         # 初始化数据采集线程
         self.data_collector_thread = None
@@ -220,6 +224,7 @@ class MainWindow(QMainWindow):
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
-    window = MainWindow()
+    # python -m data_utils.app1 --hardware 连接真实的 ODrive，默认使用模拟设备
+    window = MainWindow(simulated="--hardware" not in sys.argv)
     window.show()
     sys.exit(app.exec_())
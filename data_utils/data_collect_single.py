@@ -1,3 +1,4 @@
+import sys
 import time
 import csv
 from motor.filteredmotorController import FilteredMotorController
@@ -25,32 +26,54 @@ class DataCollectorSingle:
                 "position", "velocity", "torque",
             ])
 
-    def run(self):
+    def run(self, pipelined=False, excitation=None):
         """
         主运行函数，用于实时采集数据并存储。记录的数据是没有经过滤波的原始数据
+        :param pipelined: 是否使用流水线读取，下一周期的读取与本周期的记录同时进行；记录原始采样值，不做延迟补偿。
+                          下一次读取在 advance_tick 取走本周期数据时立即发出，能够重叠的只有本周期的记录和 1 ms 休眠；
+                          USB 读取比这更慢时每个周期仍要等待上一次读取完成，周期由读取耗时决定（顺序读取则是读取 + 记录 + 休眠），
+                          传感流水线的 report 中“需要等待”次数接近读取次数即属于这种情况
+        :param excitation: 可选，以时间为参数返回力矩指令的函数（例如 data_utils.excitation.MultisineExcitation），
+                           用于系统辨识：电机每个周期输出该力矩，腿应悬空、人不施力；不给出时电机力矩保持为 0，
+                           记录的力矩没有能量，不能用于 data_utils.system_identification。退出时停止电机
         """
+        if pipelined:
+            self.motor_controller.enable_pipelining(compensate=False)
+        if self.is_show_graph:
+            self.plotter.open()
         start_time = time.time()
 
-        while True:
-            current_time = time.time()
-            elapsed_time = current_time - start_time
+        try:
+            while True:
+                current_time = time.time()
+                elapsed_time = current_time - start_time
+
+                # 获取当前状态，每个周期只采样一次硬件
+                self.motor_controller.advance_tick()
+                position = self.motor_controller.get_pos_estimate()
+                velocity = self.motor_controller.get_vel_estimate()
+                torque= self.motor_controller.get_torque_estimate()
 
-            # 获取左右腿当前状态
-            position = self.motor_controller.get_pos_estimate()
-            velocity = self.motor_controller.get_vel_estimate()
-            torque= self.motor_controller.get_torque_estimate()
+                if excitation is not None:
+                    self.motor_controller.set_input_torque(excitation(elapsed_time))
 
-            # 将数据写入 CSV 文件
-            with open(self.data_file, mode='a', newline='') as file:
-                writer = csv.writer(file)
-                writer.writerow([
-                    elapsed_time,
-                    position, velocity, torque,
-                ])
-            if self.is_show_graph:
-                self.plotter.update_data(elapsed_time,position,velocity,torque)
-            # 控制循环频率
-            time.sleep(0.001)
+                # 将数据写入 CSV 文件
+                with open(self.data_file, mode='a', newline='') as file:
+                    writer = csv.writer(file)
+                    writer.writerow([
+                        elapsed_time,
+                        position, velocity, torque,
+                    ])
+                if self.is_show_graph:
+                    self.plotter.update_data(elapsed_time,position,velocity,torque)
+                # 控制循环频率
+                time.sleep(0.001)
+        finally:
+            # 采集通常以 Ctrl+C 结束，退出或出错时都要停止流水线的后台读取线程
+            if excitation is not None:
+                self.motor_controller.stop_motor()
+            if pipelined:
+                self.motor_controller.disable_pipelining()
 
         # self.plotter.finalize()
 
@@ -75,5 +98,10 @@ if __name__ == "__main__":
     motor.initialize_odrive()
     motor.set_torque_control_mode()
 
+    # python -m data_utils.data_collect_single [--excite]：--excite 时电机输出多正弦激励，采集系统辨识数据
+    excitation = None
+    if "--excite" in sys.argv:
+        from data_utils.excitation import MultisineExcitation
+        excitation = MultisineExcitation()
     controller = DataCollectorSingle(motor)
-    controller.run()
+    controller.run(excitation=excitation)
@@ -0,0 +1,37 @@
+import math
+import numpy as np
+
+
+class MultisineExcitation:
+    """
+    系统辨识用的多正弦力矩激励：若干个随机频率、随机相位的正弦之和，频带覆盖步态频率，各通道相位独立。
+    电机输出力矩为 0、由人带动腿采集的数据中力矩列没有能量，无法辨识惯量、摩擦和重力；
+    采集时让电机输出该激励（腿悬空、人不施力），记录的力矩才能作为回归目标。
+    开始时在 ramp_time 内从 0 线性增大，避免力矩突变。
+    """
+    def __init__(self, amplitude=0.3, num_channels=1, num_sines=6, band=(0.2, 3.0), ramp_time=1.0, seed=None):
+        """
+        :param amplitude: 激励力矩峰值上限 (Nm)，各正弦的振幅为 amplitude / num_sines
+        :param num_channels: 通道数（腿数）
+        :param num_sines: 正弦个数
+        :param band: 频率范围 (Hz)
+        :param ramp_time: 开始时的渐变时间 (秒)
+        :param seed: 可选，随机种子
+        """
+        rng = np.random.default_rng(seed)
+        self.amplitude = amplitude
+        self.num_channels = num_channels
+        self.frequencies = rng.uniform(band[0], band[1], num_sines)
+        self.phases = rng.uniform(0, 2 * math.pi, (num_sines, num_channels))
+        self.ramp_time = ramp_time
+
+    def __call__(self, t):
+        """
+        :param t: 开始激励后的时间 (秒)
+        :return: 单通道时为力矩值，多通道时为按通道排列的力矩数组
+        """
+        torque = np.sin(2 * math.pi * self.frequencies[:, None] * t + self.phases).sum(axis=0)
+        torque *= self.amplitude / len(self.frequencies)
+        if t < self.ramp_time:
+            torque *= max(t, 0.0) / self.ramp_time
+        return float(torque[0]) if self.num_channels == 1 else torque
@@ -0,0 +1,270 @@
+import csv
+import math
+from itertools import islice
+import numpy as np
+from scipy import signal
+from utils.legModel import LegModel, save_leg_models
+
+# 回归量顺序：惯量、粘滞摩擦、库仑摩擦、重力的 sin、cos 分量
+# 重力 * sin(θ - θ0) = 重力 * cos(θ0) * sin(θ) - 重力 * sin(θ0) * cos(θ)，对参数是线性的
+NUM_PARAMETERS = 5
+
+
+def leg_columns(header):
+    """
+    根据 DataCollectorSingle / DataCollectorDouble 的表头找出每条腿的位置、速度、力矩列。
+    单腿表头为 position、velocity、torque，腿名称记为 "leg"；双腿表头为 position_left 等，腿名称为后缀。
+    :return: {腿名称: (位置列, 速度列, 力矩列)}
+    """
+    index = {name: i for i, name in enumerate(header)}
+    if "position" in index:
+        return {"leg": (index["position"], index["velocity"], index["torque"])}
+    legs = {}
+    for name in header:
+        if name.startswith("position_"):
+            leg = name[len("position_"):]
+            legs[leg] = (index[name], index[f"velocity_{leg}"], index[f"torque_{leg}"])
+    if not legs:
+        raise ValueError(f"无法识别的数据表头: {header}")
+    return legs
+
+
+def read_chunks(path, chunk_size):
+    """
+    分块读取数据文件，每次最多 chunk_size 行，不会一次把整个文件读入内存。
+    每块由 numpy 一次解析；块内有列数不对或无法解析的行（例如采集中断时写了一半的最后一行）时逐行解析并跳过这些行。
+    :return: 生成器，第一项为表头，之后每项为 (行数, 列数) 的数组
+    """
+    with open(path, mode='r', newline='') as file:
+        header = next(csv.reader([file.readline()]))
+        yield header
+        while True:
+            lines = list(islice(file, chunk_size))
+            if not lines:
+                break
+            try:
+                yield np.loadtxt(lines, delimiter=',', ndmin=2)
+            except ValueError:
+                rows = []
+                for row in csv.reader(lines):
+                    try:
+                        if len(row) == len(header):
+                            rows.append([float(value) for value in row])
+                    except ValueError:
+                        continue
+                if rows:
+                    yield np.array(rows)
+
+
+class SystemIdentification:
+    """
+    从采集的位置、速度、力矩记录中批量辨识每条腿的动力学参数：
+        力矩 = 惯量 * 加速度 + 粘滞摩擦 * 速度 + 库仑摩擦 * tanh(速度 / coulomb_velocity) + 重力 * sin(位置 - 重力零位)
+
+    数据按块流式处理，只累加每条腿 5×5 的正规方程，内存占用与记录长度无关，多个文件的数据合并求解。
+    所有信号用同一个零相位低通滤波，加速度由滤波后的速度对时间求导；相邻块之间重叠 overlap 个采样，
+    每块两端受滤波边界影响的部分不参与求解。最后求解带正则化的最小二乘。
+    回归目标是记录的电机力矩，电机力矩为 0 时采集的数据（人带动腿）无法辨识，需要用采集程序的激励模式
+    （DataCollectorSingle / DataCollectorDouble 的 run(excitation=...)）采集。
+    """
+    def __init__(self, cutoff_freq=10.0, order=2, coulomb_velocity=0.05, regularization=1e-6,
+                 chunk_size=50000, sampling_freq=None, min_torque_rms=0.02):
+        """
+        :param cutoff_freq: 零相位低通滤波的截止频率 (Hz)
+        :param order: 滤波器阶数
+        :param coulomb_velocity: 库仑摩擦平滑过渡的速度尺度，与 LegModel 一致
+        :param regularization: 正则化系数，相对于各回归量自身的能量，激励不足的参数被拉向 0
+        :param chunk_size: 每块读取的行数
+        :param sampling_freq: 采样频率 (Hz)，默认由第一块数据的时间戳估计
+        :param min_torque_rms: 力矩 RMS 下限 (Nm)，低于该值的腿没有激励，不输出模型
+        """
+        self.cutoff_freq = cutoff_freq
+        self.order = order
+        self.coulomb_velocity = coulomb_velocity
+        self.regularization = regularization
+        self.chunk_size = chunk_size
+        self.sampling_freq = sampling_freq
+        self.min_torque_rms = min_torque_rms
+        self.b = self.a = None
+        self.overlap = None
+        self.information = {}  # {腿名称: XᵀX}
+        self.target = {}       # {腿名称: Xᵀy}
+        self.energy = {}       # {腿名称: yᵀy}
+        self.count = {}        # {腿名称: 样本数}
+        self.files = []
+
+    def _design(self, timestamp):
+        if self.sampling_freq is None:
+            self.sampling_freq = 1.0 / np.median(np.diff(timestamp))
+        self.b, self.a = signal.butter(self.order, self.cutoff_freq / (0.5 * self.sampling_freq), btype='low')
+        # 滤波器的瞬态约为若干个截止频率周期
+        self.overlap = max(int(3 * self.sampling_freq / self.cutoff_freq), 3 * (self.order + 1))
+
+    def process_file(self, path):
+        """
+        处理一个数据文件，把其中的样本累加到各条腿的正规方程中。
+        文件行数不超过两端滤波边界（2 * overlap）时没有可用的样本，打印警告。
+        :param path: DataCollectorSingle / DataCollectorDouble 写出的 CSV 文件
+        :return: 本文件参与求解的样本数
+        """
+        chunks = read_chunks(path, self.chunk_size)
+        legs = leg_columns(next(chunks))
+        columns = [column for leg in legs.values() for column in leg]
+        names = list(legs)
+        used = 0
+        tail = None
+        for chunk in chunks:
+            data = chunk if tail is None else np.concatenate((tail, chunk))
+            if self.b is None:
+                self._design(data[:, 0])
+            # 头尾各 overlap 个采样受滤波边界影响，保留最后 2 * overlap 个采样与下一块拼接，使中间部分连续
+            if len(data) <= 2 * self.overlap:
+                tail = data
+                continue
+            used += self._accumulate(names, data[:, 0], data[:, columns])
+            tail = data[-2 * self.overlap:]
+        self.files.append(path)
+        if used == 0:
+            rows = 0 if tail is None else len(tail)
+            print(f"警告：{path} 只有 {rows} 行数据，不超过滤波边界 {2 * (self.overlap or 0)} 行，未参与辨识。")
+        return used
+
+    def _accumulate(self, names, timestamp, values):
+        """
+        :param values: (采样数, 腿数 * 3)，每条腿依次为位置、速度、力矩
+        """
+        filtered = signal.filtfilt(self.b, self.a, values, axis=0)
+        position = filtered[:, 0::3]
+        velocity = filtered[:, 1::3]
+        torque = filtered[:, 2::3]
+        acceleration = np.gradient(velocity, timestamp, axis=0)
+
+        valid = slice(self.overlap, len(timestamp) - self.overlap)
+        position, velocity, torque, acceleration = (x[valid] for x in (position, velocity, torque, acceleration))
+        # 回归矩阵 (采样数, 腿数, 参数数)
+        regressors = np.stack((acceleration, velocity, np.tanh(velocity / self.coulomb_velocity),
+                               np.sin(position), -np.cos(position)), axis=2)
+        information = np.einsum('nli,nlj->lij', regressors, regressors)
+        target = np.einsum('nli,nl->li', regressors, torque)
+        energy = np.einsum('nl,nl->l', torque, torque)
+        for i, name in enumerate(names):
+            if name not in self.information:
+                self.information[name] = np.zeros((NUM_PARAMETERS, NUM_PARAMETERS))
+                self.target[name] = np.zeros(NUM_PARAMETERS)
+                self.energy[name] = 0.0
+                self.count[name] = 0
+            self.information[name] += information[i]
+            self.target[name] += target[i]
+            self.energy[name] += energy[i]
+            self.count[name] += len(torque)
+        return len(torque)
+
+    def solve(self):
+        """
+        力矩 RMS 低于 min_torque_rms 的腿（例如电机力矩为 0 时采集的数据）无法辨识，打印警告并跳过，不输出模型。
+        :return: ({腿名称: LegModel}, {腿名称: 力矩拟合残差 RMS})
+        """
+        models = {}
+        residuals = {}
+        for name, information in self.information.items():
+            torque_rms = math.sqrt(self.energy[name] / max(self.count[name], 1))
+            if torque_rms < self.min_torque_rms:
+                print(f"警告：{name} 的力矩 RMS 只有 {torque_rms:.4f} Nm，数据没有力矩激励（可能是电机力矩为 0 时由人带动采集的），"
+                      f"无法辨识，已跳过。请用采集程序的 --excite 模式重新采集。")
+                continue
+            damping = self.regularization * np.diag(np.diag(information) + 1e-12)
+            theta = np.linalg.solve(information + damping, self.target[name])
+            inertia, viscous, coulomb, gravity_sin, gravity_cos = theta
+            # 残差平方和 = yᵀy - 2θᵀXᵀy + θᵀXᵀXθ
+            squared = self.energy[name] - 2 * theta @ self.target[name] + theta @ information @ theta
+            residuals[name] = math.sqrt(max(squared, 0.0) / max(self.count[name], 1))
+            if inertia <= 0 or viscous < 0 or coulomb < 0:
+                print(f"警告：{name} 的辨识结果不符合物理意义（惯量 {inertia:.4g}，粘滞 {viscous:.4g}，库仑 {coulomb:.4g}），"
+                      f"数据的激励可能不足。")
+            models[name] = LegModel(inertia=float(inertia), viscous=float(viscous), coulomb=float(coulomb),
+                                    coulomb_velocity=self.coulomb_velocity,
+                                    gravity=float(math.hypot(gravity_sin, gravity_cos)),
+                                    gravity_offset=float(math.atan2(gravity_cos, gravity_sin)))
+        return models, residuals
+
+    def report(self, models, residuals):
+        print(f"辨识数据: {len(self.files)} 个文件，采样频率 {self.sampling_freq:.0f} Hz，"
+              f"零相位滤波 {self.cutoff_freq} Hz")
+        for name, model in models.items():
+            print(f"  {name}: {self.count[name]} 个样本，{model}，力矩残差 RMS {residuals[name]:.4f}")
+
+
+def identify(paths, output=None, **options):
+    """
+    辨识一个或多个数据文件，可选地保存为 load_leg_models 可以读取的 JSON 文件。
+    :param paths: 数据文件路径列表
+    :param output: 可选，输出 JSON 文件路径
+    :param options: 传给 SystemIdentification 的参数
+    :return: {腿名称: LegModel}
+    """
+    identification = SystemIdentification(**options)
+    for path in paths:
+        identification.process_file(path)
+    models, residuals = identification.solve()
+    identification.report(models, residuals)
+    if output is not None and not models:
+        print(f"没有可用的辨识结果，未写入 {output}。")
+    elif output is not None:
+        save_leg_models(output, models)
+        print(f"模型参数已保存到 {output}")
+    return models
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+    import tempfile
+    import time
+
+    if len(sys.argv) > 2:
+        # python -m data_utils.system_identification leg_model.json data_log_double.csv [更多数据文件 ...]
+        identify(sys.argv[2:], sys.argv[1])
+        sys.exit()
+
+    # 仿真数据：两条腿在随机多正弦力矩激励下运动（含重力和摩擦），写成 DataCollectorDouble 格式的文件后辨识
+    fs = 1000
+    dt = 1.0 / fs
+    truth = {"left": LegModel(inertia=0.05, viscous=0.02, coulomb=0.05, gravity=0.8, gravity_offset=0.1),
+             "right": LegModel(inertia=0.06, viscous=0.03, coulomb=0.04, gravity=0.9, gravity_offset=-0.2)}
+    rng = np.random.default_rng(0)
+    directory = tempfile.mkdtemp()
+    paths = []
+    for file_index in range(2):
+        path = os.path.join(directory, f"data_log_double_{file_index}.csv")
+        t = np.arange(0, 120, dt)
+        frequencies = rng.uniform(0.2, 3.0, 6)
+        phases = rng.uniform(0, 2 * math.pi, (6, 2))
+        state = {name: [0.0, 0.0] for name in truth}
+        with open(path, mode='w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(["timestamp", "position_left", "velocity_left", "torque_left",
+                             "position_right", "velocity_right", "torque_right"])
+            excitation = sum(0.4 * np.sin(2 * math.pi * f * t[:, None] + phases[k]) for k, f in enumerate(frequencies))
+            for k in range(t.size):
+                row = [t[k]]
+                for i, (name, model) in enumerate(truth.items()):
+                    position, velocity = state[name]
+                    torque = excitation[k, i]
+                    acceleration = (torque - model.friction_torque(velocity) - model.gravity_torque(position)) / model.inertia
+                    velocity += acceleration * dt
+                    position += velocity * dt
+                    state[name] = [position, velocity]
+                    # 测量噪声
+                    row += [position + rng.normal(0, 1e-4), velocity + rng.normal(0, 0.01), torque + rng.normal(0, 0.02)]
+                writer.writerow(row)
+        paths.append(path)
+    print(f"仿真数据: 2 个文件，每个 {t.size} 行，{os.path.getsize(paths[0]) / 1e6:.1f} MB")
+
+    output = os.path.join(directory, "leg_model.json")
+    for chunk_size in (5000, 200000):
+        start = time.perf_counter()
+        models = identify(paths, output, chunk_size=chunk_size)
+        elapsed = time.perf_counter() - start
+        print(f"分块大小 {chunk_size}: 耗时 {elapsed:.2f} s，{2 * t.size / elapsed / 1e6:.2f} M 行/秒")
+    for name, model in truth.items():
+        print(f"  真实 {name}: {model}")
@@ -1,322 +1,355 @@
 import math
 import time
+from contextlib import nullcontext
 from utils.realTimePlotter import RealTimePlotterMul4X2
 from motor.doubleMotorController import FilteredDoubleMotorController
 import numpy as np
 from trajectory_handler.sineGenerator import SineTrajectoryHandler
+from trajectory_handler.gaitOscillator import CoupledGaitTrajectory
+from controller.impedanceLaw import VectorImpedanceLaw
+from controller.gainSchedule import save_session
+from utils.realtime import RingLog, GCGuard, TickMetrics
+from utils.lazyImport import wait_for_preloads
+from utils.butterworthFilter import CoefficientTable
+from controller.homing import ApproachProfile, HomingRoutine
 
 
 
+def _joint_gain(name, index):
+    """
+    将左右腿的单个增益映射到控制律的增益数组。
+    """
+    return property(lambda self: float(getattr(self.law, name)[index]),
+                    lambda self, value: getattr(self.law, name).__setitem__(index, value))
+
+
 class DualLegImpedanceController:
     """
     左右腿独立阻抗控制类，支持通过速度等级控制行走速度。
+    控制律由 VectorImpedanceLaw 完成，下标 0 为左腿，下标 1 为右腿。
     """
     MAX_TORQUE = 6.0  # 最大力矩限制
+    TICK_PERIOD = 0.001  # 标称控制周期 (秒)
+    SPEED_LEVELS = range(1, 11)
+
+    Kp_left, Kd_left, Ki_left, Kf_left = (_joint_gain(name, 0) for name in ("Kp", "Kd", "Ki", "Kf"))
+    Kp_right, Kd_right, Ki_right, Kf_right = (_joint_gain(name, 1) for name in ("Kp", "Kd", "Ki", "Kf"))
+    GAIN_NAMES = ("Kp_left", "Kd_left", "Ki_left", "Kf_left", "Kp_right", "Kd_right", "Ki_right", "Kf_right")
 
     def __init__(self, motor_controller, trajectory_handler_left, trajectory_handler_right, duration,
                  speed_level=5,  # 默认速度等级为5
                  Kp_left=1.0, Kd_left=0.1, Ki_left=0.01, Kf_left=0.5,
-                 Kp_right=1.0, Kd_right=0.1, Ki_right=0.01, Kf_right=0.5):
+                 Kp_right=1.0, Kd_right=0.1, Ki_right=0.01, Kf_right=0.5, parameters=None, gait=None,
+                 cache=None, user=None, filter_table=None, gain_schedule=None, record_session=False, feedforward=None,
+                 plot=False):
+        """
+        :param parameters: 可选，ParameterBlock，每个周期检查一次，版本更新时在线修改增益和轨迹参数
+        :param gait: 可选，CoupledGaitTrajectory，默认以左右腿轨迹生成器的参数为初始波形创建
+        :param cache: 可选，GaitParameterCache，按 用户 + 速度等级 热启动步态和增益，run 结束时写回
+        :param user: 用户标识，与 cache 一起使用
+        :param filter_table: 可选，按速度等级索引的 CoefficientTable；为 True 时按步态频率生成（电机控制器需支持查表切换）。
+                             默认不使用系数表，保留电机控制器滤波器自身的截止频率
+        :param gain_schedule: 可选，GainSchedule，每个周期按速度等级和左右腿步态相位查表设置 Kp、Kd、Ki，
+                              此时手动设置的这三个增益会在下一周期被表值覆盖
+        :param record_session: 是否记录每个周期的步态相位和误差，用于离线学习增益表，见 save_session
+        :param feedforward: 可选，按左右腿构造的 FeedforwardModel，由参考轨迹计算惯性、重力和摩擦前馈力矩
+        :param plot: 是否实时绘制左右腿曲线，默认不绘图，不创建绘图对象
+        """
         self.motor_controller = motor_controller
         self.trajectory_handler_left = trajectory_handler_left
         self.trajectory_handler_right = trajectory_handler_right
+        self.trajectory_handlers = (trajectory_handler_left, trajectory_handler_right)
         self.duration = duration
-
-        self.Kp_left = Kp_left
-        self.Kd_left = Kd_left
-        self.Kf_left = Kf_left
-        self.Ki_left = Ki_left
-
-        self.Kp_right = Kp_right
-        self.Kd_right = Kd_right
-        self.Kf_right = Kf_right
-        self.Ki_right = Ki_right
-
-        self.integral_limit = 1.0
-        self.integral_error_left = 0.0
-        self.integral_error_right = 0.0
-        self.error_log_left = []
-        self.error_log_right = []
-        self.plotter = RealTimePlotterMul4X2()
+        # 左右腿共享相位的步态轨迹，在线跟踪每条腿的相位、波形以及两腿的实际相位差
+        self.gait = gait if gait is not None else CoupledGaitTrajectory.from_handlers(
+            trajectory_handler_left, trajectory_handler_right)
+        self._received_amplitude = self.gait.amplitude  # 最近一次收到的振幅，只有变化的值才固定到参考轨迹上
+
+        self.law = VectorImpedanceLaw(
+            2,
+            Kp=(Kp_left, Kp_right), Kd=(Kd_left, Kd_right),
+            Ki=(Ki_left, Ki_right), Kf=(Kf_left, Kf_right),
+            max_torque=self.MAX_TORQUE, integral_limit=1.0,
+        )
+        self.desired_position = np.zeros(2)
+        self.desired_velocity = np.zeros(2)
+        self.desired_acceleration = np.zeros(2)
+        self.feedforward = feedforward
+        self.gait_phases = np.zeros(2)
+        self.gain_schedule = gain_schedule
+        if gain_schedule is not None:
+            gain_schedule.attach(self.law)
+
+        # 误差日志预分配，按标称周期容纳整个运行时长，超出后覆盖最旧的记录
+        self.error_log = RingLog(int(duration / self.TICK_PERIOD) + 1, 2)
+        # 每行依次为左右腿步态相位、位置误差、速度误差
+        self.session_log = RingLog(self.error_log.capacity, 6) if record_session else None
+        self._session_row = np.zeros(6)
+        self.plotter = RealTimePlotterMul4X2() if plot else None
+
+        # 滤波器截止频率随速度等级变化，切换速度时只查表
+        if filter_table is True:
+            position_filter = motor_controller.position_filter
+            filter_table = CoefficientTable.for_gait_frequencies(
+                position_filter.order, position_filter.sampling_freq,
+                {level: self.speed_level_frequency(level) for level in self.SPEED_LEVELS})
+        self.filter_table = None if filter_table is False else filter_table
+        if self.filter_table is not None:
+            motor_controller.use_filter_table(filter_table, speed_level)
 
         # 设置速度等级
         self.speed_level = speed_level
         self._apply_speed_level()
+        self.parameters = parameters
+        self.homing = None  # 最近一次归零的 HomingRoutine，见 control_motor_forward
+        self.cache = cache
+        self.user = user
+        if cache is not None:
+            self.warm_start()
 
 
 
-    def control_motor_forward(self, max_rotation=180, resistance_threshold=1.0):
+    @property
+    def error_log_left(self):
+        return self.error_log.values()[:, 0]
+
+    @property
+    def error_log_right(self):
+        return self.error_log.values()[:, 1]
+
+    def control_motor_forward(self, max_rotation=180, resistance_threshold=1.0, profiles=None):
         """
-        控制电机正向缓慢运动，当外界阻力大于 1 Nm 时停止并返回 True；
-        如果旋转 180 度仍未达到力矩阈值，则返回 False。
+        归零：左右腿同时缓慢运动（左腿正向、右腿反向），每条腿在检测到外界阻力或堵转时各自停止；
+        任意一条腿旋转超过 max_rotation 度仍未接触或超时，则返回 False；
+        任意一条腿在搜索力矩下没有运动时抛出 HomingError，不会把起点当作零位。
 
         :param max_rotation: 最大旋转角度（度）
         :param resistance_threshold: 阻力阈值 (Nm)
+        :param profiles: 可选，左右腿的 ApproachProfile，给定时忽略前两个参数
         :return: bool
         """
-        self.motor_controller.set_input_torque(0.1,-0.1)  # 设置初始缓慢运动力矩
-        start_position_left, start_position_right= self.motor_controller.get_pos_estimate_filtered()  # 记录初始位置
-
-        while True:
-            current_position_left, current_position_right = self.motor_controller.get_pos_estimate_filtered()
-            external_torque_left = self.motor_controller.motor1.estimate_external_torque(0.1)
-            external_torque_right = self.motor_controller.motor2.estimate_external_torque(0.1)
+        if profiles is None:
+            profiles = [ApproachProfile(torque=torque, max_travel=math.radians(max_rotation),
+                                        contact_torque=resistance_threshold) for torque in (0.1, -0.1)]
+        self.homing = HomingRoutine(self.motor_controller, profiles, rate=round(1 / self.TICK_PERIOD))
+        self.homing.run()
+        self.homing.report()
+        return self.homing.success
 
-            # 检查力矩是否超过阈值
-            if external_torque_left > resistance_threshold and external_torque_right > resistance_threshold:
-                self.motor_controller.set_input_torque(0,0)
-                print("外界阻力超过阈值，停止电机。")
-                return True
 
-            # 检查是否旋转超过最大角度
-            rotation_angle = abs(current_position_left - start_position_left) * 180 / math.pi  # 转换为角度
-            if rotation_angle >= max_rotation:
-                self.motor_controller.set_input_torque(0,0)
-                print("旋转角度达到最大值，未检测到足够的外界阻力。")
-                return False
 
-            time.sleep(0.01)  # 控制循环频率
-
-
-
-    def _apply_speed_level(self):
+    @staticmethod
+    def speed_level_frequency(speed_level):
         """
-        根据速度等级调整轨迹生成器的频率。
+        将速度等级（1-10）映射到步态频率范围（0.1 Hz 到 2 Hz）。
         """
-        # 将速度等级（1-10）映射到频率范围（例如：0.1 Hz 到 2 Hz）
         min_frequency = 0.1
         max_frequency = 2.0
-        frequency = min_frequency + (self.speed_level - 1) * (max_frequency - min_frequency) / 9
+        return min_frequency + (speed_level - 1) * (max_frequency - min_frequency) / 9
+
+    def _apply_speed_level(self):
+        """
+        根据速度等级调整轨迹生成器的频率和滤波器系数。
+        """
+        frequency = self.speed_level_frequency(self.speed_level)
 
-        # 更新左右腿轨迹生成器的频率
+        # 更新左右腿轨迹生成器和步态振荡器的频率
         self.trajectory_handler_left.frequency = frequency
         self.trajectory_handler_right.frequency = frequency
+        self.gait.frequency = frequency
+        if self.gain_schedule is not None:
+            self.gain_schedule.select_level(self.speed_level)
+        if self.filter_table is not None:
+            self.motor_controller.select_filter_coefficients(self.speed_level)
 
-    def adaptive_control_parameters(self, position_error, velocity_error, side="left"):
+    def warm_start(self):
+        """
+        从步态参数缓存恢复该用户在当前速度等级下上次收敛的步态波形、相位差和增益。
+        :return: 是否找到可用的缓存
         """
-        自适应调整控制参数，根据误差动态调整Kp, Kd和Ki。
-        :param position_error: 当前的位置信误差
-        :param velocity_error: 当前的速度误差
-        :param side: 调整哪一侧的参数，"left"或"right"
+        entry = self.cache.get(self.user, self.speed_level)
+        if entry is None:
+            print(f"用户 {self.user} 在速度等级 {self.speed_level} 下没有缓存的步态参数，使用默认参数。")
+            return False
+        if entry["gains"]:
+            self.apply_parameters(**entry["gains"])
+        trajectory = entry["trajectory"]
+        if trajectory is not None and trajectory.get("type") == "coupled_gait":
+            self.gait.load_dict(trajectory)
+        print(f"已使用用户 {self.user} 速度等级 {self.speed_level} 的缓存参数热启动（第 {entry['revision']} 次写入）。")
+        return True
+
+    def store_parameters(self):
+        """
+        将收敛后的步态参数和增益写回步态参数缓存。
+        """
+        self.cache.put(self.user, self.speed_level, trajectory=self.gait.to_dict(),
+                       gains={name: getattr(self, name) for name in self.GAIN_NAMES})
+
+    def apply_parameters(self, amplitude=None, speed_level=None, **gains):
         """
-        # 定义调整步长
-        learning_rate_Kp = 0.01
-        learning_rate_Kd = 0.005
-        learning_rate_Ki = 0.001
-
-        # 计算误差的绝对值
-        abs_position_error = abs(position_error)
-        abs_velocity_error = abs(velocity_error)
-
-        if side == "left":
-            # 根据误差调整左腿的控制参数
-            if abs_position_error > 0.1:  # 如果误差较大，增加Kp
-                self.Kp_left += learning_rate_Kp * abs_position_error
-            else:  # 如果误差较小，减小Kp
-                self.Kp_left -= learning_rate_Kp * abs_position_error
-
-            if abs_velocity_error > 0.1:  # 如果速度误差较大，增加Kd
-                self.Kd_left += learning_rate_Kd * abs_velocity_error
-            else:  # 如果速度误差较小，减小Kd
-                self.Kd_left -= learning_rate_Kd * abs_velocity_error
-
-            # 调整积分增益Ki（防止积分误差过大）
-            self.Ki_left += learning_rate_Ki * position_error
-            self.Ki_left = max(min(self.Ki_left, 0.1), 0.001)  # 限制Ki的范围
-        elif side == "right":
-            # 根据误差调整右腿的控制参数
-            if abs_position_error > 0.1:
-                self.Kp_right += learning_rate_Kp * abs_position_error
-            else:
-                self.Kp_right -= learning_rate_Kp * abs_position_error
-
-            if abs_velocity_error > 0.1:
-                self.Kd_right += learning_rate_Kd * abs_velocity_error
-            else:
-                self.Kd_right -= learning_rate_Kd * abs_velocity_error
-
-            self.Ki_right += learning_rate_Ki * position_error
-            self.Ki_right = max(min(self.Ki_right, 0.1), 0.001)
-
-        # 限制Kp和Kd的范围，防止过大或过小
-        self.Kp_left = max(min(self.Kp_left, 10.0), 0.1)
-        self.Kd_left = max(min(self.Kd_left, 5.0), 0.01)
-        self.Kp_right = max(min(self.Kp_right, 10.0), 0.1)
-        self.Kd_right = max(min(self.Kd_right, 5.0), 0.01)
-
-
-    def run(self):
+        在线修改增益、轨迹振幅和速度等级，积分项和滤波器状态保持不变。
+        推送的振幅与上次收到的值不同时固定为参考轨迹的振幅（gait.hold_amplitude），
+        振荡器继续学习相位、频率和波形，但波形学习不会把参考振幅改回去。
+        :param amplitude: 可选，左右腿轨迹振幅
+        :param speed_level: 可选，速度等级（1-10）
+        :param gains: 可选，Kp_left、Kd_right 等增益
+        """
+        for name, value in gains.items():
+            if name in self.GAIN_NAMES:
+                setattr(self, name, value)
+        if amplitude is not None and amplitude != self._received_amplitude:
+            self._received_amplitude = amplitude
+            for handler in self.trajectory_handlers:
+                handler.amplitude = amplitude
+            self.gait.hold_amplitude(amplitude)
+        if speed_level is not None and speed_level != self.speed_level:
+            self.speed_level = speed_level
+            self._apply_speed_level()
+
+    def adaptive_control_parameters(self):
+        """
+        自适应调整左右腿控制参数，根据最近一次的误差动态调整Kp, Kd和Ki。
+        """
+        self.law.adapt()
+        if self.gain_schedule is not None:
+            self.gain_schedule.absorb_adaptation()
+
+    def control_step(self, t, dt, adaptive=False):
+        """
+        执行一个控制周期：读取状态、更新轨迹、计算并输出左右腿力矩。
+        run() 和 HostRuntime 都通过本方法驱动控制器，调用方负责按周期调度。
+        :param t: 控制开始后的时间
+        :param dt: 距上一周期的时间间隔
+        :param adaptive: 是否自适应调整控制参数
+        :return: (当前位置, 当前速度, 目标力矩, 调整后力矩)，均按左右腿排列
+        """
+        # 新的控制周期：本周期内的读数只采样一次硬件
+        self.motor_controller.advance_tick()
+        if self.parameters is not None and self.parameters.poll():
+            self.apply_parameters(**self.parameters.as_dict())
+
+        # 获取左右腿当前状态
+        current_position = self.motor_controller.get_pos_estimate_filtered()
+        current_velocity = self.motor_controller.get_vel_estimate_filtered()
+
+        # 更新步态相位，并由共享相位一次生成左右腿的参考轨迹
+        self.gait.update(t, current_position)
+        if self.feedforward is not None:
+            self.gait.references(t, self.desired_position, self.desired_velocity, self.desired_acceleration)
+        else:
+            self.gait.references(t, self.desired_position, self.desired_velocity)
+        if self.gain_schedule is not None or self.session_log is not None:
+            self.gait_phases[0] = self.gait.left.gait_phase
+            self.gait_phases[1] = self.gait.right.gait_phase
+        if self.gain_schedule is not None:
+            self.gain_schedule.update(self.gait_phases)
+
+        # 左右腿 PID + 力反馈
+        target_torque = self.law.compute_target_torque(
+            self.desired_position, current_position, self.desired_velocity, current_velocity, dt)
+        if self.feedforward is not None:
+            target_torque += self.feedforward.torque(
+                self.desired_position, self.desired_velocity, self.desired_acceleration)
+        external_torque = self.motor_controller.estimate_external_torque(target_torque)
+        adjusted_torque = self.law.apply_force_feedback(external_torque)
+
+        if adaptive:
+            self.adaptive_control_parameters()
+
+        # 设置左右腿力矩
+        self.motor_controller.set_input_torque(adjusted_torque)
+
+        # 记录误差
+        self.error_log.append(self.law.position_error)
+        if self.session_log is not None:
+            row = self._session_row
+            row[0:2] = self.gait_phases
+            row[2:4] = self.law.position_error
+            row[4:6] = self.law.velocity_error
+            self.session_log.append(row)
+        return current_position, current_velocity, target_torque, adjusted_torque
+
+    def run(self, adaptive=False, realtime=False, pipelined=False):
+        """
+        运行左右腿独立阻抗控制。
+        :param adaptive: 是否自适应调整控制参数
+        :param realtime: 是否启用实时模式：冻结已有对象、控制期间关闭自动 GC，只在周期空闲时间内回收
+        :param pipelined: 是否使用流水线执行模式，下一周期的读取与本周期的计算、写入同时进行
+        """
+        if pipelined:
+            self.motor_controller.enable_pipelining()
+        metrics = TickMetrics(self.error_log.capacity)
+        guard = GCGuard() if realtime else nullcontext()
+        if self.plotter is not None:
+            self.plotter.open()
+        wait_for_preloads()
+        if self.feedforward is not None:
+            self.check_feedforward()
         start_time = time.time()
         last_time = start_time
         print(f"开始左右腿独立阻抗控制，速度等级：{self.speed_level} ...")
 
-        while time.time() - start_time < self.duration:
-            current_time = time.time()
-            t = current_time - start_time
-            dt = current_time - last_time
-            last_time = current_time
-
-            # 获取左右腿当前状态
-            current_position_left, current_position_right = self.motor_controller.get_pos_estimate_filtered()
-            current_velocity_left, current_velocity_right = self.motor_controller.get_vel_estimate_filtered()
-
-            # 更新轨迹
-            self.trajectory_handler_left.update_data(t, current_position_left)
-            self.trajectory_handler_right.update_data(t, current_position_right)
-
-            if t % 0.01 < dt:  # 每隔 10ms 更新一次轨迹参数
-                self.trajectory_handler_left.fit_and_update()
-                self.trajectory_handler_right.fit_and_update()
-
-            # 假设轨迹周期为T
-            phase_offset = 180
-            T = 1.0 / self.trajectory_handler_left.frequency
-            phase_offset_time = (phase_offset / 360.0) * T
-            # 然后在时间上进行偏移
-            desired_position_left_sinle = self.trajectory_handler_left.get_position(t)
-            desired_velocity_left_single = self.trajectory_handler_left.get_velocity(t)
-            desired_position_left_couple = self.trajectory_handler_right.get_position(t + phase_offset_time)
-            desired_velocity_left_couple = self.trajectory_handler_right.get_velocity(t + phase_offset_time)
-
-            desired_position_right_single = self.trajectory_handler_right.get_position(t)
-            desired_velocity_right_single = self.trajectory_handler_right.get_velocity(t)
-            desired_position_right_couple = self.trajectory_handler_left.get_position(t + phase_offset_time)
-            desired_velocity_right_couple = self.trajectory_handler_left.get_velocity(t + phase_offset_time)
-
-            desired_position_left = (desired_position_left_sinle + desired_position_left_couple) / 2
-            desired_velocity_left = (desired_velocity_left_single + desired_velocity_left_couple) / 2
-            desired_position_right = (desired_position_right_single + desired_position_right_couple) / 2
-            desired_velocity_right = (desired_velocity_right_single + desired_velocity_right_couple) / 2
-
-            # 左腿控制
-            position_error_left = desired_position_left - current_position_left
-            velocity_error_left = desired_velocity_left - current_velocity_left
-            self.integral_error_left += position_error_left * dt
-            self.integral_error_left = max(min(self.integral_error_left, self.integral_limit), -self.integral_limit)
-            target_torque_left = (
-                self.Kp_left * position_error_left +
-                self.Kd_left * velocity_error_left +
-                self.Ki_left * self.integral_error_left
-            )
-            external_torque_left = self.motor_controller.motor1.estimate_external_torque(target_torque_left)
-            adjusted_torque_left = target_torque_left + self.Kf_left * external_torque_left
-            adjusted_torque_left = max(min(adjusted_torque_left, self.MAX_TORQUE), -self.MAX_TORQUE)
-
-            # 右腿控制
-            position_error_right = desired_position_right - current_position_right
-            velocity_error_right = desired_velocity_right - current_velocity_right
-            self.integral_error_right += position_error_right * dt
-            self.integral_error_right = max(min(self.integral_error_right, self.integral_limit), -self.integral_limit)
-            target_torque_right = (
-                self.Kp_right * position_error_right +
-                self.Kd_right * velocity_error_right +
-                self.Ki_right * self.integral_error_right
-            )
-            external_torque_right = self.motor_controller.motor2.estimate_external_torque(target_torque_right)
-            adjusted_torque_right = target_torque_right + self.Kf_right * external_torque_right
-            adjusted_torque_right = max(min(adjusted_torque_right, self.MAX_TORQUE), -self.MAX_TORQUE)
-
-            # 设置左右腿力矩
-            self.motor_controller.set_input_torque(adjusted_torque_left, adjusted_torque_right)
-
-            # 记录误差
-            self.error_log_left.append(position_error_left)
-            self.error_log_right.append(position_error_right)
-
-            # 控制循环频率
-            time.sleep(0.001)
+        with guard:
+            while time.time() - start_time < self.duration:
+                current_time = time.time()
+                t = current_time - start_time
+                dt = current_time - last_time
+                last_time = current_time
 
-        print("左右腿独立阻抗控制完成！")
-        self.analyze_performance()
+                metrics.begin_tick()
+                position, velocity, target_torque, adjusted_torque = self.control_step(t, dt, adaptive)
+                elapsed = metrics.end_tick()
+                if self.plotter is not None:
+                    self.plotter.update_data(t, position[0], velocity[0], target_torque[0], adjusted_torque[0],
+                                             position[1], velocity[1], target_torque[1], adjusted_torque[1])
 
-    def run_ajdust(self):
-        start_time = time.time()
-        last_time = start_time
-        print(f"开始左右腿独立阻抗控制，速度等级：{self.speed_level} ...")
+                if realtime:
+                    guard.collect_in_slack(self.TICK_PERIOD - elapsed)
 
-        while time.time() - start_time < self.duration:
-            current_time = time.time()
-            t = current_time - start_time
-            dt = current_time - last_time
-            last_time = current_time
-
-            # 获取左右腿当前状态
-            current_position_left, current_position_right = self.motor_controller.get_pos_estimate_filtered()
-            current_velocity_left, current_velocity_right = self.motor_controller.get_vel_estimate_filtered()
-
-            # 更新轨迹
-            self.trajectory_handler_left.update_data(t, current_position_left)
-            self.trajectory_handler_right.update_data(t, current_position_right)
-
-            if t % 0.01 < dt:  # 每隔 10ms 更新一次轨迹参数
-                self.trajectory_handler_left.fit_and_update()
-                self.trajectory_handler_right.fit_and_update()
-
-            # 假设轨迹周期为T
-            phase_offset = 180
-            T = 1.0 / self.trajectory_handler_left.frequency
-            phase_offset_time = (phase_offset / 360.0) * T
-            # 然后在时间上进行偏移
-            desired_position_left_sinle = self.trajectory_handler_left.get_position(t)
-            desired_velocity_left_single = self.trajectory_handler_left.get_velocity(t)
-            desired_position_left_couple = self.trajectory_handler_right.get_position(t + phase_offset_time)
-            desired_velocity_left_couple = self.trajectory_handler_right.get_velocity(t + phase_offset_time)
-
-            desired_position_right_single = self.trajectory_handler_right.get_position(t)
-            desired_velocity_right_single = self.trajectory_handler_right.get_velocity(t)
-            desired_position_right_couple = self.trajectory_handler_left.get_position(t + phase_offset_time)
-            desired_velocity_right_couple = self.trajectory_handler_left.get_velocity(t + phase_offset_time)
-
-            desired_position_left = (desired_position_left_sinle + desired_position_left_couple) / 2
-            desired_velocity_left = (desired_velocity_left_single + desired_velocity_left_couple) / 2
-            desired_position_right = (desired_position_right_single + desired_position_right_couple) / 2
-            desired_velocity_right = (desired_velocity_right_single + desired_velocity_right_couple) / 2
-
-            # 左腿控制
-            position_error_left = desired_position_left - current_position_left
-            velocity_error_left = desired_velocity_left - current_velocity_left
-            self.integral_error_left += position_error_left * dt
-            self.integral_error_left = max(min(self.integral_error_left, self.integral_limit), -self.integral_limit)
-            target_torque_left = (
-                    self.Kp_left * position_error_left +
-                    self.Kd_left * velocity_error_left +
-                    self.Ki_left * self.integral_error_left
-            )
-            external_torque_left = self.motor_controller.motor1.estimate_external_torque(target_torque_left)
-            adjusted_torque_left = target_torque_left + self.Kf_left * external_torque_left
-            adjusted_torque_left = max(min(adjusted_torque_left, self.MAX_TORQUE), -self.MAX_TORQUE)
-
-            # 自适应调整左腿控制参数
-            self.adaptive_control_parameters(position_error_left, velocity_error_left, side="left")
-            # 右腿控制
-            position_error_right = desired_position_right - current_position_right
-            velocity_error_right = desired_velocity_right - current_velocity_right
-            self.integral_error_right += position_error_right * dt
-            self.integral_error_right = max(min(self.integral_error_right, self.integral_limit), -self.integral_limit)
-            target_torque_right = (
-                    self.Kp_right * position_error_right +
-                    self.Kd_right * velocity_error_right +
-                    self.Ki_right * self.integral_error_right
-            )
-            external_torque_right = self.motor_controller.motor2.estimate_external_torque(target_torque_right)
-            adjusted_torque_right = target_torque_right + self.Kf_right * external_torque_right
-            adjusted_torque_right = max(min(adjusted_torque_right, self.MAX_TORQUE), -self.MAX_TORQUE)
-
-
-            # 自适应调整右腿控制参数
-            self.adaptive_control_parameters(position_error_right, velocity_error_right, side="right")
-            # 设置左右腿力矩
-            self.motor_controller.set_input_torque(adjusted_torque_left, adjusted_torque_right)
-
-            # 记录误差
-            self.error_log_left.append(position_error_left)
-            self.error_log_right.append(position_error_right)
-
-            # 控制循环频率
-            time.sleep(0.001)
+                # 控制循环频率
+                time.sleep(self.TICK_PERIOD)
 
         print("左右腿独立阻抗控制完成！")
+        self.gait.report()
+        if pipelined:
+            self.motor_controller.disable_pipelining()
+        self.motor_controller.sensor_cache.report()
+        self.motor_controller.report_command_output()
+        metrics.report()
+        if realtime:
+            guard.report()
+        if self.plotter is not None:
+            self.plotter.finalize()
         self.analyze_performance()
+        if self.cache is not None:
+            self.store_parameters()
+
+    def check_feedforward(self):
+        """
+        预先计算未来一个步态周期的前馈力矩，峰值接近力矩限幅时给出提示。
+        """
+        _, position, velocity, acceleration = self.gait.period_profile()
+        peak = self.feedforward.peak_torque(position, velocity, acceleration)
+        print(f"一个步态周期内的峰值前馈力矩: 左 {peak[0]:.2f} / 右 {peak[1]:.2f} Nm")
+        if np.any(peak > 0.8 * self.MAX_TORQUE):
+            print(f"警告：前馈力矩接近力矩限幅 {self.MAX_TORQUE} Nm，反馈的调节余量不足。")
+
+    def save_session(self, path):
+        """
+        保存本次运行记录的步态相位和误差，用 GainSchedule.learn 离线学习增益表。
+        :param path: .npz 文件路径
+        """
+        if self.session_log is None:
+            raise RuntimeError("未开启 record_session，没有可保存的记录。")
+        values = self.session_log.values()
+        save_session(path, self.speed_level, values[:, 0:2], values[:, 2:4], values[:, 4:6])
+
+    def run_ajdust(self):
+        """
+        运行带自适应参数调整的左右腿独立阻抗控制。
+        """
+        self.run(adaptive=True)
 
 
 
@@ -340,5 +373,6 @@ if __name__ == "__main__":
     # 设置速度等级（1-10）
     speed_level = 7
 
-    controller = DualLegImpedanceController(motor, trajectory_handler_left, trajectory_handler_right, duration=10, speed_level=speed_level)
+    controller = DualLegImpedanceController(motor, trajectory_handler_left, trajectory_handler_right, duration=10, speed_level=speed_level,
+                                            filter_table=True)
     controller.run()
@@ -4,6 +4,8 @@ from utils.realTimePlotter import RealTimePlotterMul4
 from motor.filteredmotorController import FilteredMotorController
 import numpy as np
 from trajectory_handler.sineGenerator import SineTrajectoryHandler
+from utils.lazyImport import wait_for_preloads
+from controller.homing import ApproachProfile, HomingRoutine
 
 
 class ImpedanceController:
@@ -13,7 +15,15 @@ class ImpedanceController:
     MAX_TORQUE = 2.0  # 最大力矩限制
 
     def __init__(self, motor_controller, trajectory_handler, duration,
-                 Kp=1.0, Kd=0.1, Ki=0.01, Kf=0.5):
+                 Kp=1.0, Kd=0.1, Ki=0.01, Kf=0.5, plot=True, parameters=None, cache=None, user=None,
+                 feedforward=None):
+        """
+        :param plot: 是否实时绘图，在无界面的控制进程中运行时设为 False
+        :param parameters: 可选，ParameterBlock，每个周期检查一次，版本更新时在线修改增益和轨迹参数
+        :param cache: 可选，GaitParameterCache，构造时用该用户缓存的参数热启动，run 结束时写回收敛后的参数
+        :param user: 用户标识，与 cache 一起使用
+        :param feedforward: 可选，FeedforwardModel，由参考轨迹的位置、速度、加速度计算惯性、重力和摩擦前馈力矩
+        """
         self.motor_controller = motor_controller
         self.trajectory_handler = trajectory_handler
         self.duration = duration
@@ -26,42 +36,147 @@ class ImpedanceController:
         self.integral_limit = 1.0
         self.integral_error = 0.0  #积分项初始化
         self.error_log = []
-        self.plotter = RealTimePlotterMul4()
-
-
-    def control_motor_forward(self, max_rotation=180, resistance_threshold=1.0):
+        self.plotter = RealTimePlotterMul4() if plot else None
+        self.parameters = parameters
+        self.homing = None  # 最近一次归零的 HomingRoutine，见 control_motor_forward
+        self.feedforward = feedforward
+        # 最近一次收到的轨迹参数，参数块每次都带全部字段，只有变化的值才固定到轨迹上
+        self._received_trajectory = {"amplitude": trajectory_handler.amplitude,
+                                     "frequency": trajectory_handler.frequency}
+        self.cache = cache
+        self.user = user
+        if cache is not None:
+            self.warm_start()
+
+
+    def control_motor_forward(self, max_rotation=180, resistance_threshold=1.0, profile=None):
         """
-        控制电机正向缓慢运动，当外界阻力大于 1 Nm 时停止并返回 True；
-        如果旋转 180 度仍未达到力矩阈值，则返回 False。
+        归零：控制电机正向缓慢运动，检测到外界阻力或堵转时停止并返回 True；
+        如果旋转 max_rotation 度仍未接触或超时，则返回 False；
+        在搜索力矩下没有运动时抛出 HomingError，不会把起点当作零位。
 
         :param max_rotation: 最大旋转角度（度）
         :param resistance_threshold: 阻力阈值 (Nm)
+        :param profile: 可选，ApproachProfile，给定时忽略前两个参数
         :return: bool
         """
-        self.motor_controller.set_input_torque(0.1)  # 设置初始缓慢运动力矩
-        start_position = self.motor_controller.get_pos_estimate_filtered()  # 记录初始位置
-
-        while True:
-            current_position = self.motor_controller.get_pos_estimate_filtered()
-            external_torque = self.motor_controller.estimate_external_torque(0.1)
-
-            # 检查力矩是否超过阈值
-            if external_torque > resistance_threshold:
-                self.motor_controller.set_input_torque(0.0)  # 停止电机
-                print("外界阻力超过阈值，停止电机。")
-                return True
-
-            # 检查是否旋转超过最大角度
-            rotation_angle = abs(current_position - start_position) * 180 / math.pi  # 转换为角度
-            if rotation_angle >= max_rotation:
-                self.motor_controller.set_input_torque(0.0)  # 停止电机
-                print("旋转角度达到最大值，未检测到足够的外界阻力。")
-                return False
+        if profile is None:
+            profile = ApproachProfile(torque=0.1, max_travel=math.radians(max_rotation),
+                                      contact_torque=resistance_threshold)
+        self.homing = HomingRoutine(self.motor_controller, [profile])
+        self.homing.run()
+        self.homing.report()
+        return self.homing.success
 
-            time.sleep(0.01)  # 控制循环频率
 
+    def warm_start(self):
+        """
+        从步态参数缓存恢复该用户上次收敛的轨迹参数和增益。
+        :return: 是否找到可用的缓存
+        """
+        entry = self.cache.get(self.user)
+        if entry is None:
+            print(f"用户 {self.user} 没有缓存的步态参数，使用默认参数。")
+            return False
+        if entry["gains"]:
+            self.apply_parameters(**entry["gains"])
+        trajectory = entry["trajectory"]
+        if trajectory is not None and trajectory.get("type") == self.trajectory_handler.to_dict().get("type"):
+            self.trajectory_handler.load_dict(trajectory)
+        print(f"已使用用户 {self.user} 缓存的步态参数热启动（第 {entry['revision']} 次写入）。")
+        return True
+
+    def store_parameters(self):
+        """
+        将收敛后的轨迹参数和增益写回步态参数缓存。
+        """
+        self.cache.put(self.user, trajectory=self.trajectory_handler.to_dict(),
+                       gains={"Kp": self.Kp, "Kd": self.Kd, "Ki": self.Ki, "Kf": self.Kf})
 
-    def run(self):
+    def apply_parameters(self, Kp=None, Kd=None, Ki=None, Kf=None, amplitude=None, frequency=None, **unused):
+        """
+        在线修改增益和轨迹参数，积分项和滤波器状态保持不变。
+        推送的振幅、频率与上次收到的值不同时通过 trajectory_handler.hold() 固定，同时暂停每 10 ms 一次的轨迹拟合，
+        拟合不会把推送的值改回去；调用 trajectory_handler.release() 后恢复拟合。
+        """
+        if Kp is not None:
+            self.Kp = Kp
+        if Kd is not None:
+            self.Kd = Kd
+        if Ki is not None:
+            self.Ki = Ki
+        if Kf is not None:
+            self.Kf = Kf
+        changed = {name: value for name, value in (("amplitude", amplitude), ("frequency", frequency))
+                   if value is not None and value != self._received_trajectory[name]}
+        if changed:
+            self._received_trajectory.update(changed)
+            self.trajectory_handler.hold(**changed)
+
+    def control_step(self, t, dt):
+        """
+        执行一个控制周期：读取状态、更新轨迹、计算并输出力矩。
+        run()、HostRuntime 和实时控制进程都通过本方法驱动控制器，调用方负责按周期调度。
+        :param t: 控制开始后的时间
+        :param dt: 距上一周期的时间间隔
+        :return: (当前位置, 当前速度, 目标力矩, 输出力矩)
+        """
+        # 新的控制周期：本周期内的读数只采样一次硬件
+        self.motor_controller.advance_tick()
+        if self.parameters is not None and self.parameters.poll():
+            self.apply_parameters(**self.parameters.as_dict())
+        current_position = self.motor_controller.get_pos_estimate_filtered()
+        current_velocity = self.motor_controller.get_vel_estimate_filtered()
+
+        # 更新轨迹
+        self.trajectory_handler.update_data(t, current_position)
+        handler = self.trajectory_handler
+        # 每隔 10ms 更新一次轨迹参数，滑动窗口填满之前不拟合
+        if t % 0.01 < dt and len(handler.time_window) == handler.window_size:
+            handler.fit_and_update()
+
+        desired_position = self.trajectory_handler.get_position(t)
+        desired_velocity = self.trajectory_handler.get_velocity(t)
+
+        position_error = desired_position - current_position
+        velocity_error = desired_velocity - current_velocity
+
+        # PID 控制
+        self.integral_error += position_error * dt
+        self.integral_error = max(
+            min(self.integral_error, self.integral_limit), -self.integral_limit
+        )
+        target_torque = (
+            self.Kp * position_error +
+            self.Kd * velocity_error +
+            self.Ki * self.integral_error
+        )
+        if self.feedforward is not None:
+            target_torque += self.feedforward.torque(
+                desired_position, desired_velocity, self.trajectory_handler.get_acceleration(t))
+
+        # 力矩补偿与限制
+        external_torque = self.motor_controller.estimate_external_torque(target_torque)
+        adjusted_torque = target_torque + self.Kf * external_torque
+        adjusted_torque = max(min(adjusted_torque, self.MAX_TORQUE), -self.MAX_TORQUE)
+
+
+        self.motor_controller.set_input_torque(adjusted_torque)
+
+        # 记录误差
+        self.error_log.append(position_error)
+        return current_position, current_velocity, target_torque, adjusted_torque
+
+    def run(self, pipelined=False):
+        """
+        运行阻抗控制。
+        :param pipelined: 是否使用流水线执行模式，下一周期的读取与本周期的计算、写入同时进行
+        """
+        if pipelined:
+            self.motor_controller.enable_pipelining()
+        if self.plotter is not None:
+            self.plotter.open()
+        wait_for_preloads()
         start_time = time.time()
         last_time = start_time
         print("开始阻抗控制...")
@@ -71,49 +186,23 @@ class ImpedanceController:
             dt = time.time() - last_time
             last_time = time.time()
 
-            current_position = self.motor_controller.get_pos_estimate_filtered()
-            current_velocity = self.motor_controller.get_vel_estimate_filtered()
-
-            # 更新轨迹
-            self.trajectory_handler.update_data(t, current_position)
-            if t % 0.01 < dt:  # 每隔 10ms 更新一次轨迹参数
-                self.trajectory_handler.fit_and_update()
-
-            desired_position = self.trajectory_handler.get_position(t)
-            desired_velocity = self.trajectory_handler.get_velocity(t)
-
-            position_error = desired_position - current_position
-            velocity_error = desired_velocity - current_velocity
-
-            # PID 控制
-            self.integral_error += position_error * dt
-            self.integral_error = max(
-                min(self.integral_error, self.integral_limit), -self.integral_limit
-            )
-            target_torque = (
-                self.Kp * position_error +
-                self.Kd * velocity_error +
-                self.Ki * self.integral_error
-            )
-
-            # 力矩补偿与限制
-            external_torque = self.motor_controller.estimate_external_torque(target_torque)
-            adjusted_torque = target_torque + self.Kf * external_torque
-            adjusted_torque = max(min(adjusted_torque, self.MAX_TORQUE), -self.MAX_TORQUE)
-
-
-            self.motor_controller.set_input_torque(adjusted_torque)
-
-            # 记录误差
-            self.error_log.append(position_error)
-            # 控制循环频率
-            self.plotter.update_data(t, current_position, current_velocity, target_torque, adjusted_torque)
+            current_position, current_velocity, target_torque, adjusted_torque = self.control_step(t, dt)
+            if self.plotter is not None:
+                self.plotter.update_data(t, current_position, current_velocity, target_torque, adjusted_torque)
             # 控制循环频率
             time.sleep(0.001)
 
         print("阻抗控制完成！")
-        self.plotter.finalize()
+        if pipelined:
+            self.motor_controller.disable_pipelining()
+        self.motor_controller.sensor_cache.report()
+        if self.motor_controller.command_stage is not None:
+            self.motor_controller.command_stage.report()
+        if self.plotter is not None:
+            self.plotter.finalize()
         self.analyze_performance()
+        if self.cache is not None:
+            self.store_parameters()
         self.motor_controller.stop_motor()
 
 
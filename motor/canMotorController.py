@@ -0,0 +1,120 @@
+from motor.motorController import MotorController, MotorError
+from motor.canSimple import CanSimpleBus, CanSimpleNode
+from motor.configProfile import ConfigProfile
+from utils.eventLog import MOTOR_CONNECT_FAILED, MOTOR_UNSUPPORTED
+
+
+class CanMotorController(MotorController):
+    """
+    通过 CAN 总线（ODrive CANSimple 协议）控制的电机，接口与 MotorController 相同。
+    编码器估计值、Iq 和心跳由 ODrive 周期性发送，读取不占用总线往返；力矩指令作为单帧发送。
+    多个节点共享同一个 CanSimpleBus，例如：
+        bus = CanSimpleBus("can0")
+        motor = FilteredDoubleMotorController(CanMotorController(0, bus, 0.042), CanMotorController(1, bus, 0.042))
+    CANSimple 不能读写任意配置项，配置（包括 CAN 周期报文速率）需要先通过 USB 写入并保存，例如应用 CAN_STREAM_PROFILE。
+    """
+    TRANSPORT = "can"
+    WATCHDOG_SUPPORTED = False  # CANSimple 无法写入 watchdog_timeout，需要通过 USB 配置
+
+    def __init__(self, node_id: int, can_bus: CanSimpleBus, torque_constant: float,
+                 connect_timeout: float = 1.0):
+        """
+        :param node_id: ODrive 的 CAN 节点 ID（axis0.config.can.node_id）。
+        :param can_bus: 共享的 CAN 总线。
+        :param torque_constant: 力矩常数 (Nm/A)，CAN 协议无法读取，需要与设备配置一致。
+        :param connect_timeout: 等待第一帧心跳的超时时间 (秒)。
+        """
+        super().__init__()
+        self.node_id = node_id
+        self.can_bus = can_bus
+        self.torque_constant = torque_constant
+        self.connect_timeout = connect_timeout
+        self.config_snapshot = {self.TORQUE_CONSTANT_PATH: torque_constant}
+
+    def initialize_odrive(self) -> None:
+        """
+        注册 CAN 节点并等待心跳。
+        """
+        try:
+            print(f"正在等待 CAN 节点 {self.node_id} 的心跳...")
+            node = CanSimpleNode(self.node_id, self.can_bus)
+            if not node.wait_for_heartbeat(self.connect_timeout):
+                raise ConnectionError(f"{self.connect_timeout} 秒内未收到 CAN 节点 {self.node_id} 的心跳，请检查连接和波特率。")
+            print(f"CAN 节点 {self.node_id} 已连接！")
+            if not node.wait_for_iq(self.connect_timeout):
+                print(f"警告: CAN 节点 {self.node_id} 没有周期发送 Iq，力矩估算将保持为 0，"
+                      f"请通过 USB 应用 CAN_STREAM_PROFILE（需要支持 iq_rate_ms 的固件）。")
+            print("清除错误...")
+            node.clear_errors()
+            self.odrv0 = node
+        except Exception as e:
+            raise MotorError(MOTOR_CONNECT_FAILED, f"初始化 ODrive 失败: {e}") from e
+
+    def get_config(self, paths, refresh: bool = False) -> dict:
+        """
+        CAN 后端只提供构造时给定的配置项，读取其他配置项时抛出 MotorError (MOTOR_UNSUPPORTED)。
+        """
+        missing = [path for path in paths if path not in self.config_snapshot]
+        if missing:
+            raise MotorError(MOTOR_UNSUPPORTED, f"CAN 后端无法读取配置项: {', '.join(missing)}，请通过 USB 读取。")
+        return {path: self.config_snapshot[path] for path in paths}
+
+    def apply_config_profile(self, profile: ConfigProfile, save: bool = True) -> dict:
+        """
+        CANSimple 无法写入配置，总是抛出 MotorError (MOTOR_UNSUPPORTED)。
+        """
+        raise MotorError(MOTOR_UNSUPPORTED, f"CAN 后端无法写入配置 {profile.name}，请通过 USB 应用配置档案。")
+
+    def save_calibration(self) -> None:
+        """
+        CANSimple 无法保存配置，校准结果只在本次上电内有效。
+        """
+        print("CAN 后端无法保存校准结果，如需持久化请通过 USB 调用 save_calibration。")
+
+
+# 通过 USB 写入一次：开启周期发送的编码器估计值（1 ms）、Iq（1 ms）和心跳（100 ms）
+CAN_STREAM_PROFILE = ConfigProfile("can_stream", {
+    "axis0.config.can.encoder_rate_ms": 1,
+    "axis0.config.can.iq_rate_ms": 1,
+    "axis0.config.can.heartbeat_rate_ms": 100,
+})
+
+
+if __name__ == "__main__":
+    import time
+    import numpy as np
+    from motor.canSimple import SimulatedCanOdrive
+    from motor.doubleMotorController import FilteredDoubleMotorController
+    from utils.lazyImport import wait_for_preloads
+
+    # 虚拟总线测试：两个模拟 ODrive 节点与控制端共享一条进程内虚拟 CAN 总线
+    channel = "exo-virtual"
+    nodes = [SimulatedCanOdrive(0, channel), SimulatedCanOdrive(1, channel)]
+    bus = CanSimpleBus(channel=channel, interface="virtual")
+    motor = FilteredDoubleMotorController(CanMotorController(0, bus, 0.042), CanMotorController(1, bus, 0.042))
+    motor.initialize_odrive()
+    motor.calibrate_motor()
+    motor.set_torque_control_mode()
+    wait_for_preloads()
+
+    tick_times = []
+    start = time.perf_counter()
+    while time.perf_counter() - start < 2.0:
+        tick_start = time.perf_counter()
+        motor.advance_tick()
+        position = motor.get_pos_estimate_filtered()
+        velocity = motor.get_vel_estimate_filtered()
+        motor.set_input_torque(-0.5 * position - 0.05 * velocity + 0.02)
+        tick_times.append(time.perf_counter() - tick_start)
+        time.sleep(0.001)
+
+    tick_times = np.array(tick_times) * 1000
+    print(f"控制周期 {len(tick_times)} 次, 耗时 平均 {tick_times.mean():.3f} ms, "
+          f"P99 {np.percentile(tick_times, 99):.3f} ms, 最大 {tick_times.max():.3f} ms")
+    print(f"位置: {motor.get_pos_estimate()}, 力矩: {motor.get_torque_estimate()}")
+    for node in nodes:
+        print(f"模拟节点 {node.node_id}: 发送 {node.frames_sent} 帧, 接收 {node.frames_received} 帧")
+    motor.stop_motor()
+    for node in nodes:
+        node.shutdown()
+    bus.shutdown()
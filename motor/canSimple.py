@@ -0,0 +1,308 @@
+import math
+import struct
+import threading
+import time
+import can
+from utils.lazyImport import LazyModule
+
+enums = LazyModule("odrive.enums")  # 导入 odrive.enums 会加载整个 odrive 包，推迟到第一次用到轴状态时
+
+# ODrive CANSimple 协议：仲裁 ID = node_id << 5 | 命令 ID
+CMD_HEARTBEAT = 0x001
+CMD_GET_MOTOR_ERROR = 0x003
+CMD_GET_ENCODER_ERROR = 0x004
+CMD_SET_AXIS_REQUESTED_STATE = 0x007
+CMD_GET_ENCODER_ESTIMATES = 0x009
+CMD_SET_CONTROLLER_MODE = 0x00B
+CMD_SET_INPUT_TORQUE = 0x00E
+CMD_GET_IQ = 0x014
+CMD_CLEAR_ERRORS = 0x018
+
+INPUT_MODE_PASSTHROUGH = 1
+
+
+def arbitration_id(node_id: int, cmd: int) -> int:
+    return node_id << 5 | cmd
+
+
+class CanSimpleBus:
+    """
+    CAN 总线连接，多个节点（例如左右腿两个 ODrive）共享同一条总线。
+    接收线程按节点 ID 把报文分发给已注册的节点。
+    """
+    def __init__(self, channel="can0", interface="socketcan", bitrate=500000, bus=None):
+        """
+        :param channel: CAN 通道，例如 "can0"；虚拟总线测试时为任意名称
+        :param interface: python-can 接口类型，例如 "socketcan"、"virtual"
+        :param bitrate: 波特率，与 ODrive 配置的 can.config.baud_rate 一致
+        :param bus: 可选，已创建的 can.BusABC 实例
+        """
+        self.bus = bus if bus is not None else can.Bus(channel=channel, interface=interface, bitrate=bitrate)
+        self._nodes = {}
+        self._lock = threading.Lock()  # python-can 的总线对象不保证多线程发送安全
+        self.notifier = can.Notifier(self.bus, [self._on_message])
+
+    def register(self, node) -> None:
+        self._nodes[node.node_id] = node
+
+    def send(self, node_id: int, cmd: int, data: bytes = b"", remote: bool = False) -> None:
+        message = can.Message(arbitration_id=arbitration_id(node_id, cmd), data=data,
+                              is_extended_id=False, is_remote_frame=remote, dlc=8 if remote else len(data))
+        with self._lock:
+            self.bus.send(message)
+
+    def _on_message(self, message) -> None:
+        if message.is_remote_frame:
+            return
+        node = self._nodes.get(message.arbitration_id >> 5)
+        if node is not None:
+            node.handle(message.arbitration_id & 0x1F, bytes(message.data))
+
+    def shutdown(self) -> None:
+        self.notifier.stop()
+        self.bus.shutdown()
+
+
+class CanSimpleNode:
+    """
+    通过 CANSimple 协议访问的 ODrive 节点。
+
+    对外提供与 USB 设备对象相同的属性路径（axis0.encoder.pos_estimate、axis0.controller.input_torque 等），
+    MotorController 可以不加修改地使用。编码器估计值、Iq 和心跳由 ODrive 周期性发送（见 CAN_STREAM_PROFILE），
+    接收线程缓存最新一帧，读取时直接返回，不占用总线。
+    """
+    def __init__(self, node_id: int, can_bus: CanSimpleBus):
+        self.node_id = node_id
+        self.can_bus = can_bus
+        self.axis0 = _CanAxis(self)
+        self.heartbeat_time = None
+        self.encoder_time = None
+        self.iq_time = None
+        self._heartbeat = threading.Event()
+        self._iq = threading.Event()
+        self._responses = {}  # {命令 ID: threading.Event}，用于请求-应答类命令
+        can_bus.register(self)
+
+    def send(self, cmd: int, data: bytes = b"", remote: bool = False) -> None:
+        self.can_bus.send(self.node_id, cmd, data, remote)
+
+    def request(self, cmd: int, timeout: float = 0.1) -> bool:
+        """
+        发送请求帧并等待应答。
+        :return: 是否在超时前收到应答
+        """
+        event = self._responses.setdefault(cmd, threading.Event())
+        event.clear()
+        self.send(cmd, remote=True)
+        return event.wait(timeout)
+
+    def handle(self, cmd: int, data: bytes) -> None:
+        """
+        处理收到的报文（在接收线程中调用）。
+        """
+        axis = self.axis0
+        now = time.perf_counter()
+        if cmd == CMD_HEARTBEAT:
+            axis.error, axis.current_state = struct.unpack_from("<IB", data)
+            self.heartbeat_time = now
+            self._heartbeat.set()
+        elif cmd == CMD_GET_ENCODER_ESTIMATES:
+            axis.encoder.estimates = struct.unpack_from("<ff", data)
+            self.encoder_time = now
+        elif cmd == CMD_GET_IQ:
+            axis.motor.current_control.Iq_measured = struct.unpack_from("<ff", data)[1]
+            self.iq_time = now
+            self._iq.set()
+        elif cmd == CMD_GET_MOTOR_ERROR:
+            axis.motor.last_error = struct.unpack_from("<Q", data)[0]
+        elif cmd == CMD_GET_ENCODER_ERROR:
+            axis.encoder.last_error = struct.unpack_from("<I", data)[0]
+        event = self._responses.get(cmd)
+        if event is not None:
+            event.set()
+
+    def wait_for_heartbeat(self, timeout: float) -> bool:
+        return self._heartbeat.wait(timeout)
+
+    def wait_for_iq(self, timeout: float) -> bool:
+        return self._iq.wait(timeout)
+
+    def clear_errors(self) -> None:
+        self.send(CMD_CLEAR_ERRORS)
+
+
+class _CanAxis:
+    def __init__(self, node):
+        self._node = node
+        self.error = 0
+        self.current_state = enums.AXIS_STATE_UNDEFINED
+        self._requested_state = enums.AXIS_STATE_UNDEFINED
+        self.encoder = _CanEncoder(node)
+        self.motor = _CanMotor(node)
+        self.controller = _CanController(node)
+
+    @property
+    def requested_state(self):
+        return self._requested_state
+
+    @requested_state.setter
+    def requested_state(self, state):
+        self._requested_state = state
+        self._node.send(CMD_SET_AXIS_REQUESTED_STATE, struct.pack("<I", state))
+
+
+class _CanEncoder:
+    def __init__(self, node):
+        self._node = node
+        self.estimates = (0.0, 0.0)
+        self.last_error = 0
+
+    @property
+    def pos_estimate(self):
+        return self.estimates[0]
+
+    @property
+    def vel_estimate(self):
+        return self.estimates[1]
+
+    @property
+    def error(self):
+        self._node.request(CMD_GET_ENCODER_ERROR)
+        return self.last_error
+
+
+class _CanCurrentControl:
+    def __init__(self, node):
+        self._node = node
+        self.Iq_measured = 0.0
+
+
+class _CanMotor:
+    def __init__(self, node):
+        self._node = node
+        self.current_control = _CanCurrentControl(node)
+        self.last_error = 0
+
+    @property
+    def error(self):
+        self._node.request(CMD_GET_MOTOR_ERROR)
+        return self.last_error
+
+
+class _CanControllerConfig:
+    def __init__(self, node):
+        self._node = node
+        self._control_mode = enums.CONTROL_MODE_TORQUE_CONTROL
+
+    @property
+    def control_mode(self):
+        return self._control_mode
+
+    @control_mode.setter
+    def control_mode(self, mode):
+        self._control_mode = mode
+        self._node.send(CMD_SET_CONTROLLER_MODE, struct.pack("<ii", mode, INPUT_MODE_PASSTHROUGH))
+
+
+class _CanController:
+    def __init__(self, node):
+        self._node = node
+        self._input_torque = 0.0
+        self.config = _CanControllerConfig(node)
+
+    @property
+    def input_torque(self):
+        return self._input_torque
+
+    @input_torque.setter
+    def input_torque(self, torque):
+        self._input_torque = torque
+        self._node.send(CMD_SET_INPUT_TORQUE, struct.pack("<f", torque))
+
+
+class SimulatedCanOdrive:
+    """
+    进程内的 ODrive CAN 节点模拟，用于在虚拟总线上测试 CAN 后端。
+    周期发送心跳、编码器估计值和 Iq，响应轴状态、控制模式、力矩指令和 Iq/错误请求，关节按 惯量 + 粘滞阻尼 积分。
+    """
+    def __init__(self, node_id, channel="exo-virtual", interface="virtual", inertia=0.01, damping=0.01,
+                 torque_constant=0.042, encoder_rate=0.001, heartbeat_rate=0.1, iq_rate=0.001, calibration_time=0.2):
+        self.node_id = node_id
+        self.bus = can.Bus(channel=channel, interface=interface, receive_own_messages=False)
+        self.inertia = inertia
+        self.damping = damping
+        self.torque_constant = torque_constant
+        self.encoder_rate = encoder_rate
+        self.heartbeat_rate = heartbeat_rate
+        self.iq_rate = iq_rate  # None 表示不周期发送 Iq（对应 iq_rate_ms = 0）
+        self.calibration_time = calibration_time
+        self.state = enums.AXIS_STATE_IDLE
+        self.torque = 0.0
+        self.position = 0.0
+        self.velocity = 0.0
+        self.frames_sent = 0
+        self.frames_received = 0
+        self._calibration_end = None
+        self._running = True
+        self.notifier = can.Notifier(self.bus, [self._on_message])
+        self._thread = threading.Thread(target=self._run, name=f"sim-odrive-{node_id}", daemon=True)
+        self._thread.start()
+
+    def _send(self, cmd, data):
+        self.bus.send(can.Message(arbitration_id=arbitration_id(self.node_id, cmd), data=data, is_extended_id=False))
+        self.frames_sent += 1
+
+    def _on_message(self, message):
+        if message.arbitration_id >> 5 != self.node_id:
+            return
+        self.frames_received += 1
+        cmd = message.arbitration_id & 0x1F
+        data = bytes(message.data)
+        if cmd == CMD_SET_AXIS_REQUESTED_STATE:
+            state = struct.unpack_from("<I", data)[0]
+            if state in (enums.AXIS_STATE_MOTOR_CALIBRATION, enums.AXIS_STATE_ENCODER_OFFSET_CALIBRATION):
+                self._calibration_end = time.perf_counter() + self.calibration_time
+            self.state = state
+            if state != enums.AXIS_STATE_CLOSED_LOOP_CONTROL:
+                self.torque = 0.0
+        elif cmd == CMD_SET_INPUT_TORQUE:
+            if self.state == enums.AXIS_STATE_CLOSED_LOOP_CONTROL:
+                self.torque = struct.unpack_from("<f", data)[0]
+        elif cmd == CMD_GET_IQ and message.is_remote_frame:
+            self._send_iq()
+        elif cmd == CMD_GET_MOTOR_ERROR and message.is_remote_frame:
+            self._send(CMD_GET_MOTOR_ERROR, struct.pack("<Q", 0))
+        elif cmd == CMD_GET_ENCODER_ERROR and message.is_remote_frame:
+            self._send(CMD_GET_ENCODER_ERROR, struct.pack("<I", 0))
+
+    def _send_iq(self):
+        iq = self.torque / self.torque_constant
+        self._send(CMD_GET_IQ, struct.pack("<ff", iq, iq))
+
+    def _run(self):
+        last = time.perf_counter()
+        next_heartbeat = next_iq = last
+        while self._running:
+            time.sleep(self.encoder_rate)
+            now = time.perf_counter()
+            dt = now - last
+            last = now
+            if self._calibration_end is not None and now >= self._calibration_end:
+                self._calibration_end = None
+                self.state = enums.AXIS_STATE_IDLE
+            acceleration = (self.torque - self.damping * self.velocity) / self.inertia
+            self.velocity += acceleration * dt
+            self.position += self.velocity * dt / (2 * math.pi)  # ODrive 位置单位为圈
+            self._send(CMD_GET_ENCODER_ESTIMATES, struct.pack("<ff", self.position, self.velocity / (2 * math.pi)))
+            if self.iq_rate is not None and now >= next_iq:
+                self._send_iq()
+                next_iq = now + self.iq_rate
+            if now >= next_heartbeat:
+                self._send(CMD_HEARTBEAT, struct.pack("<IBBBB", 0, self.state, 0, 0, 0))
+                next_heartbeat = now + self.heartbeat_rate
+
+    def shutdown(self):
+        self._running = False
+        self._thread.join()
+        self.notifier.stop()
+        self.bus.shutdown()
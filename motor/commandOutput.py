@@ -0,0 +1,71 @@
+import math
+import time
+
+
+class TorqueCommandStage:
+    """
+    力矩指令输出级。
+
+    每个周期的力矩指令先经过斜率限制，再与上一次实际写入的值比较：变化小于死区时不写入 USB，
+    但距上一次写入超过最长刷新间隔时强制重写一次，限制某次写入丢失后设备保持旧指令的时间。
+    指令变为 0 时总是写入，保证停止指令不会被死区吞掉。
+    写入 input_torque 不会喂 ODrive 看门狗，主机卡死时的保护见 MotorController.enable_watchdog。
+    """
+    def __init__(self, deadband: float = 0.005, slew_rate: float = None, keepalive_interval: float = 0.1):
+        """
+        :param deadband: 死区 (Nm)，与上次写入值相差小于该值时跳过写入
+        :param slew_rate: 可选，力矩变化率上限 (Nm/s)
+        :param keepalive_interval: 最长刷新间隔 (秒)
+        """
+        self.deadband = deadband
+        self.slew_rate = slew_rate
+        self.keepalive_interval = keepalive_interval
+        self.output = 0.0  # 经过斜率限制后的指令
+        self.last_written = None
+        self.last_write_time = -math.inf
+        self.last_update_time = None
+        self.sent = 0
+        self.skipped = 0
+
+    def update(self, torque: float, now: float = None):
+        """
+        处理本周期的力矩指令。
+        :param torque: 期望力矩
+        :param now: 可选，当前时刻 (time.perf_counter)
+        :return: 需要写入的力矩；不需要写入时返回 None
+        """
+        if now is None:
+            now = time.perf_counter()
+        output = torque
+        if self.slew_rate is not None and self.last_update_time is not None:
+            max_step = self.slew_rate * (now - self.last_update_time)
+            output = min(max(torque, self.output - max_step), self.output + max_step)
+        self.last_update_time = now
+        self.output = output
+
+        if (self.last_written is None
+                or abs(output - self.last_written) >= self.deadband
+                or (output == 0.0 and self.last_written != 0.0)
+                or now - self.last_write_time >= self.keepalive_interval):
+            self.last_written = output
+            self.last_write_time = now
+            self.sent += 1
+            return output
+        self.skipped += 1
+        return None
+
+    def reset(self, torque: float = 0.0) -> None:
+        """
+        绕过输出级直接写入力矩后（例如停止电机）同步内部状态。
+        """
+        self.output = torque
+        self.last_written = torque
+        self.last_write_time = time.perf_counter()
+        self.last_update_time = None
+
+    def skip_ratio(self) -> float:
+        total = self.sent + self.skipped
+        return self.skipped / total if total else 0.0
+
+    def report(self, name: str = "") -> None:
+        print(f"{name}力矩写入: 发送 {self.sent} 次, 跳过 {self.skipped} 次 ({self.skip_ratio() * 100:.1f}%)")
@@ -0,0 +1,148 @@
+import math
+from functools import reduce
+from typing import Dict, Iterable, Optional
+
+
+class ConfigProfile:
+    """
+    声明式 ODrive 配置档案。
+    以 {属性路径: 目标值} 描述配置，路径相对于 ODrive 设备对象，例如 "axis0.motor.config.pole_pairs"。
+    """
+    def __init__(self, name: str, values: Dict[str, object]):
+        """
+        :param name: 配置档案名称。
+        :param values: {属性路径: 目标值}
+        """
+        self.name = name
+        self.values = dict(values)
+
+    def derive(self, name: str, overrides: Dict[str, object]) -> "ConfigProfile":
+        """
+        基于当前档案派生新档案，只覆盖差异项。
+        :param name: 新档案名称。
+        :param overrides: 需要覆盖的 {属性路径: 目标值}
+        :return: 新的配置档案。
+        """
+        values = dict(self.values)
+        values.update(overrides)
+        return ConfigProfile(name, values)
+
+    def paths(self):
+        return list(self.values.keys())
+
+
+def is_persisted(path: str) -> bool:
+    """
+    判断属性是否会被 save_configuration 写入 Flash（ODrive 中所有 config 节点下的属性）。
+    """
+    return path.startswith("config.") or ".config." in path
+
+
+def read_value(odrv, path: str):
+    """
+    按属性路径读取设备上的值。
+    """
+    return reduce(getattr, path.split("."), odrv)
+
+
+def write_value(odrv, path: str, value) -> None:
+    """
+    按属性路径向设备写入值。
+    """
+    parent, _, attr = path.rpartition(".")
+    target = reduce(getattr, parent.split("."), odrv) if parent else odrv
+    setattr(target, attr, value)
+
+
+def read_snapshot(odrv, paths: Iterable[str]) -> Dict[str, object]:
+    """
+    一次性读取多个属性，生成配置快照。
+    """
+    return {path: read_value(odrv, path) for path in paths}
+
+
+def values_equal(current, target) -> bool:
+    """
+    比较设备上的值与目标值，浮点数按相对误差比较（设备以 float32 存储）。
+    """
+    if isinstance(current, float) or isinstance(target, float):
+        return math.isclose(float(current), float(target), rel_tol=1e-6, abs_tol=1e-9)
+    return current == target
+
+
+def diff_profile(snapshot: Dict[str, object], profile: ConfigProfile) -> Dict[str, object]:
+    """
+    计算需要写入设备的配置项。
+    :param snapshot: 当前配置快照，缺失的项视为需要写入。
+    :param profile: 目标配置档案。
+    :return: {属性路径: 目标值}，仅包含与快照不同的项。
+    """
+    return {path: value for path, value in profile.values.items()
+            if path not in snapshot or not values_equal(snapshot[path], value)}
+
+
+def apply_profile(odrv, profile: ConfigProfile, snapshot: Optional[Dict[str, object]] = None) -> Dict[str, object]:
+    """
+    读取一次 -> 比较差异 -> 只写入变化项。
+    :param odrv: ODrive 设备对象。
+    :param profile: 目标配置档案。
+    :param snapshot: 可选，配置快照，缺失的项会从设备读取一次并补充到快照中；写入后快照同步更新。
+    :return: 实际写入的 {属性路径: 目标值}
+    """
+    if snapshot is None:
+        snapshot = {}
+    missing = [path for path in profile.values if path not in snapshot]
+    snapshot.update(read_snapshot(odrv, missing))
+
+    changes = diff_profile(snapshot, profile)
+    for path, value in changes.items():
+        write_value(odrv, path, value)
+        snapshot[path] = value
+    return changes
+
+
+# 开关电源供电配置
+SWITCH_POWER_PROFILE = ConfigProfile("switch_power", {
+    # 完全确定的参数
+    "axis0.motor.config.pole_pairs": 10,
+    "axis0.motor.config.torque_constant": 0.042,
+    "axis0.motor.config.calibration_current": 5,
+    "axis0.motor.config.resistance_calib_max_voltage": 5,
+    "axis0.controller.config.enable_vel_limit": True,
+    "axis0.controller.config.enable_torque_mode_vel_limit": 1,
+    "axis0.controller.config.input_filter_bandwidth": 0,
+
+    # 温度相关的一系列参数
+    "axis0.motor.motor_thermistor.config.enabled": 1,
+    "axis0.motor.motor_thermistor.config.temp_limit_lower": -20,
+    "axis0.motor.motor_thermistor.config.temp_limit_upper": 90,
+    "axis0.motor.fet_thermistor.config.enabled": 1,
+    "axis0.motor.fet_thermistor.config.temp_limit_lower": -20,
+    "axis0.motor.fet_thermistor.config.temp_limit_upper": 90,
+
+    "config.dc_bus_overvoltage_trip_level": 30.0,
+    "config.dc_bus_undervoltage_trip_level": 18,
+    "config.dc_max_positive_current": 25,
+    "config.dc_max_negative_current": 0,
+    "config.enable_brake_resistor": True,
+    "config.enable_dc_bus_overvoltage_ramp": True,
+    "config.dc_bus_overvoltage_ramp_start": 28,
+    "config.dc_bus_overvoltage_ramp_end": 29,
+
+    "config.brake_resistance": 1,
+    "config.max_regen_current": 0,  # 开关电源不能回灌，再生电流设置为 0
+
+    "axis0.motor.config.current_lim": 30,
+    "axis0.controller.config.vel_limit": 5000,
+
+    "axis0.config.can.node_id": 1,
+    "can.config.baud_rate": 500000,
+    "can.config.r120_gpio_num": 5,
+    "can.config.enable_r120": True,
+})
+
+# 电池供电配置，允许能量回馈
+BATTERY_PROFILE = SWITCH_POWER_PROFILE.derive("battery", {
+    "config.dc_max_negative_current": -10,
+    "config.max_regen_current": 10,  # 再生电流设置为10A，防止刹车时的能量回流超过电源或刹车电阻的承受能力
+})
@@ -0,0 +1,153 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Dict, Iterable, Optional
+from utils.lazyImport import LazyModule
+
+odrive = LazyModule("odrive")  # USB 协议栈只在第一次搜索设备时导入
+
+
+def _find_any(serial_number=None, timeout=None):
+    return odrive.find_any(serial_number=serial_number, timeout=timeout)
+
+
+class ODriveDeviceManager:
+    """
+    ODrive 设备管理类。
+    并行搜索所有配置的序列号，并在进程生命周期内缓存已连接的设备句柄，按需分发给电机控制器。
+    """
+    def __init__(self, finder: Optional[Callable] = None, timeout: Optional[float] = None):
+        """
+        初始化设备管理器。
+        :param finder: 可选，设备搜索函数，签名与 odrive.find_any 相同，默认使用 odrive.find_any。
+        :param timeout: 可选，单个设备的搜索超时时间 (秒)，None 表示一直等待。
+        """
+        self.finder = finder if finder is not None else _find_any
+        self.timeout = timeout
+        self._pool: Dict[Optional[str], object] = {}
+        self._pending: Dict[Optional[str], Future] = {}
+        self._ready_times: Dict[Optional[str], float] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(thread_name_prefix="odrive-discovery")
+        self._created_at = time.perf_counter()
+
+    def _find(self, serial: Optional[str]):
+        """
+        在工作线程中搜索单个设备，并将结果放入连接池。
+        :param serial: 设备序列号，None 表示任意设备。
+        :return: 设备句柄。
+        """
+        start = time.perf_counter()
+        try:
+            handle = self.finder(serial_number=serial, timeout=self.timeout)
+            if not handle:
+                raise ConnectionError(f"未找到序列号为 {serial} 的 ODrive，请检查连接。")
+            with self._lock:
+                self._pool[serial] = handle
+                self._ready_times[serial] = time.perf_counter() - start
+            return handle
+        finally:
+            with self._lock:
+                self._pending.pop(serial, None)
+
+    def discover_async(self, serials: Iterable[Optional[str]]) -> Dict[Optional[str], Future]:
+        """
+        在后台并行搜索多个设备，立即返回。
+        已在连接池中的设备直接返回已完成的 Future；正在搜索中的设备复用同一个 Future。
+        :param serials: 序列号列表。
+        :return: {序列号: Future}
+        """
+        futures = {}
+        with self._lock:
+            for serial in serials:
+                if serial in self._pool:
+                    future = Future()
+                    future.set_result(self._pool[serial])
+                elif serial in self._pending:
+                    future = self._pending[serial]
+                else:
+                    future = self._executor.submit(self._find, serial)
+                    self._pending[serial] = future
+                futures[serial] = future
+        return futures
+
+    def discover(self, serials: Iterable[Optional[str]]) -> Dict[Optional[str], object]:
+        """
+        并行搜索多个设备，并等待全部完成。
+        :param serials: 序列号列表。
+        :return: {序列号: 设备句柄}
+        """
+        futures = self.discover_async(serials)
+        handles = {}
+        errors = []
+        for serial, future in futures.items():
+            try:
+                handles[serial] = future.result()
+            except Exception as e:
+                errors.append(f"{serial}: {e}")
+        if errors:
+            raise ConnectionError("部分 ODrive 连接失败 -> " + "; ".join(errors))
+        return handles
+
+    def acquire(self, serial: Optional[str] = None):
+        """
+        获取设备句柄，优先使用连接池中的缓存。
+        :param serial: 设备序列号，None 表示任意设备。
+        :return: 设备句柄。
+        """
+        with self._lock:
+            handle = self._pool.get(serial)
+        if handle is not None:
+            return handle
+        return self.discover([serial])[serial]
+
+    def invalidate(self, serial: Optional[str] = None) -> None:
+        """
+        从连接池中移除设备（例如设备重启或断开后），下次获取时会重新搜索。
+        :param serial: 设备序列号。
+        """
+        with self._lock:
+            self._pool.pop(serial, None)
+            self._ready_times.pop(serial, None)
+
+    def is_ready(self, serial: Optional[str] = None) -> bool:
+        """
+        判断设备是否已经在连接池中。
+        """
+        with self._lock:
+            return serial in self._pool
+
+    def time_to_ready(self) -> Dict[Optional[str], float]:
+        """
+        获取每个设备从开始搜索到连接成功所用的时间 (秒)。
+        """
+        with self._lock:
+            return dict(self._ready_times)
+
+    def report(self) -> None:
+        """
+        打印设备连接耗时报告。
+        """
+        ready_times = self.time_to_ready()
+        print("ODrive 连接耗时:")
+        for serial, elapsed in ready_times.items():
+            print(f"  {serial if serial is not None else '任意设备'}: {elapsed:.3f} s")
+        if ready_times:
+            # 并行搜索时，总耗时约等于最慢的那个设备
+            print(f"  并行搜索总耗时: {max(ready_times.values()):.3f} s")
+        print(f"  管理器创建至今: {time.perf_counter() - self._created_at:.3f} s")
+
+
+_default_manager: Optional[ODriveDeviceManager] = None
+_default_manager_lock = threading.Lock()
+
+
+def get_device_manager() -> ODriveDeviceManager:
+    """
+    获取进程内共享的设备管理器实例。
+    """
+    global _default_manager
+    with _default_manager_lock:
+        if _default_manager is None:
+            _default_manager = ODriveDeviceManager()
+        return _default_manager
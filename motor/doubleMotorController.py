@@ -1,57 +1,30 @@
-from utils.butterworthFilter import ButterworthFilter
-from motor.motorController import MotorController
+from typing import Optional
+from motor.multiMotorController import MultiMotorController, FilteredMultiMotorController
+from motor.deviceManager import ODriveDeviceManager
 
 
-class DoubleMotorController:
+class _DualAxisMixin:
     """
-    双电机控制类，用于同时控制两个 ODrive 电机。
+    双电机接口：保留 motor1/motor2 属性以及双参数力矩设置方式。
     """
-    def __init__(self, odrv_serial_1:str, odrv_serial_2:str):
-        """
-        初始化双电机控制器。
-        第一个序列号是左腿电机，第二个序列号是右腿电机
-        :param odrv_serial_1: 第一个 ODrive 的序列号。
-        :param odrv_serial_2: 第二个 ODrive 的序列号。
-        """
-        self.motor1 = MotorController(odrv_serial_1)
-        self.motor2 = MotorController(odrv_serial_2)
+    @property
+    def motor1(self):
+        return self.motors[0]
 
-    def initialize_odrive(self) -> None:
-        """
-        初始化两个 ODrive 设备。
-        """
-        self.motor1.initialize_odrive()
-        self.motor2.initialize_odrive()
+    @property
+    def motor2(self):
+        return self.motors[1]
 
-    def calibrate_motor(self) -> None:
-        """
-        校准两个电机。
-        """
-        self.motor1.calibrate_motor()
-        self.motor2.calibrate_motor()
-
-    def set_torque_control_mode(self) -> None:
-        """
-        设置两个电机为力矩控制模式。
-        """
-        self.motor1.set_torque_control_mode()
-        self.motor2.set_torque_control_mode()
-
-    def stop_motor(self) -> None:
-        """
-        停止两个电机。
-        """
-        self.motor1.stop_motor()
-        self.motor2.stop_motor()
-
-    def set_input_torque(self, torque1: float, torque2: float) -> None:
+    def set_input_torque(self, torque1, torque2: Optional[float] = None) -> None:
         """
         设置两个电机的输入力矩。
-        :param torque1: 第一个电机的力矩值。
+        :param torque1: 第一个电机的力矩值，或按轴排列的力矩数组。
         :param torque2: 第二个电机的力矩值。
         """
-        self.motor1.set_input_torque(torque1)
-        self.motor2.set_input_torque(torque2)
+        if torque2 is None:
+            super().set_input_torque(torque1)
+        else:
+            super().set_input_torque((torque1, torque2))
 
     def get_torque_constant(self) -> float:
         """
@@ -60,61 +33,30 @@ class DoubleMotorController:
         """
         return self.motor1.get_torque_constant()
 
-    def get_Iq_measured(self):
-        """
-        获取测量的电流 Iq。
-        :return: Iq 测量值。
-        """
-        return [self.motor1.get_Iq_measured(), self.motor2.get_Iq_measured()]
-
-    def get_torque_estimate(self):
-        """
-        获取力矩估算值。
-        :return: 力矩估算值。
-        """
-        return [self.motor1.get_torque_estimate(), self.motor2.get_torque_estimate()]
-
-    def get_vel_estimate(self):
-        """
-        获取速度估算值。
-        :return: 速度估算值。
-        """
-        return [self.motor1.get_vel_estimate(), self.motor2.get_vel_estimate()]
-
-    def get_pos_estimate(self):
-        """
-        获取位置估算值。
-        :return: 位置估算值。
-        """
-        return [self.motor1.get_pos_estimate(), self.motor2.get_pos_estimate()]
 
-    def get_fake_torque_estimate(self):
-        """
-        获取力矩估算值。
-        :return: 力矩估算值。
-        """
-        return [1,1]
-
-    def get_fake_vel_estimate(self):
+class DoubleMotorController(_DualAxisMixin, MultiMotorController):
+    """
+    双电机控制类，用于同时控制两个 ODrive 电机。
+    """
+    def __init__(self, odrv_serial_1:str, odrv_serial_2:str,
+                 device_manager: Optional[ODriveDeviceManager] = None):
         """
-        获取速度估算值。
-        :return: 速度估算值。
+        初始化双电机控制器。
+        第一个序列号是左腿电机，第二个序列号是右腿电机
+        :param odrv_serial_1: 第一个 ODrive 的序列号。
+        :param odrv_serial_2: 第二个 ODrive 的序列号。
+        :param device_manager: 可选，设备管理器，默认使用进程内共享的管理器。
         """
-        return [1,1]
+        super().__init__([odrv_serial_1, odrv_serial_2], ["left", "right"], device_manager)
 
-    def get_fake_pos_estimate(self):
-        """
-        获取位置估算值。
-        :return: 位置估算值。
-        """
-        return [1,1]
 
-class FilteredDoubleMotorController(DoubleMotorController):
+class FilteredDoubleMotorController(_DualAxisMixin, FilteredMultiMotorController):
     """
     双电机控制类，用于同时控制两个 ODrive 电机。
     """
     def __init__(self, odrv_serial_1: str, odrv_serial_2: str,
-                 order: int = 2, cutoff_freq: float = 10, sampling_freq: float = 1000):
+                 order: int = 2, cutoff_freq: float = 10, sampling_freq: float = 1000,
+                 device_manager: Optional[ODriveDeviceManager] = None):
         """
         初始化双电机控制器以及滤波器。
         :param odrv_serial_1: 第一个 ODrive 的序列号。
@@ -122,53 +64,7 @@ class FilteredDoubleMotorController(DoubleMotorController):
         :param order: 滤波器阶数。
         :param cutoff_freq: 滤波器的截止频率。
         :param sampling_freq: 滤波器的采样频率。
+        :param device_manager: 可选，设备管理器。
         """
-        # 调用父类的初始化方法
-        super().__init__(odrv_serial_1, odrv_serial_2)
-        # 初始化第一个电机的滤波器
-        self.position_filter_1 = ButterworthFilter(order=order, cutoff_freq=cutoff_freq, sampling_freq=sampling_freq)
-        self.velocity_filter_1 = ButterworthFilter(order=order, cutoff_freq=cutoff_freq, sampling_freq=sampling_freq)
-        self.current_filter_1 = ButterworthFilter(order=order, cutoff_freq=cutoff_freq, sampling_freq=sampling_freq)
-        self.torque_filter_1 = ButterworthFilter(order=order, cutoff_freq=cutoff_freq, sampling_freq=sampling_freq)
-
-        # 初始化第二个电机的滤波器
-        self.position_filter_2 = ButterworthFilter(order=order, cutoff_freq=cutoff_freq, sampling_freq=sampling_freq)
-        self.velocity_filter_2 = ButterworthFilter(order=order, cutoff_freq=cutoff_freq, sampling_freq=sampling_freq)
-        self.current_filter_2 = ButterworthFilter(order=order, cutoff_freq=cutoff_freq, sampling_freq=sampling_freq)
-        self.torque_filter_2 = ButterworthFilter(order=order, cutoff_freq=cutoff_freq, sampling_freq=sampling_freq)
-
-    def get_Iq_measured_filtered(self):
-        """
-        获取滤波后的测量电流 Iq。
-        :return: Iq 测量值。
-        """
-        value_1=self.current_filter_1.filter_signal(self.motor1.get_Iq_measured())
-        value_2=self.current_filter_2.filter_signal(self.motor2.get_Iq_measured())
-        return [value_1,value_2]
-
-    def get_torque_estimate_filtered(self):
-        """
-        获取滤波后的力矩估算值。
-        :return: 力矩估算值。
-        """
-        value_1=self.torque_filter_1.filter_signal(self.motor1.get_torque_estimate())
-        value_2=self.torque_filter_2.filter_signal(self.motor2.get_torque_estimate())
-        return [value_1,value_2]
-
-    def get_vel_estimate_filtered(self):
-        """
-        获取滤波后的速度估算值。
-        :return: 速度估算值。
-        """
-        value_1=self.velocity_filter_1.filter_signal(self.motor1.get_vel_estimate())
-        value_2=self.velocity_filter_2.filter_signal(self.motor2.get_vel_estimate())
-        return [value_1,value_2]
-
-    def get_pos_estimate_filtered(self):
-        """
-        获取滤波后的位置估算值。
-        :return: 位置估算值。
-        """
-        value_1=self.position_filter_1.filter_signal(self.motor1.get_pos_estimate())
-        value_2=self.position_filter_2.filter_signal(self.motor2.get_pos_estimate())
-        return [value_1,value_2]
\ No newline at end of file
+        super().__init__([odrv_serial_1, odrv_serial_2], ["left", "right"],
+                         order, cutoff_freq, sampling_freq, device_manager)
@@ -1,66 +1,101 @@
 from typing import Optional
 from utils.butterworthFilter import ButterworthFilter
 from motor.motorController import MotorController
+from motor.deviceManager import ODriveDeviceManager
+from utils.tickCache import ObserverClock
 
 
 class FilteredMotorController(MotorController):
     def __init__(self, odrv_serial: Optional[str] = None,
-                 order: int = 2, cutoff_freq: float = 200, sampling_freq: float = 1000):
+                 order: int = 2, cutoff_freq: float = 200, sampling_freq: float = 1000,
+                 device_manager: Optional[ODriveDeviceManager] = None):
         """
         初始化双电机控制器以及滤波器。
         :param odrv_serial: 第一个 ODrive 的序列号。
         :param order: 滤波器阶数。
         :param cutoff_freq: 滤波器的截止频率。
         :param sampling_freq: 滤波器的采样频率。
+        :param device_manager: 可选，设备管理器。
         """
         # 调用父类的初始化方法
-        super().__init__(odrv_serial)
+        super().__init__(odrv_serial, device_manager)
         # 初始化第一个电机的滤波器
         self.order=order
         self.position_filter = ButterworthFilter(order=self.order, cutoff_freq=cutoff_freq, sampling_freq=sampling_freq)
         self.velocity_filter = ButterworthFilter(order=self.order, cutoff_freq=cutoff_freq, sampling_freq=sampling_freq)
         self.current_filter = ButterworthFilter(order=self.order, cutoff_freq=cutoff_freq, sampling_freq=sampling_freq)
         self.torque_filter = ButterworthFilter(order=self.order, cutoff_freq=cutoff_freq, sampling_freq=sampling_freq)
+        # 可选的外部力矩观测器（例如 MomentumDisturbanceObserver），为 None 时使用滤波后的力矩估计
+        self.disturbance_observer = None
+        self._observer_clock = None
+
+    def set_disturbance_observer(self, observer) -> None:
+        """
+        设置外部力矩观测器，替代默认的“滤波力矩 - 输入力矩”估计方法。
+        设置后按实际的更新间隔（而不是观测器的标称周期）积分。
+        :param observer: 提供 update(position, velocity, motor_torque, dt) 和标称周期 dt 的观测器，None 表示恢复默认方法。
+        """
+        self.disturbance_observer = observer
+        # 追赶周期的短间隔和偶尔的停顿都按实际时长积分，只有超过 0.1 秒的长时间停顿被截断
+        self._observer_clock = (ObserverClock(1.0 / observer.dt, min_ratio=0.0, max_ratio=0.1 / observer.dt)
+                                if observer is not None else None)
+
+    def use_filter_table(self, table, key) -> None:
+        """
+        四个滤波器改用系数表中的系数，之后可以通过 select_filter_coefficients 按键切换。
+        :param table: CoefficientTable
+        :param key: 初始键（例如速度等级）
+        """
+        for signal_filter in (self.position_filter, self.velocity_filter, self.current_filter, self.torque_filter):
+            signal_filter.use_table(table, key)
+
+    def select_filter_coefficients(self, key) -> None:
+        """
+        查表切换滤波器系数，输出在切换后的若干周期内平滑过渡。
+        :param key: 系数表中的键
+        """
+        for signal_filter in (self.position_filter, self.velocity_filter, self.current_filter, self.torque_filter):
+            signal_filter.select(key)
 
 
 
     def get_Iq_measured_filtered(self):
         """
-        获取滤波后的测量电流 Iq。
+        获取滤波后的测量电流 Iq，滤波器每个控制周期只前进一次。
         :return: Iq 测量值。
         """
-        value=self.current_filter.filter_signal(self.get_Iq_measured())
-        return value
+        return self.sensor_cache.get("Iq_filtered", lambda: self.current_filter.filter_signal(self.get_Iq_measured()))
 
     def get_torque_estimate_filtered(self):
         """
-        获取滤波后的力矩估算值。
+        获取滤波后的力矩估算值，滤波器每个控制周期只前进一次。
         :return: 力矩估算值。
         """
-        value=self.torque_filter.filter_signal(self.get_torque_estimate())
-        return value
+        return self.sensor_cache.get("torque_filtered", lambda: self.torque_filter.filter_signal(self.get_torque_estimate()))
 
     def get_vel_estimate_filtered(self):
         """
-        获取滤波后的速度估算值。
+        获取滤波后的速度估算值，滤波器每个控制周期只前进一次。
         :return: 速度估算值。
         """
-        value=self.velocity_filter.filter_signal(self.get_vel_estimate())
-        return value
+        return self.sensor_cache.get("vel_filtered", lambda: self.velocity_filter.filter_signal(self.get_vel_estimate()))
 
     def get_pos_estimate_filtered(self):
         """
-        获取滤波后的位置估算值。
+        获取滤波后的位置估算值，滤波器每个控制周期只前进一次。
         :return: 位置估算值。
         """
-        value=self.position_filter.filter_signal(self.get_pos_estimate())
-
-        return value
+        return self.sensor_cache.get("pos_filtered", lambda: self.position_filter.filter_signal(self.get_pos_estimate()))
 
     def estimate_external_torque(self, input_torque):
         """
         估计外部力矩
+        设置了外部力矩观测器时，使用原始位置、速度和电机力矩更新观测器并返回其估计值（每个控制周期调用一次）。
         :param input_torque: 输入力矩
         :return: 外部力矩
         """
+        if self.disturbance_observer is not None:
+            return self.sensor_cache.get("disturbance", lambda: self.disturbance_observer.update(
+                self.get_pos_estimate(), self.get_vel_estimate(), self.get_torque_estimate(),
+                dt=self._observer_clock.tick()))
         return self.get_torque_estimate_filtered() - input_torque
\ No newline at end of file
@@ -1,27 +1,87 @@
-import odrive
-from odrive.enums import *
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
 from typing import Optional
+from motor.deviceManager import ODriveDeviceManager, get_device_manager
+from utils.tickCache import TickCache
+from utils.lazyImport import LazyModule
+from motor.sensorPipeline import SensorPipeline
+from motor.commandOutput import TorqueCommandStage
+from motor.configProfile import (ConfigProfile, SWITCH_POWER_PROFILE, BATTERY_PROFILE,
+                                 apply_profile, is_persisted, read_snapshot)
+from utils.eventLog import (get_event_log, MOTOR_CONNECT_FAILED, MOTOR_CALIBRATION_FAILED, MOTOR_AXIS_STATE_FAILED,
+                            MOTOR_MODE_FAILED, MOTOR_STOP_FAILED, MOTOR_TORQUE_WRITE_FAILED, MOTOR_RESET_ORIGIN_FAILED,
+                            MOTOR_WATCHDOG_FAILED, MOTOR_UNSUPPORTED)
+
+
+class MotorError(Exception):
+    """
+    电机操作失败，code 为 utils.eventLog 中的错误码。库代码不退出进程，由调用方决定如何处理。
+    """
+    def __init__(self, code: str, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+class AxisStateError(MotorError):
+    """
+    轴状态切换失败：超时或轴报告错误。
+    """
+    def __init__(self, message: str, state: int, current_state: Optional[int] = None, errors: Optional[dict] = None):
+        super().__init__(MOTOR_AXIS_STATE_FAILED, message)
+        self.state = state
+        self.current_state = current_state
+        self.errors = errors or {}
+
+
+enums = LazyModule("odrive.enums")  # 导入 odrive.enums 会加载整个 odrive 包，推迟到第一次切换轴状态时
+
+
+def transient_axis_states():
+    """
+    执行完成后会自动回到 IDLE 的状态（校准类状态）。
+    """
+    return enums.AXIS_STATE_MOTOR_CALIBRATION, enums.AXIS_STATE_ENCODER_OFFSET_CALIBRATION
+
+# 所有电机共享的状态切换等待线程池
+_axis_state_executor = ThreadPoolExecutor(thread_name_prefix="axis-state")
 
 
 class MotorController:
     """
     电机控制类，用于控制和管理 ODrive 电机。
     """
-    def __init__(self, odrv_serial: Optional[str] = None):
+    TRANSPORT = "usb"  # 通信方式，CAN 后端见 CanMotorController
+    WATCHDOG_SUPPORTED = True  # 能否由本程序写入看门狗配置，见 enable_watchdog
+
+    def __init__(self, odrv_serial: Optional[str] = None,
+                 device_manager: Optional[ODriveDeviceManager] = None):
         """
         初始化电机控制器。
         :param odrv_serial: 可选，指定 ODrive 的序列号。
+        :param device_manager: 可选，设备管理器，默认使用进程内共享的管理器。
         """
         self.odrv0 = None
         self.odrv_serial = odrv_serial
+        self.device_manager = device_manager if device_manager is not None else get_device_manager()
+        self.config_snapshot = {}  # 配置快照，{属性路径: 值}
+        self.sensor_cache = TickCache()  # 控制周期内的读数缓存
+        self.pipeline = None  # 可选的传感流水线，见 enable_pipelining
+        self.command_stage = None  # 可选的力矩指令输出级，见 enable_command_coalescing
+        self.watchdog_timeout = None  # ODrive 看门狗超时 (秒)，见 enable_watchdog
+        self.watchdog_feed_interval = None
+        self._watchdog_armed = False
+        self._last_watchdog_feed = -math.inf
 
     def initialize_odrive(self) -> None:
         """
-        初始化 ODrive 设备。
+        初始化 ODrive 设备，失败时抛出 MotorError。
         """
         try:
-            print("正在寻找 ODrive...")
-            self.odrv0 = odrive.find_any(serial_number=self.odrv_serial)
+            if not self.device_manager.is_ready(self.odrv_serial):
+                print("正在寻找 ODrive...")
+            self.odrv0 = self.device_manager.acquire(self.odrv_serial)
+            self.config_snapshot = {}
 
             if self.odrv0:
                 print("ODrive 已连接！")
@@ -31,162 +91,149 @@ class MotorController:
             print("清除错误...")
             self.odrv0.clear_errors()
         except Exception as e:
-            print(f"初始化 ODrive 失败: {e}")
-            exit()
-
-    def display_values(self) -> None:
-        print("Motor Configuration:")
-        print(f"  Pole Pairs: {self.odrv0.axis0.motor.config.pole_pairs}")
-        print(f"  Torque Constant: {self.odrv0.axis0.motor.config.torque_constant}")
-        print(f"  Calibration Current: {self.odrv0.axis0.motor.config.calibration_current}")
-        print(f"  Resistance Calibration Max Voltage: {self.odrv0.axis0.motor.config.resistance_calib_max_voltage}")
-        print(f"  Current Limit: {self.odrv0.axis0.motor.config.current_lim}")
-
-        print("\nController Configuration:")
-        print(f"  Enable Velocity Limit: {self.odrv0.axis0.controller.config.enable_vel_limit}")
-        print(f"  Enable Torque Mode Velocity Limit: {self.odrv0.axis0.controller.config.enable_torque_mode_vel_limit}")
-        print(f"  Input Filter Bandwidth: {self.odrv0.axis0.controller.config.input_filter_bandwidth}")
-        print(f"  Velocity Limit: {self.odrv0.axis0.controller.config.vel_limit}")
-
-        print("\nMotor Thermistor Configuration:")
-        print(f"  Enabled: {self.odrv0.axis0.motor.motor_thermistor.config.enabled}")
-        print(f"  Temp Limit Lower: {self.odrv0.axis0.motor.motor_thermistor.config.temp_limit_lower}")
-        print(f"  Temp Limit Upper: {self.odrv0.axis0.motor.motor_thermistor.config.temp_limit_upper}")
-
-        print("\nFET Thermistor Configuration:")
-        print(f"  Enabled: {self.odrv0.axis0.motor.fet_thermistor.config.enabled}")
-        print(f"  Temp Limit Lower: {self.odrv0.axis0.motor.fet_thermistor.config.temp_limit_lower}")
-        print(f"  Temp Limit Upper: {self.odrv0.axis0.motor.fet_thermistor.config.temp_limit_upper}")
-
-        print("\nDC Bus Configuration:")
-        print(f"  Overvoltage Trip Level: {self.odrv0.config.dc_bus_overvoltage_trip_level}")
-        print(f"  Undervoltage Trip Level: {self.odrv0.config.dc_bus_undervoltage_trip_level}")
-        print(f"  Max Positive Current: {self.odrv0.config.dc_max_positive_current}")
-        print(f"  Max Negative Current: {self.odrv0.config.dc_max_negative_current}")
-        print(f"  Enable Brake Resistor: {self.odrv0.config.enable_brake_resistor}")
-        print(f"  Enable DC Bus Overvoltage Ramp: {self.odrv0.config.enable_dc_bus_overvoltage_ramp}")
-        print(f"  DC Bus Overvoltage Ramp Start: {self.odrv0.config.dc_bus_overvoltage_ramp_start}")
-        print(f"  DC Bus Overvoltage Ramp End: {self.odrv0.config.dc_bus_overvoltage_ramp_end}")
-        print(f"  Brake Resistance: {self.odrv0.config.brake_resistance}")
-        print(f"  Max Regen Current: {self.odrv0.config.max_regen_current}")
-
-        print("\nCAN Configuration:")
-        print(f"  Node ID: {self.odrv0.axis0.config.can.node_id}")
-        print(f"  Baud Rate: {self.odrv0.can.config.baud_rate}")
-        print(f"  R120 GPIO Num: {self.odrv0.can.config.r120_gpio_num}")
-        print(f"  Enable R120: {self.odrv0.can.config.enable_r120}")
-
-        print("\nConfiguration saved successfully.")
+            raise MotorError(MOTOR_CONNECT_FAILED, f"初始化 ODrive 失败: {e}") from e
+
+    TORQUE_CONSTANT_PATH = "axis0.motor.config.torque_constant"
+
+    # display_values 的显示分组：(分组标题, [(显示名称, 属性路径), ...])
+    DISPLAY_SECTIONS = (
+        ("Motor Configuration", (
+            ("Pole Pairs", "axis0.motor.config.pole_pairs"),
+            ("Torque Constant", "axis0.motor.config.torque_constant"),
+            ("Calibration Current", "axis0.motor.config.calibration_current"),
+            ("Resistance Calibration Max Voltage", "axis0.motor.config.resistance_calib_max_voltage"),
+            ("Current Limit", "axis0.motor.config.current_lim"),
+        )),
+        ("Controller Configuration", (
+            ("Enable Velocity Limit", "axis0.controller.config.enable_vel_limit"),
+            ("Enable Torque Mode Velocity Limit", "axis0.controller.config.enable_torque_mode_vel_limit"),
+            ("Input Filter Bandwidth", "axis0.controller.config.input_filter_bandwidth"),
+            ("Velocity Limit", "axis0.controller.config.vel_limit"),
+        )),
+        ("Motor Thermistor Configuration", (
+            ("Enabled", "axis0.motor.motor_thermistor.config.enabled"),
+            ("Temp Limit Lower", "axis0.motor.motor_thermistor.config.temp_limit_lower"),
+            ("Temp Limit Upper", "axis0.motor.motor_thermistor.config.temp_limit_upper"),
+        )),
+        ("FET Thermistor Configuration", (
+            ("Enabled", "axis0.motor.fet_thermistor.config.enabled"),
+            ("Temp Limit Lower", "axis0.motor.fet_thermistor.config.temp_limit_lower"),
+            ("Temp Limit Upper", "axis0.motor.fet_thermistor.config.temp_limit_upper"),
+        )),
+        ("DC Bus Configuration", (
+            ("Overvoltage Trip Level", "config.dc_bus_overvoltage_trip_level"),
+            ("Undervoltage Trip Level", "config.dc_bus_undervoltage_trip_level"),
+            ("Max Positive Current", "config.dc_max_positive_current"),
+            ("Max Negative Current", "config.dc_max_negative_current"),
+            ("Enable Brake Resistor", "config.enable_brake_resistor"),
+            ("Enable DC Bus Overvoltage Ramp", "config.enable_dc_bus_overvoltage_ramp"),
+            ("DC Bus Overvoltage Ramp Start", "config.dc_bus_overvoltage_ramp_start"),
+            ("DC Bus Overvoltage Ramp End", "config.dc_bus_overvoltage_ramp_end"),
+            ("Brake Resistance", "config.brake_resistance"),
+            ("Max Regen Current", "config.max_regen_current"),
+        )),
+        ("CAN Configuration", (
+            ("Node ID", "axis0.config.can.node_id"),
+            ("Baud Rate", "can.config.baud_rate"),
+            ("R120 GPIO Num", "can.config.r120_gpio_num"),
+            ("Enable R120", "can.config.enable_r120"),
+        )),
+    )
+
+    def get_config(self, paths, refresh: bool = False) -> dict:
+        """
+        从配置快照中读取配置项，快照中没有的项从设备读取一次后缓存。
+        :param paths: 属性路径列表。
+        :param refresh: 是否强制从设备重新读取。
+        :return: {属性路径: 值}
+        """
+        missing = list(paths) if refresh else [path for path in paths if path not in self.config_snapshot]
+        if missing:
+            self.config_snapshot.update(read_snapshot(self.odrv0, missing))
+        return {path: self.config_snapshot[path] for path in paths}
 
+    def display_values(self, refresh: bool = False) -> None:
+        """
+        打印当前配置，默认使用配置快照，不重复读取设备。
+        :param refresh: 是否强制从设备重新读取。
+        """
+        paths = [path for _, items in self.DISPLAY_SECTIONS for _, path in items]
+        config = self.get_config(paths, refresh)
+        for index, (title, items) in enumerate(self.DISPLAY_SECTIONS):
+            if index:
+                print()
+            print(f"{title}:")
+            for label, path in items:
+                print(f"  {label}: {config[path]}")
+
+    def apply_config_profile(self, profile: ConfigProfile, save: bool = True) -> dict:
+        """
+        应用配置档案：读取一次当前配置，只写入发生变化的项；
+        只有可持久化的配置项发生变化时才保存配置（保存会写 Flash 并重启设备）。
+        :param profile: 配置档案。
+        :param save: 是否在需要时保存配置。
+        :return: 实际写入的 {属性路径: 目标值}
+        """
+        changes = apply_profile(self.odrv0, profile, self.config_snapshot)
+        if not changes:
+            print(f"配置 {profile.name} 与设备一致，无需写入。")
+            return changes
 
-    def set_values_switch_power(self) -> None:
-        # 完全确定的参数
-        self.odrv0.axis0.motor.config.pole_pairs = 10
-        self.odrv0.axis0.motor.config.torque_constant = 0.042
-        self.odrv0.axis0.motor.config.calibration_current = 5
-        self.odrv0.axis0.motor.config.resistance_calib_max_voltage = 5
-        self.odrv0.axis0.controller.config.enable_vel_limit = True
-        self.odrv0.axis0.controller.config.enable_torque_mode_vel_limit = 1
-        self.odrv0.axis0.controller.config.input_filter_bandwidth = 0
-
-        # 温度相关的一系列参数
-        self.odrv0.axis0.motor.motor_thermistor.config.enabled = 1
-        self.odrv0.axis0.motor.motor_thermistor.config.temp_limit_lower = -20
-        self.odrv0.axis0.motor.motor_thermistor.config.temp_limit_upper = 90
-        self.odrv0.axis0.motor.fet_thermistor.config.enabled = 1
-        self.odrv0.axis0.motor.fet_thermistor.config.temp_limit_lower = -20
-        self.odrv0.axis0.motor.fet_thermistor.config.temp_limit_upper = 90
-
-        self.odrv0.config.dc_bus_overvoltage_trip_level = 30.0
-        self.odrv0.config.dc_bus_undervoltage_trip_level = 18
-        self.odrv0.config.dc_max_positive_current = 25
-        self.odrv0.config.dc_max_negative_current = 0
-        self.odrv0.config.enable_brake_resistor = True
-        self.odrv0.config.enable_dc_bus_overvoltage_ramp = True
-        self.odrv0.config.dc_bus_overvoltage_ramp_start = 28
-        self.odrv0.config.dc_bus_overvoltage_ramp_end = 29
-
-        self.odrv0.config.brake_resistance = 1
-        self.odrv0.config.max_regen_current = 0 #再生电流设置为10A，防止刹车时的能量回流超过电源或刹车电阻的承受能力
-
-        self.odrv0.axis0.motor.config.current_lim = 30
-        self.odrv0.axis0.controller.config.vel_limit = 5000
-
-        self.odrv0.axis0.config.can.node_id = 1
-        self.odrv0.can.config.baud_rate = 500000
-        self.odrv0.can.config.r120_gpio_num = 5
-        self.odrv0.can.config.enable_r120 = True
+        print(f"配置 {profile.name} 写入 {len(changes)} 项: {', '.join(changes)}")
+        if save and any(is_persisted(path) for path in changes):
+            self.odrv0.save_configuration()
+            print("Configuration saved successfully.")
+        return changes
 
-        self.odrv0.save_configuration()
+    def set_values_switch_power(self) -> None:
+        """
+        应用开关电源供电配置。
+        """
+        self.apply_config_profile(SWITCH_POWER_PROFILE)
 
     def set_values_battery(self) -> None:
-        # 完全确定的参数
-        self.odrv0.axis0.motor.config.pole_pairs = 10
-        self.odrv0.axis0.motor.config.torque_constant = 0.042
-        self.odrv0.axis0.motor.config.calibration_current = 5
-        self.odrv0.axis0.motor.config.resistance_calib_max_voltage = 5
-        self.odrv0.axis0.controller.config.enable_vel_limit = True
-        self.odrv0.axis0.controller.config.enable_torque_mode_vel_limit = 1
-        self.odrv0.axis0.controller.config.input_filter_bandwidth = 0
-
-        # 温度相关的一系列参数
-        self.odrv0.axis0.motor.motor_thermistor.config.enabled = 1
-        self.odrv0.axis0.motor.motor_thermistor.config.temp_limit_lower = -20
-        self.odrv0.axis0.motor.motor_thermistor.config.temp_limit_upper = 90
-        self.odrv0.axis0.motor.fet_thermistor.config.enabled = 1
-        self.odrv0.axis0.motor.fet_thermistor.config.temp_limit_lower = -20
-        self.odrv0.axis0.motor.fet_thermistor.config.temp_limit_upper = 90
-
-        #以下参数需要配置
-        self.odrv0.config.dc_bus_overvoltage_trip_level = 30.0
-        self.odrv0.config.dc_bus_undervoltage_trip_level = 18
-        self.odrv0.config.dc_max_positive_current = 25
-        self.odrv0.config.dc_max_negative_current = -10
-        self.odrv0.config.enable_brake_resistor = True
-        self.odrv0.config.enable_dc_bus_overvoltage_ramp = True
-        self.odrv0.config.dc_bus_overvoltage_ramp_start = 28
-        self.odrv0.config.dc_bus_overvoltage_ramp_end = 29
-
-        self.odrv0.config.brake_resistance = 1
-        self.odrv0.config.max_regen_current = 10
-
-        self.odrv0.axis0.motor.config.current_lim = 30
-        self.odrv0.axis0.controller.config.vel_limit = 5000
-
-        self.odrv0.axis0.config.can.node_id = 1
-        self.odrv0.can.config.baud_rate = 500000
-        self.odrv0.can.config.r120_gpio_num = 5
-        self.odrv0.can.config.enable_r120 = True
-
-        self.odrv0.save_configuration()
-
+        """
+        应用电池供电配置。
+        """
+        self.apply_config_profile(BATTERY_PROFILE)
 
     def calibrate_motor(self) -> None:
         """
-        校准电机，包括电机和编码器的校准。
+        校准电机，包括电机和编码器的校准，失败时抛出 MotorError。
         """
         try:
             print("开始校准...")
-            self._set_axis_state(AXIS_STATE_MOTOR_CALIBRATION)
-            self._set_axis_state(AXIS_STATE_ENCODER_OFFSET_CALIBRATION)
-
-            self.odrv0.axis0.motor.config.pre_calibrated = 1
-            self.odrv0.axis0.encoder.config.pre_calibrated = 1
-            self.odrv0.save_configuration()
+            self._set_axis_state(enums.AXIS_STATE_MOTOR_CALIBRATION)
+            self._set_axis_state(enums.AXIS_STATE_ENCODER_OFFSET_CALIBRATION)
+            self.save_calibration()
             print("校准完成。")
         except Exception as e:
-            print(f"校准失败: {e}")
-            exit()
+            raise MotorError(MOTOR_CALIBRATION_FAILED, f"校准失败: {e}") from e
+
+    def save_calibration(self) -> None:
+        """
+        将电机和编码器标记为已校准，并保存配置。
+        """
+        self.odrv0.axis0.motor.config.pre_calibrated = 1
+        self.odrv0.axis0.encoder.config.pre_calibrated = 1
+        self.odrv0.save_configuration()
+
+    def request_torque_control_mode(self) -> Future:
+        """
+        非阻塞地请求进入力矩控制模式。
+        :return: 闭环状态切换的 Future。
+        """
+        self.odrv0.axis0.controller.config.control_mode = enums.CONTROL_MODE_TORQUE_CONTROL
+        return self.request_axis_state(enums.AXIS_STATE_CLOSED_LOOP_CONTROL)
 
     def set_torque_control_mode(self) -> None:
         """
         设置电机为力矩控制模式。
         """
         try:
-            self.odrv0.axis0.controller.config.control_mode = CONTROL_MODE_TORQUE_CONTROL
-            self._set_axis_state(AXIS_STATE_CLOSED_LOOP_CONTROL)
+            self.request_torque_control_mode().result()
         except Exception as e:
-            print(f"设置力矩控制模式失败: {e}")
+            get_event_log().error(MOTOR_MODE_FAILED, f"设置力矩控制模式失败: {e}", self.odrv_serial or "")
 
     def stop_motor(self) -> None:
         """
@@ -194,32 +241,127 @@ class MotorController:
         """
         try:
             self.odrv0.axis0.controller.input_torque = 0
-            self._set_axis_state(AXIS_STATE_IDLE)
+            if self.command_stage is not None:
+                self.command_stage.reset(0.0)
+            self._set_axis_state(enums.AXIS_STATE_IDLE)
+            if self._watchdog_armed:
+                # IDLE 状态下不再喂狗，关闭看门狗，避免空闲时报超时错误；下一次设置力矩时重新开启
+                self.odrv0.axis0.config.enable_watchdog = False
+                self._watchdog_armed = False
         except Exception as e:
-            print(f"停止电机失败: {e}")
+            get_event_log().error(MOTOR_STOP_FAILED, f"停止电机失败: {e}", self.odrv_serial or "")
 
     def set_input_torque(self, torque_value: float) -> None:
         """
-        设置输入力矩。
+        设置输入力矩。开启指令合并时，变化小于死区的指令不写入 USB；开启看门狗时按间隔喂狗。
+        :param torque_value: 力矩值。
+        """
+        if self.command_stage is not None:
+            torque_value = self.command_stage.update(torque_value)
+            if torque_value is None:
+                self.feed_watchdog()
+                return
+        self.write_torque(torque_value)
+
+    def write_torque(self, torque_value: float, feed: bool = True) -> None:
+        """
+        直接写入力矩，不经过指令合并。MultiMotorController 在本线程经过各轴的指令输出级后，在线程池中为各轴调用。
         :param torque_value: 力矩值。
+        :param feed: 是否同时喂看门狗（看门狗开启时按间隔喂狗）
         """
+        if feed:
+            self.feed_watchdog()
         try:
             self.odrv0.axis0.controller.input_torque = torque_value
         except Exception as e:
-            print(f"设置输入力矩失败: {e}")
+            get_event_log().error(MOTOR_TORQUE_WRITE_FAILED, f"设置输入力矩失败: {e}", self.odrv_serial or "")
+
+    def enable_command_coalescing(self, deadband: float = 0.005, slew_rate: Optional[float] = None,
+                                  keepalive_interval: float = 0.1) -> TorqueCommandStage:
+        """
+        开启力矩指令合并，参数见 TorqueCommandStage。
+        :return: 力矩指令输出级，可用于查看发送/跳过次数。
+        """
+        self.command_stage = TorqueCommandStage(deadband, slew_rate, keepalive_interval)
+        return self.command_stage
+
+    def disable_command_coalescing(self) -> None:
+        """
+        关闭力矩指令合并，之后每次设置力矩都写入 USB。
+        """
+        self.command_stage = None
+
+    def enable_watchdog(self, timeout: float = 0.2, feed_interval: Optional[float] = None) -> None:
+        """
+        开启 ODrive 轴看门狗：超过 timeout 秒没有喂狗时 ODrive 报错并切到 IDLE，
+        主机程序卡死、崩溃或 USB 断开时电机自动失力。
+        看门狗在下一次 set_input_torque 时写入设备并开启，之后每次 set_input_torque 按 feed_interval 喂狗
+        （包括被指令合并跳过写入的周期），控制循环停止调用 set_input_torque 超过 timeout 即触发；
+        stop_motor 会关闭设备上的看门狗。触发后需要 clear_errors 才能重新进入闭环。
+        通信方式不支持写入看门狗配置时（WATCHDOG_SUPPORTED 为 False）抛出 MotorError (MOTOR_UNSUPPORTED)。
+        :param timeout: 看门狗超时 (秒)
+        :param feed_interval: 可选，喂狗间隔 (秒)，默认为 timeout 的四分之一
+        """
+        if not self.WATCHDOG_SUPPORTED:
+            raise MotorError(MOTOR_UNSUPPORTED, f"{self.TRANSPORT.upper()} 后端无法写入看门狗配置，"
+                                                f"请通过 USB 设置 axis0.config.watchdog_timeout 和 enable_watchdog。")
+        self.watchdog_timeout = timeout
+        self.watchdog_feed_interval = feed_interval if feed_interval is not None else timeout / 4
+        self._watchdog_armed = False
+
+    def disable_watchdog(self) -> None:
+        """
+        关闭 ODrive 轴看门狗。
+        """
+        self.watchdog_timeout = None
+        if self._watchdog_armed:
+            self._watchdog_armed = False
+            try:
+                self.odrv0.axis0.config.enable_watchdog = False
+            except Exception as e:
+                get_event_log().error(MOTOR_WATCHDOG_FAILED, f"关闭看门狗失败: {e}", self.odrv_serial or "")
+
+    def feed_watchdog(self) -> None:
+        """
+        看门狗开启时按 feed_interval 喂狗，第一次调用时把看门狗写入设备并开启；未开启时不做任何事。
+        set_input_torque 和 write_torque 会自动调用，控制循环不写力矩的周期可以单独调用。
+        """
+        if self.watchdog_timeout is None:
+            return
+        now = time.perf_counter()
+        if self._watchdog_armed and now - self._last_watchdog_feed < self.watchdog_feed_interval:
+            return
+        try:
+            axis = self.odrv0.axis0
+            if not self._watchdog_armed:
+                axis.config.watchdog_timeout = self.watchdog_timeout
+                axis.watchdog_feed()  # 开启前先喂一次，否则上一次喂狗太早时会立即触发
+                axis.config.enable_watchdog = True
+                self._watchdog_armed = True
+            else:
+                axis.watchdog_feed()
+            self._last_watchdog_feed = now
+        except Exception as e:
+            get_event_log().error(MOTOR_WATCHDOG_FAILED, f"喂看门狗失败: {e}", self.odrv_serial or "")
 
     def get_torque_constant(self) -> float:
         """
         获取力矩常数。
         :return: 力矩常数值。
         """
-        return self.odrv0.axis0.motor.config.torque_constant
+        value = self.config_snapshot.get(self.TORQUE_CONSTANT_PATH)
+        if value is None:
+            value = self.get_config((self.TORQUE_CONSTANT_PATH,))[self.TORQUE_CONSTANT_PATH]
+        return value
 
     def get_Iq_measured(self) -> float:
         """
-        获取测量的电流 Iq。
+        获取测量的电流 Iq，同一控制周期内只读取一次硬件。
         :return: Iq 测量值。
         """
+        return self.sensor_cache.get("Iq", self._read_Iq_measured)
+
+    def _read_Iq_measured(self) -> float:
         return self.odrv0.axis0.motor.current_control.Iq_measured
 
     def get_torque_estimate(self) -> float:
@@ -231,26 +373,132 @@ class MotorController:
 
     def get_vel_estimate(self) -> float:
         """
-        获取速度估算值。
+        获取速度估算值，同一控制周期内只读取一次硬件。
         :return: 速度估算值。
         """
+        return self.sensor_cache.get("vel", self._read_vel_estimate)
+
+    def _read_vel_estimate(self) -> float:
         return self.odrv0.axis0.encoder.vel_estimate
 
     def get_pos_estimate(self) -> float:
         """
-        获取位置估算值。
+        获取位置估算值，同一控制周期内只读取一次硬件。
         :return: 位置估算值。
         """
+        return self.sensor_cache.get("pos", self._read_pos_estimate)
+
+    def _read_pos_estimate(self) -> float:
         return self.odrv0.axis0.encoder.pos_estimate
 
+    def advance_tick(self) -> None:
+        """
+        进入下一个控制周期，之后的读取会重新采样硬件。
+        控制循环应在每个周期开始时调用一次。
+        流水线模式下，本周期的读数直接取自上一周期发出的读取，同时发出下一次读取。
+        """
+        self.sensor_cache.advance()
+        if self.pipeline is not None:
+            position, velocity, Iq = self.pipeline.fetch()
+            self.sensor_cache.put("pos", position)
+            self.sensor_cache.put("vel", velocity)
+            self.sensor_cache.put("Iq", Iq)
+
+    def _read_raw_state(self):
+        axis = self.odrv0.axis0
+        return axis.encoder.pos_estimate, axis.encoder.vel_estimate, axis.motor.current_control.Iq_measured
+
+    def enable_pipelining(self, compensate: bool = True) -> None:
+        """
+        开启流水线执行模式：下一周期的读取在后台线程中与本周期的计算、力矩写入同时进行。
+        :param compensate: 是否按实测 I/O 延迟把位置外推到使用时刻。
+        """
+        if self.pipeline is None:
+            self.pipeline = SensorPipeline(self._read_raw_state, compensate)
+            self.pipeline.prime()
+
+    def disable_pipelining(self) -> None:
+        """
+        关闭流水线执行模式，恢复顺序读取。
+        """
+        if self.pipeline is not None:
+            self.pipeline.close()
+            self.pipeline.report()
+            self.pipeline = None
+
+    def read_state(self):
+        """
+        一次读取位置、速度和力矩估算值。
+        :return: (位置, 速度, 力矩)
+        """
+        return self.get_pos_estimate(), self.get_vel_estimate(), self.get_torque_estimate()
+
+    def request_axis_state(self, state: int, timeout: float = 30.0,
+                           poll_interval: float = 0.005, max_poll_interval: float = 0.1) -> Future:
+        """
+        非阻塞地请求轴状态切换。
+        请求立即写入设备，等待过程在后台线程中以退避方式轮询，轮询频率不超过 1 / poll_interval。
+        校准类状态需要先进入该状态，再回到 IDLE 才算完成。
+        :param state: 目标状态。
+        :param timeout: 超时时间 (秒)。
+        :param poll_interval: 初始轮询间隔 (秒)。
+        :param max_poll_interval: 最大轮询间隔 (秒)。
+        :return: Future，完成时结果为目标状态；超时或轴报错时抛出 AxisStateError。
+        """
+        self.odrv0.axis0.requested_state = state
+        return _axis_state_executor.submit(self._wait_axis_state, state, timeout, poll_interval, max_poll_interval)
+
+    def _wait_axis_state(self, state: int, timeout: float, poll_interval: float, max_poll_interval: float) -> int:
+        """
+        轮询等待轴状态切换完成。
+        """
+        axis = self.odrv0.axis0
+        deadline = time.monotonic() + timeout
+        interval = poll_interval
+        entered = False
+        current_state = None
+        while True:
+            current_state = axis.current_state
+            if current_state == state:
+                if state not in transient_axis_states():
+                    return state
+                entered = True
+            elif entered and current_state == enums.AXIS_STATE_IDLE:
+                if axis.error:
+                    break
+                return state
+
+            if axis.error:
+                break
+            if time.monotonic() >= deadline:
+                raise AxisStateError(f"等待轴状态 {state} 超时 ({timeout} 秒)，当前状态 {current_state}",
+                                     state, current_state)
+            time.sleep(interval)
+            interval = min(interval * 1.5, max_poll_interval)
+
+        errors = self.get_axis_errors()
+        raise AxisStateError(f"轴状态 {state} 切换失败，当前状态 {current_state}，错误: "
+                             + ", ".join(f"{name}=0x{code:x}" for name, code in errors.items()),
+                             state, current_state, errors)
+
+    def get_axis_errors(self) -> dict:
+        """
+        读取轴、电机和编码器的错误码。
+        :return: {名称: 错误码}
+        """
+        axis = self.odrv0.axis0
+        return {
+            "axis": axis.error,
+            "motor": axis.motor.error,
+            "encoder": axis.encoder.error,
+        }
+
     def _set_axis_state(self, state: int) -> None:
         """
         设置轴的状态，并等待状态切换完成。
         :param state: 目标状态。
         """
-        self.odrv0.axis0.requested_state = state
-        while self.odrv0.axis0.current_state != state:
-            pass
+        self.request_axis_state(state).result()
 
     def reset_origin(self, new_angle) -> None:
         """
@@ -260,4 +508,4 @@ class MotorController:
         try:
             self.odrv0.axis0.encoder.index_offset= new_angle
         except Exception as e:
-            print(f"重置原点失败: {e}")
\ No newline at end of file
+            get_event_log().error(MOTOR_RESET_ORIGIN_FAILED, f"重置原点失败: {e}", self.odrv_serial or "")
\ No newline at end of file
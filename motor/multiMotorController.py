@@ -0,0 +1,364 @@
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Sequence
+from utils.butterworthFilter import MultiButterworthFilter
+from utils.tickCache import TickCache, ObserverClock
+from motor.sensorPipeline import SensorPipeline
+from motor.motorController import MotorController, MotorError, transient_axis_states
+from motor.deviceManager import ODriveDeviceManager, get_device_manager
+from utils.eventLog import (get_event_log, MOTOR_CONNECT_FAILED, MOTOR_CALIBRATION_FAILED, MOTOR_MODE_FAILED,
+                            MOTOR_UNSUPPORTED)
+
+
+class MultiMotorController:
+    """
+    N 轴电机控制类，每个轴对应一个 ODrive。
+    所有读取接口返回按轴排列的 NumPy 数组，各轴的 USB 读写并行执行。
+    """
+    def __init__(self, odrv_serials: Sequence[Optional[str]], names: Optional[Sequence[str]] = None,
+                 device_manager: Optional[ODriveDeviceManager] = None):
+        """
+        初始化多电机控制器。
+        :param odrv_serials: 每个轴的 ODrive 序列号，顺序即数组下标顺序；
+                             也可以直接传入已创建的电机控制器（例如 CanMotorController）。
+        :param names: 可选，每个轴的名称，例如 ["left_hip", "right_hip"]。
+        :param device_manager: 可选，设备管理器，默认使用进程内共享的管理器。
+        """
+        self.device_manager = device_manager if device_manager is not None else get_device_manager()
+        self.motors = [serial if isinstance(serial, MotorController) else MotorController(serial, self.device_manager)
+                       for serial in odrv_serials]
+        self.num_axes = len(self.motors)
+        self.names = list(names) if names is not None else [f"motor{i + 1}" for i in range(self.num_axes)]
+        if len(self.names) != self.num_axes:
+            raise ValueError(f"轴名称数量 {len(self.names)} 与电机数量 {self.num_axes} 不一致。")
+        # 每个轴两个线程，流水线模式下读取和写入可以同时进行
+        self._executor = ThreadPoolExecutor(max_workers=max(2 * self.num_axes, 1), thread_name_prefix="motor-io")
+        self.sensor_cache = TickCache()  # 控制周期内的读数缓存
+        self.pipeline = None  # 可选的传感流水线，见 enable_pipelining
+        # 预分配的状态缓冲区，每个周期原地写入，行依次为位置、速度、力矩
+        self._state = np.zeros((3, self.num_axes))
+        self._state_rows = (self._state[0], self._state[1], self._state[2])
+
+    def advance_tick(self) -> None:
+        """
+        进入下一个控制周期，之后的读取会重新采样硬件。
+        控制循环应在每个周期开始时调用一次。
+        流水线模式下，本周期的读数直接取自上一周期发出的读取，同时发出下一次读取。
+        """
+        self.sensor_cache.advance()
+        if self.pipeline is not None:
+            self._state[:] = self.pipeline.fetch()
+            self.sensor_cache.put("state", self._state_rows)
+
+    def _read_state_array(self):
+        samples = np.array(self._map(MotorController.read_state), dtype=float)
+        return samples[:, 0], samples[:, 1], samples[:, 2]
+
+    def enable_pipelining(self, compensate: bool = True) -> None:
+        """
+        开启流水线执行模式：下一周期所有轴的读取在后台线程中与本周期的计算、力矩写入同时进行。
+        :param compensate: 是否按实测 I/O 延迟把位置外推到使用时刻。
+        """
+        if self.pipeline is None:
+            self.pipeline = SensorPipeline(self._read_state_array, compensate)
+            self.pipeline.prime()
+
+    def disable_pipelining(self) -> None:
+        """
+        关闭流水线执行模式，恢复顺序读取。
+        """
+        if self.pipeline is not None:
+            self.pipeline.close()
+            self.pipeline.report()
+            self.pipeline = None
+
+    def _map(self, func, *args) -> list:
+        """
+        在每个轴上并行执行 func(motor, *per_axis_args)。
+        :param func: 以 MotorController 为第一个参数的函数。
+        :param args: 可选，按轴排列的参数序列。
+        :return: 按轴排列的结果列表。
+        """
+        if self.num_axes == 1:
+            return [func(self.motors[0], *(arg[0] for arg in args))]
+        futures = [self._executor.submit(func, motor, *(arg[i] for arg in args))
+                   for i, motor in enumerate(self.motors)]
+        return [future.result() for future in futures]
+
+    def _read_array(self, func) -> np.ndarray:
+        return np.array(self._map(func), dtype=float)
+
+    @staticmethod
+    def _wait_all(futures) -> list:
+        """
+        等待所有状态切换完成。
+        :param futures: 每个轴对应的 Future 列表。
+        :return: 失败信息列表，全部成功时为空。
+        """
+        errors = []
+        for index, future in enumerate(futures, start=1):
+            try:
+                future.result()
+            except Exception as e:
+                errors.append(f"电机{index}: {e}")
+        return errors
+
+    def initialize_odrive(self) -> None:
+        """
+        初始化所有 ODrive 设备，USB 设备并行搜索，连接句柄缓存在设备管理器中，失败时抛出 MotorError。
+        """
+        serials = [motor.odrv_serial for motor in self.motors if motor.TRANSPORT == "usb"]
+        if serials and not all(self.device_manager.is_ready(serial) for serial in serials):
+            try:
+                print(f"正在并行寻找 {len(serials)} 个 ODrive...")
+                self.device_manager.discover(serials)
+            except ConnectionError as e:
+                raise MotorError(MOTOR_CONNECT_FAILED, f"初始化 ODrive 失败: {e}") from e
+            self.device_manager.report()
+        for motor in self.motors:
+            motor.initialize_odrive()
+
+    def calibrate_motor(self) -> None:
+        """
+        校准所有电机，所有电机的每个校准步骤同时进行，失败时抛出 MotorError。
+        """
+        print("开始校准...")
+        for state in transient_axis_states():
+            errors = self._wait_all([motor.request_axis_state(state) for motor in self.motors])
+            if errors:
+                raise MotorError(MOTOR_CALIBRATION_FAILED, f"校准失败: {'; '.join(errors)}")
+        for motor in self.motors:
+            motor.save_calibration()
+        print("校准完成。")
+
+    def set_torque_control_mode(self) -> None:
+        """
+        设置所有电机为力矩控制模式，所有电机同时进入闭环。
+        """
+        try:
+            futures = [motor.request_torque_control_mode() for motor in self.motors]
+        except Exception as e:
+            get_event_log().error(MOTOR_MODE_FAILED, f"设置力矩控制模式失败: {e}")
+            return
+        errors = self._wait_all(futures)
+        if errors:
+            get_event_log().error(MOTOR_MODE_FAILED, f"设置力矩控制模式失败: {'; '.join(errors)}")
+
+    def stop_motor(self) -> None:
+        """
+        停止所有电机。
+        """
+        self._map(MotorController.stop_motor)
+
+    def set_input_torque(self, torques) -> None:
+        """
+        设置所有电机的输入力矩。
+        :param torques: 按轴排列的力矩数组。
+        """
+        torques = np.asarray(torques, dtype=float)
+        if torques.shape != (self.num_axes,):
+            raise ValueError(f"力矩数组形状应为 ({self.num_axes},)，实际为 {torques.shape}。")
+        # 先在本线程经过各轴的指令输出级，只为确实需要写入的轴提交 USB 写入（write_torque 同时喂看门狗），
+        # 被合并跳过的轴只喂看门狗
+        pending = []
+        for motor, torque in zip(self.motors, torques.tolist()):
+            if motor.command_stage is not None:
+                torque = motor.command_stage.update(torque)
+            if torque is not None:
+                pending.append((motor, torque))
+            else:
+                motor.feed_watchdog()
+        if len(pending) == 1:
+            pending[0][0].write_torque(pending[0][1])
+        elif pending:
+            futures = [self._executor.submit(motor.write_torque, torque) for motor, torque in pending]
+            for future in futures:
+                future.result()
+
+    def enable_command_coalescing(self, deadband: float = 0.005, slew_rate: Optional[float] = None,
+                                  keepalive_interval: float = 0.1) -> None:
+        """
+        为每个轴开启力矩指令合并，参数见 TorqueCommandStage。
+        """
+        for motor in self.motors:
+            motor.enable_command_coalescing(deadband, slew_rate, keepalive_interval)
+
+    def disable_command_coalescing(self) -> None:
+        for motor in self.motors:
+            motor.disable_command_coalescing()
+
+    def enable_watchdog(self, timeout: float = 0.2, feed_interval: Optional[float] = None) -> None:
+        """
+        为每个轴开启 ODrive 看门狗，参数见 MotorController.enable_watchdog。
+        先检查所有轴都支持，有不支持的轴时抛出 MotorError (MOTOR_UNSUPPORTED)，不会只开启其中一部分。
+        """
+        unsupported = [name for name, motor in zip(self.names, self.motors) if not motor.WATCHDOG_SUPPORTED]
+        if unsupported:
+            raise MotorError(MOTOR_UNSUPPORTED, f"以下轴的通信方式无法写入看门狗配置: {', '.join(unsupported)}，"
+                                                f"请通过 USB 设置 axis0.config.watchdog_timeout 和 enable_watchdog。")
+        for motor in self.motors:
+            motor.enable_watchdog(timeout, feed_interval)
+
+    def disable_watchdog(self) -> None:
+        for motor in self.motors:
+            motor.disable_watchdog()
+
+    def report_command_output(self) -> None:
+        """
+        打印每个轴的力矩写入发送/跳过次数。
+        """
+        for name, motor in zip(self.names, self.motors):
+            if motor.command_stage is not None:
+                motor.command_stage.report(f"{name} ")
+
+    def get_torque_constant(self) -> np.ndarray:
+        """
+        获取每个电机的力矩常数。
+        :return: 力矩常数数组。
+        """
+        return np.array([motor.get_torque_constant() for motor in self.motors], dtype=float)
+
+    def get_Iq_measured(self) -> np.ndarray:
+        """
+        获取测量的电流 Iq。
+        :return: Iq 测量值数组。
+        """
+        return self.sensor_cache.get("Iq", lambda: self._read_array(MotorController.get_Iq_measured))
+
+    def get_torque_estimate(self) -> np.ndarray:
+        """
+        获取力矩估算值。
+        :return: 力矩估算值数组。
+        """
+        return self.read_state()[2]
+
+    def get_vel_estimate(self) -> np.ndarray:
+        """
+        获取速度估算值。
+        :return: 速度估算值数组。
+        """
+        return self.read_state()[1]
+
+    def get_pos_estimate(self) -> np.ndarray:
+        """
+        获取位置估算值。
+        :return: 位置估算值数组。
+        """
+        return self.read_state()[0]
+
+    def read_state(self):
+        """
+        每个轴一次读取位置、速度和力矩估算值，各轴并行；同一控制周期内只采样一次硬件。
+        周期缓存生效后（第一次 advance_tick 之后）返回的数组是预分配的缓冲区，下个周期会被覆盖，调用方如需跨周期保留应自行拷贝；
+        缓存生效之前每次读取都会重新采样，返回新的数组，不会覆盖调用方已经持有的结果。
+        :return: (位置数组, 速度数组, 力矩数组)
+        """
+        return self.sensor_cache.get("state", self._read_state)
+
+    def _read_state(self):
+        state = self._state
+        for i, (position, velocity, torque) in enumerate(self._map(MotorController.read_state)):
+            state[0, i] = position
+            state[1, i] = velocity
+            state[2, i] = torque
+        if not self.sensor_cache.enabled:
+            return state[0].copy(), state[1].copy(), state[2].copy()
+        return self._state_rows
+
+
+class FilteredMultiMotorController(MultiMotorController):
+    """
+    带滤波的 N 轴电机控制类，滤波器状态按轴以数组形式保存。
+    """
+    def __init__(self, odrv_serials: Sequence[Optional[str]], names: Optional[Sequence[str]] = None,
+                 order: int = 2, cutoff_freq: float = 10, sampling_freq: float = 1000,
+                 device_manager: Optional[ODriveDeviceManager] = None):
+        """
+        初始化多电机控制器以及滤波器。
+        :param odrv_serials: 每个轴的 ODrive 序列号。
+        :param names: 可选，每个轴的名称。
+        :param order: 滤波器阶数。
+        :param cutoff_freq: 滤波器的截止频率。
+        :param sampling_freq: 滤波器的采样频率。
+        :param device_manager: 可选，设备管理器。
+        """
+        super().__init__(odrv_serials, names, device_manager)
+        self.position_filter = MultiButterworthFilter(order, cutoff_freq, sampling_freq, self.num_axes)
+        self.velocity_filter = MultiButterworthFilter(order, cutoff_freq, sampling_freq, self.num_axes)
+        self.current_filter = MultiButterworthFilter(order, cutoff_freq, sampling_freq, self.num_axes)
+        self.torque_filter = MultiButterworthFilter(order, cutoff_freq, sampling_freq, self.num_axes)
+        # 可选的外部力矩观测器（例如按轴构造的 MomentumDisturbanceObserver）
+        self.disturbance_observer = None
+        self._observer_clock = None
+
+    def set_disturbance_observer(self, observer) -> None:
+        """
+        设置外部力矩观测器，替代默认的“滤波力矩 - 输入力矩”估计方法。
+        设置后按实际的更新间隔（而不是观测器的标称周期）积分。
+        :param observer: 提供 update(position_array, velocity_array, motor_torque_array, dt) 和标称周期 dt 的观测器，
+                         None 表示恢复默认方法。
+        """
+        self.disturbance_observer = observer
+        # 追赶周期的短间隔和偶尔的停顿都按实际时长积分，只有超过 0.1 秒的长时间停顿被截断
+        self._observer_clock = (ObserverClock(1.0 / observer.dt, min_ratio=0.0, max_ratio=0.1 / observer.dt)
+                                if observer is not None else None)
+
+    def use_filter_table(self, table, key) -> None:
+        """
+        四个滤波器改用系数表中的系数，之后可以通过 select_filter_coefficients 按键切换。
+        :param table: CoefficientTable
+        :param key: 初始键（例如速度等级）
+        """
+        for signal_filter in (self.position_filter, self.velocity_filter, self.current_filter, self.torque_filter):
+            signal_filter.use_table(table, key)
+
+    def select_filter_coefficients(self, key) -> None:
+        """
+        查表切换滤波器系数，输出在切换后的若干周期内平滑过渡。
+        :param key: 系数表中的键
+        """
+        for signal_filter in (self.position_filter, self.velocity_filter, self.current_filter, self.torque_filter):
+            signal_filter.select(key)
+
+    def get_Iq_measured_filtered(self) -> np.ndarray:
+        """
+        获取滤波后的测量电流 Iq。
+        :return: Iq 测量值数组。
+        """
+        return self.sensor_cache.get("Iq_filtered", lambda: self.current_filter.filter_signal(self.get_Iq_measured()))
+
+    def get_torque_estimate_filtered(self) -> np.ndarray:
+        """
+        获取滤波后的力矩估算值。
+        :return: 力矩估算值数组。
+        """
+        return self.sensor_cache.get("torque_filtered", lambda: self.torque_filter.filter_signal(self.get_torque_estimate()))
+
+    def get_vel_estimate_filtered(self) -> np.ndarray:
+        """
+        获取滤波后的速度估算值。
+        :return: 速度估算值数组。
+        """
+        return self.sensor_cache.get("vel_filtered", lambda: self.velocity_filter.filter_signal(self.get_vel_estimate()))
+
+    def get_pos_estimate_filtered(self) -> np.ndarray:
+        """
+        获取滤波后的位置估算值。
+        :return: 位置估算值数组。
+        """
+        return self.sensor_cache.get("pos_filtered", lambda: self.position_filter.filter_signal(self.get_pos_estimate()))
+
+    def estimate_external_torque(self, input_torques) -> np.ndarray:
+        """
+        估计每个轴的外部力矩。
+        设置了外部力矩观测器时，使用原始位置、速度和电机力矩更新观测器并返回其估计值（每个控制周期调用一次）。
+        :param input_torques: 按轴排列的输入力矩。
+        :return: 外部力矩数组。
+        """
+        if self.disturbance_observer is not None:
+            return self.sensor_cache.get("disturbance", self._update_disturbance_observer)
+        return self.get_torque_estimate_filtered() - np.asarray(input_torques, dtype=float)
+
+    def _update_disturbance_observer(self):
+        position, velocity, torque = self.read_state()
+        return self.disturbance_observer.update(position, velocity, torque, dt=self._observer_clock.tick())
@@ -0,0 +1,158 @@
+import numpy as np
+from typing import Optional, Sequence
+from motor.filteredmotorController import FilteredMotorController
+from motor.multiMotorController import FilteredMultiMotorController
+from motor.deviceManager import ODriveDeviceManager
+from utils.stateObserver import KalmanStateObserver
+from utils.tickCache import ObserverClock
+
+
+class ObservedMotorController(FilteredMotorController):
+    """
+    使用状态观测器的电机控制类。
+    滤波后的位置、速度读取接口以及外部力矩估计改为返回观测器的估计值，相位滞后远小于巴特沃斯滤波。
+    观测器每个控制周期（advance_tick）更新一次；调用方不推进周期时，每次设置力矩后的第一次读取触发更新。
+    """
+    def __init__(self, odrv_serial: Optional[str] = None, observer=None,
+                 inertia: float = 0.01, damping: float = 0.0, sampling_freq: float = 1000,
+                 use_measured_torque: bool = True,
+                 device_manager: Optional[ODriveDeviceManager] = None):
+        """
+        :param odrv_serial: 可选，指定 ODrive 的序列号。
+        :param observer: 可选，观测器实例，默认使用 KalmanStateObserver。
+        :param inertia: 默认观测器的转动惯量，需要按实际腿部标定。
+        :param damping: 默认观测器的粘滞阻尼系数。
+        :param sampling_freq: 控制循环的标称频率 (Hz)。
+        :param use_measured_torque: True 时用 Iq * Kt 作为电机力矩输入，否则使用指令力矩。
+        :param device_manager: 可选，设备管理器。
+        """
+        super().__init__(odrv_serial, sampling_freq=sampling_freq, device_manager=device_manager)
+        self.observer = observer if observer is not None else KalmanStateObserver(inertia, damping, sampling_freq)
+        self.use_measured_torque = use_measured_torque
+        self.commanded_torque = 0.0
+        self._clock = ObserverClock(sampling_freq)
+        self._observer_stale = True
+
+    def set_input_torque(self, torque_value: float) -> None:
+        super().set_input_torque(torque_value)
+        self.commanded_torque = torque_value
+        self._observer_stale = True
+
+    def update_observer(self):
+        """
+        采样硬件并更新一次观测器。
+        :return: 观测器
+        """
+        position, velocity, torque = self.read_state()
+        motor_torque = torque if self.use_measured_torque else self.commanded_torque
+        self.observer.update(position, velocity, motor_torque, self._clock.tick())
+        self._observer_stale = False
+        return self.observer
+
+    def _estimate(self):
+        if self.sensor_cache.enabled:
+            return self.sensor_cache.get("observer", self.update_observer)
+        if self._observer_stale:
+            self.update_observer()
+        return self.observer
+
+    def get_pos_estimate_filtered(self):
+        """
+        获取观测器估计的位置。
+        """
+        return self._estimate().position
+
+    def get_vel_estimate_filtered(self):
+        """
+        获取观测器估计的速度。
+        """
+        return self._estimate().velocity
+
+    def estimate_external_torque(self, input_torque):
+        """
+        获取观测器估计的外部力矩（作用在关节上的人体/环境力矩）。
+        :param input_torque: 输入力矩，观测器已使用实际电机力矩，此参数仅为保持接口一致。
+        :return: 外部力矩
+        """
+        return self._estimate().external_torque
+
+
+class ObservedMultiMotorController(FilteredMultiMotorController):
+    """
+    使用状态观测器的 N 轴电机控制类，每个轴一个观测器。
+    读取接口返回预分配的数组，调用方如需保留结果应自行拷贝。
+    """
+    def __init__(self, odrv_serials: Sequence[Optional[str]], names: Optional[Sequence[str]] = None,
+                 observers=None, inertia: float = 0.01, damping: float = 0.0,
+                 sampling_freq: float = 1000, use_measured_torque: bool = True,
+                 device_manager: Optional[ODriveDeviceManager] = None):
+        """
+        :param odrv_serials: 每个轴的 ODrive 序列号。
+        :param names: 可选，每个轴的名称。
+        :param observers: 可选，按轴排列的观测器实例列表。
+        :param inertia: 默认观测器的转动惯量，标量或按轴排列。
+        :param damping: 默认观测器的粘滞阻尼系数，标量或按轴排列。
+        :param sampling_freq: 控制循环的标称频率 (Hz)。
+        :param use_measured_torque: True 时用 Iq * Kt 作为电机力矩输入，否则使用指令力矩。
+        :param device_manager: 可选，设备管理器。
+        """
+        super().__init__(odrv_serials, names, sampling_freq=sampling_freq, device_manager=device_manager)
+        if observers is None:
+            inertia = np.broadcast_to(inertia, (self.num_axes,))
+            damping = np.broadcast_to(damping, (self.num_axes,))
+            observers = [KalmanStateObserver(float(inertia[i]), float(damping[i]), sampling_freq)
+                         for i in range(self.num_axes)]
+        self.observers = list(observers)
+        self.use_measured_torque = use_measured_torque
+        self.commanded_torque = np.zeros(self.num_axes)
+        self._clock = ObserverClock(sampling_freq)
+        self._observer_stale = True
+        self._position = np.zeros(self.num_axes)
+        self._velocity = np.zeros(self.num_axes)
+        self._external_torque = np.zeros(self.num_axes)
+
+    def set_input_torque(self, torques) -> None:
+        super().set_input_torque(torques)
+        self.commanded_torque[:] = torques
+        self._observer_stale = True
+
+    def update_observer(self) -> bool:
+        """
+        并行采样所有轴并更新观测器。
+        """
+        positions, velocities, torques = self.read_state()
+        motor_torques = torques if self.use_measured_torque else self.commanded_torque
+        dt = self._clock.tick()
+        for i, observer in enumerate(self.observers):
+            self._position[i], self._velocity[i], self._external_torque[i] = observer.update(
+                positions[i], velocities[i], motor_torques[i], dt)
+        self._observer_stale = False
+        return True
+
+    def _refresh(self):
+        if self.sensor_cache.enabled:
+            self.sensor_cache.get("observer", self.update_observer)
+        elif self._observer_stale:
+            self.update_observer()
+
+    def get_pos_estimate_filtered(self) -> np.ndarray:
+        """
+        获取观测器估计的位置数组。
+        """
+        self._refresh()
+        return self._position
+
+    def get_vel_estimate_filtered(self) -> np.ndarray:
+        """
+        获取观测器估计的速度数组。
+        """
+        self._refresh()
+        return self._velocity
+
+    def estimate_external_torque(self, input_torques) -> np.ndarray:
+        """
+        获取观测器估计的外部力矩数组。
+        :param input_torques: 输入力矩，观测器已使用实际电机力矩，此参数仅为保持接口一致。
+        """
+        self._refresh()
+        return self._external_torque
@@ -0,0 +1,133 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class SensorPipeline:
+    """
+    传感流水线。
+
+    顺序执行时一个控制周期 = 读取 + 计算 + 写入；流水线模式下，每个周期开始时取走上一周期已经发出的读取结果，
+    并立即发出下一次读取，读取在后台线程中与本周期的计算和力矩写入同时进行，周期缩短为 max(读取, 计算 + 写入)。
+    取到的数据比使用时刻早一个 I/O 延迟，可选用实测延迟把位置按速度外推到使用时刻（延迟补偿）。
+    """
+    def __init__(self, read_func, compensate=True, latency_smoothing=0.1):
+        """
+        :param read_func: 无参数的读取函数，返回 (位置, 速度, ...)，可以是标量或按轴排列的数组
+        :param compensate: 是否按实测延迟外推位置
+        :param latency_smoothing: 延迟统计的指数平滑系数
+        """
+        self.read_func = read_func
+        self.compensate = compensate
+        self.latency_smoothing = latency_smoothing
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sensor-pipeline")
+        self._future = None
+        self.read_latency = 0.0  # 读取耗时的平滑值 (秒)
+        self.sample_age = 0.0  # 数据被使用时距采样时刻的平滑值 (秒)
+        self.max_sample_age = 0.0
+        self.fetch_count = 0
+        self.wait_count = 0  # 取数据时读取尚未完成、需要等待的次数
+
+    def _timed_read(self):
+        start = time.perf_counter()
+        sample = self.read_func()
+        end = time.perf_counter()
+        # 采样时刻取读取过程的中点
+        return sample, 0.5 * (start + end), end - start
+
+    def prime(self) -> None:
+        """
+        发出第一次读取。
+        """
+        if self._future is None:
+            self._future = self._executor.submit(self._timed_read)
+
+    def fetch(self):
+        """
+        取走已发出的读取结果，并立即发出下一次读取。
+        :return: 读取函数的返回值，开启补偿时位置已外推到当前时刻
+        """
+        self.prime()
+        if not self._future.done():
+            self.wait_count += 1
+        sample, sample_time, latency = self._future.result()
+        self._future = self._executor.submit(self._timed_read)
+
+        age = time.perf_counter() - sample_time
+        alpha = self.latency_smoothing
+        self.read_latency += alpha * (latency - self.read_latency)
+        self.sample_age += alpha * (age - self.sample_age)
+        self.max_sample_age = max(self.max_sample_age, age)
+        self.fetch_count += 1
+
+        if self.compensate:
+            position, velocity = sample[0], sample[1]
+            return (position + velocity * age,) + tuple(sample[1:])
+        return sample
+
+    def close(self) -> None:
+        """
+        等待进行中的读取完成并停止后台线程。
+        """
+        if self._future is not None:
+            self._future.result()
+            self._future = None
+        self._executor.shutdown(wait=True)
+
+    def report(self) -> None:
+        print(f"传感流水线: 读取 {self.fetch_count} 次, 需要等待 {self.wait_count} 次, "
+              f"读取耗时 {self.read_latency * 1000:.3f} ms, 数据延迟 平均 {self.sample_age * 1000:.3f} ms, "
+              f"最大 {self.max_sample_age * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    import math
+    import numpy as np
+
+    READ_LATENCY = 0.0006  # 模拟 USB 读取耗时 (秒)
+    WRITE_LATENCY = 0.0003  # 模拟 USB 写入耗时 (秒)
+    COMPUTE_TIME = 0.0002  # 模拟控制计算耗时 (秒)，计算期间占用 GIL
+    FREQUENCY = 1.0  # 模拟关节运动频率 (Hz)
+    AMPLITUDE = 0.5
+    DURATION = 2.0
+
+    def true_state(t):
+        omega = 2 * math.pi * FREQUENCY
+        return AMPLITUDE * math.cos(omega * t), -AMPLITUDE * omega * math.sin(omega * t)
+
+    def simulated_read():
+        # 设备在读取过程的中点采样
+        time.sleep(READ_LATENCY / 2)
+        position, velocity = true_state(time.perf_counter())
+        time.sleep(READ_LATENCY / 2)
+        return position, velocity, 0.0
+
+    def simulated_compute():
+        end = time.perf_counter() + COMPUTE_TIME
+        while time.perf_counter() < end:
+            pass
+
+    def run_loop(read):
+        errors = []
+        ticks = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < DURATION:
+            position = read()[0]
+            errors.append(position - true_state(time.perf_counter())[0])
+            simulated_compute()
+            time.sleep(WRITE_LATENCY)  # 写入力矩
+            ticks += 1
+        rate = ticks / (time.perf_counter() - start)
+        return rate, float(np.sqrt(np.mean(np.square(errors))))
+
+    print(f"模拟 I/O: 读取 {READ_LATENCY * 1000:.1f} ms, 写入 {WRITE_LATENCY * 1000:.1f} ms, "
+          f"计算 {COMPUTE_TIME * 1000:.1f} ms")
+    rate, error = run_loop(simulated_read)
+    print(f"  顺序执行: 周期频率 {rate:.0f} Hz, 位置误差 RMS {error:.5f}")
+    for compensate in (False, True):
+        pipeline = SensorPipeline(simulated_read, compensate=compensate)
+        rate, error = run_loop(pipeline.fetch)
+        pipeline.close()
+        label = "流水线 + 延迟补偿" if compensate else "流水线"
+        print(f"  {label}: 周期频率 {rate:.0f} Hz, 位置误差 RMS {error:.5f}")
+        print("    ", end="")
+        pipeline.report()
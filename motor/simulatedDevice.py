@@ -0,0 +1,192 @@
+import math
+import time
+from types import SimpleNamespace
+from utils.lazyImport import LazyModule
+
+enums = LazyModule("odrive.enums")  # 导入 odrive.enums 会加载整个 odrive 包，推迟到第一次用到轴状态时
+
+
+class _SimulatedAxis:
+    """
+    模拟轴：按读写时刻对关节动力学（惯量 + 粘滞阻尼）做积分，状态切换立即生效，校准类状态经过 calibration_time 后回到 IDLE。
+    给出 LegModel 时改为按该模型（含库仑摩擦和重力，单位与编码器读数一致）积分。
+    可以设置机械限位，关节到达限位后停住。
+    开启看门狗（config.enable_watchdog）后，闭环状态下超过 config.watchdog_timeout 没有调用 watchdog_feed() 时报错并切到 IDLE。
+    """
+    def __init__(self, device, inertia, damping, torque_constant, calibration_time, leg_model=None):
+        self._device = device
+        self._inertia = inertia
+        self._damping = damping
+        self._leg_model = leg_model
+        self._calibration_time = calibration_time
+        self._calibration_end = None
+        self._state = enums.AXIS_STATE_IDLE
+        self._requested_state = enums.AXIS_STATE_IDLE
+        self._torque = 0.0
+        self._position = 0.0  # 圈
+        self._velocity = 0.0  # 圈/秒
+        self._last_time = time.perf_counter()
+        self._limits = None
+        self.error = 0
+        self.config = SimpleNamespace(can=SimpleNamespace(node_id=0, encoder_rate_ms=10, heartbeat_rate_ms=100, iq_rate_ms=0),
+                                      watchdog_timeout=0.0, enable_watchdog=False)
+        self._last_feed = self._last_time
+        self.encoder = _SimulatedEncoder(self)
+        self.motor = SimpleNamespace(
+            error=0,
+            current_control=_SimulatedCurrentControl(self),
+            config=SimpleNamespace(torque_constant=torque_constant, pole_pairs=7, calibration_current=10.0,
+                                   resistance_calib_max_voltage=2.0, current_lim=10.0, pre_calibrated=False),
+        )
+        self.controller = _SimulatedController(self)
+
+    def _advance(self):
+        now = time.perf_counter()
+        dt = now - self._last_time
+        self._last_time = now
+        if self._calibration_end is not None and now >= self._calibration_end:
+            self._calibration_end = None
+            self._state = enums.AXIS_STATE_IDLE
+        if (self.config.enable_watchdog and self._state == enums.AXIS_STATE_CLOSED_LOOP_CONTROL
+                and now - self._last_feed > self.config.watchdog_timeout):
+            self.error |= enums.AXIS_ERROR_WATCHDOG_TIMER_EXPIRED
+            self._state = enums.AXIS_STATE_IDLE
+        torque = self._torque if self._state == enums.AXIS_STATE_CLOSED_LOOP_CONTROL else 0.0
+        model = self._leg_model
+        if model is not None:
+            passive = model.friction_torque(self._velocity) + model.gravity_torque(self._position)
+            self._velocity += (torque - passive) / model.inertia * dt
+        else:
+            omega = 2 * math.pi * self._velocity
+            omega += (torque - self._damping * omega) / self._inertia * dt
+            self._velocity = omega / (2 * math.pi)
+        self._position += self._velocity * dt
+        if self._limits is not None:
+            lower, upper = self._limits
+            if self._position <= lower or self._position >= upper:
+                self._position = min(max(self._position, lower), upper)
+                self._velocity = 0.0
+        self._device.io()
+
+    def watchdog_feed(self):
+        self._advance()
+        self._last_feed = time.perf_counter()
+
+    def set_position_limits(self, lower, upper):
+        """
+        设置机械限位 (圈)，None 表示没有限位。
+        """
+        self._limits = None if lower is None else (lower, upper)
+
+    @property
+    def requested_state(self):
+        return self._requested_state
+
+    @requested_state.setter
+    def requested_state(self, state):
+        self._advance()
+        self._requested_state = state
+        self._state = state
+        if state in (enums.AXIS_STATE_MOTOR_CALIBRATION, enums.AXIS_STATE_ENCODER_OFFSET_CALIBRATION):
+            self._calibration_end = time.perf_counter() + self._calibration_time
+
+    @property
+    def current_state(self):
+        self._advance()
+        return self._state
+
+
+class _SimulatedEncoder:
+    def __init__(self, axis):
+        self._axis = axis
+        self.error = 0
+        self.index_offset = 0.0
+        self.config = SimpleNamespace(pre_calibrated=False)
+
+    @property
+    def pos_estimate(self):
+        self._axis._advance()
+        return self._axis._position
+
+    @property
+    def vel_estimate(self):
+        self._axis._advance()
+        return self._axis._velocity
+
+
+class _SimulatedCurrentControl:
+    def __init__(self, axis):
+        self._axis = axis
+
+    @property
+    def Iq_measured(self):
+        axis = self._axis
+        axis._advance()
+        torque = axis._torque if axis._state == enums.AXIS_STATE_CLOSED_LOOP_CONTROL else 0.0
+        return torque / axis.motor.config.torque_constant
+
+
+class _SimulatedController:
+    def __init__(self, axis):
+        self._axis = axis
+        self.config = SimpleNamespace(control_mode=enums.CONTROL_MODE_TORQUE_CONTROL, enable_vel_limit=True,
+                                      enable_torque_mode_vel_limit=True)
+
+    @property
+    def input_torque(self):
+        return self._axis._torque
+
+    @input_torque.setter
+    def input_torque(self, torque):
+        self._axis._advance()
+        self._axis._torque = torque
+
+
+class SimulatedODrive:
+    """
+    模拟的 ODrive 设备，提供 MotorController 使用的属性路径，用于无硬件时的测试和负载测试。
+    每次属性访问可以模拟 USB 往返延迟（time.sleep，等待期间释放 GIL，与真实 USB 读写一致）。
+    """
+    def __init__(self, serial_number=None, io_latency=0.0, inertia=0.01, damping=0.01,
+                 torque_constant=0.042, calibration_time=0.05, leg_model=None):
+        """
+        :param serial_number: 序列号
+        :param io_latency: 每次属性访问的模拟延迟 (秒)
+        :param inertia: 关节转动惯量
+        :param damping: 粘滞阻尼系数
+        :param torque_constant: 力矩常数 (Nm/A)
+        :param calibration_time: 校准类状态的持续时间 (秒)
+        :param leg_model: 可选，LegModel（例如 load_leg_models 读取的辨识结果），给出时忽略 inertia 和 damping
+        """
+        self.serial_number = serial_number
+        self.io_latency = io_latency
+        self.io_count = 0
+        self.axis0 = _SimulatedAxis(self, inertia, damping, torque_constant, calibration_time, leg_model)
+        self.config = SimpleNamespace(dc_bus_overvoltage_trip_level=56.0, dc_bus_undervoltage_trip_level=8.0,
+                                      dc_max_positive_current=10.0, dc_max_negative_current=-1.0,
+                                      enable_brake_resistor=False, enable_dc_bus_overvoltage_ramp=False,
+                                      dc_bus_overvoltage_ramp_start=50.0, dc_bus_overvoltage_ramp_end=52.0,
+                                      brake_resistance=2.0, max_regen_current=0.0)
+        self.can = SimpleNamespace(config=SimpleNamespace(baud_rate=500000, r120_gpio_num=5, enable_r120=False))
+
+    def io(self):
+        self.io_count += 1
+        if self.io_latency:
+            time.sleep(self.io_latency)
+
+    def clear_errors(self):
+        self.axis0.error = 0
+
+    def save_configuration(self):
+        pass
+
+
+def simulated_finder(io_latency=0.0, leg_models=None, **device_options):
+    """
+    生成可用于 ODriveDeviceManager(finder=...) 的模拟设备搜索函数，每个序列号对应一个模拟设备。
+    :param leg_models: 可选，{序列号: LegModel}，对应的模拟设备按该模型积分
+    """
+    def find_any(serial_number=None, timeout=None):
+        leg_model = leg_models.get(serial_number) if leg_models else None
+        return SimulatedODrive(serial_number, io_latency, leg_model=leg_model, **device_options)
+    return find_any
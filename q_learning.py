@@ -1,9 +1,10 @@
 import time
 import numpy as np
 from collections import defaultdict
-from motor.motorController import FilteredMotorController
-from utils.realTimePlotterBase import RealTimePlotter
-from trajectory_handler.sineGenerator import TrajectoryGenerator
+from motor.filteredmotorController import FilteredMotorController
+from utils.realTimePlotter import RealTimePlotterMul3
+from trajectory_handler.sineGenerator import SineTrajectoryHandler
+from utils.lazyImport import wait_for_preloads
 
 
 class QLearningControllerWithTrajectory:
@@ -21,7 +22,7 @@ class QLearningControllerWithTrajectory:
         self.epsilon = epsilon  # 探索概率
         self.q_table = defaultdict(lambda: np.zeros(num_actions))  # Q表
         self.actions = np.linspace(-2.0, 2.0, num_actions)  # 动作（连续力矩离散化）
-        self.plotter = RealTimePlotter()
+        self.plotter = RealTimePlotterMul3()
 
     def discretize_state(self, position_error, velocity_error):
         """
@@ -61,11 +62,19 @@ class QLearningControllerWithTrajectory:
         """
         执行Q学习控制
         """
+        wait_for_preloads()
         start_time = time.time()
         print("开始结合预期轨迹的Q学习控制...")
 
+        # 上一周期的状态和动作，本周期的观测即为上一动作的结果
+        previous_state = None
+        previous_action = None
+
         while time.time() - start_time < self.duration:
             t = time.time() - start_time
+
+            # 新的控制周期：每个周期只采样一次硬件，滤波器只前进一次
+            self.motor.advance_tick()
             current_position = self.motor.get_pos_estimate_filtered()
             current_velocity = self.motor.get_vel_estimate_filtered()
 
@@ -80,26 +89,19 @@ class QLearningControllerWithTrajectory:
             # 离散化状态
             state = self.discretize_state(position_error, velocity_error)
 
+            # 用本周期的观测更新上一周期的 Q 值
+            if previous_state is not None:
+                reward = self.compute_reward(position_error, velocity_error)
+                self.update_q_table(previous_state, previous_action, reward, state)
+
             # 选择动作
             action_index = self.choose_action(state)
             torque = self.actions[action_index]
 
             # 执行动作
             self.motor.set_input_torque(torque)
-
-            # 获取下一个状态
-            next_position = self.motor.get_pos_estimate_filtered()
-            next_velocity = self.motor.get_vel_estimate_filtered()
-            next_position_error = desired_position - next_position
-            next_velocity_error = desired_velocity - next_velocity
-            next_state = self.discretize_state(next_position_error, next_velocity_error)
-
-            # 计算奖励
-            reward = self.compute_reward(next_position_error, next_velocity_error)
-
-            # 更新Q表
-            self.update_q_table(state, action_index, reward, next_state)
-
+            previous_state = state
+            previous_action = action_index
 
             # 控制循环频率
             time.sleep(0.001)
@@ -114,7 +116,7 @@ if __name__ == "__main__":
     motor.set_torque_control_mode()
 
     # 创建预期轨迹生成器
-    trajectory = TrajectoryGenerator(amplitude=0.5, frequency=0.5)
+    trajectory = SineTrajectoryHandler(amplitude=0.5, frequency=0.5)
 
     controller = QLearningControllerWithTrajectory(motor, trajectory, duration=10)
     controller.run()
\ No newline at end of file
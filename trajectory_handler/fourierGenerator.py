@@ -0,0 +1,239 @@
+import math
+from collections import deque
+import numpy as np
+
+
+class FourierTrajectoryHandler:
+    """
+    多谐波傅里叶轨迹生成器与估计器。
+
+    轨迹模型为 θ(t) = c0 + Σ a_k·cos(kωt) + b_k·sin(kωt)，k = 1..harmonics。
+    给定频率后模型对系数是线性的：每个新数据点用递推最小二乘 (RLS) 增量更新，滑动窗口移出的旧数据点同时做一次反向更新，
+    fit_and_update 发布当前解，并定期用闭式最小二乘重新求解，消除递推的累积误差。
+    接口与 SineTrajectoryHandler 相同，可以直接替换。
+    """
+
+    def __init__(self, frequency=1.0, harmonics=3, amplitude=1.0, phase=0.0, coefficients=None,
+                 window_size=2000, regularization=1e-3, refit_interval=100):
+        """
+        :param frequency: 基波频率估计 (Hz)
+        :param harmonics: 谐波阶数
+        :param amplitude: 初始基波振幅（未给出 coefficients 时使用）
+        :param phase: 初始基波相位（未给出 coefficients 时使用），初始轨迹为 amplitude·cos(ωt + phase)
+        :param coefficients: 可选，初始系数 [c0, a1, b1, a2, b2, ...]
+        :param window_size: 用于拟合的滑动窗口大小
+        :param regularization: 正则化系数，窗口数据不足一个周期时把解拉向初始系数
+        :param refit_interval: 每调用多少次 fit_and_update 用闭式最小二乘重新求解一次
+        """
+        self.harmonics = harmonics
+        self.window_size = window_size
+        self.regularization = regularization
+        self.refit_interval = refit_interval
+        self._omega = 2 * math.pi * frequency
+        self._k = np.arange(1, harmonics + 1)
+
+        if coefficients is None:
+            coefficients = np.zeros(2 * harmonics + 1)
+            coefficients[1] = amplitude * math.cos(phase)
+            coefficients[2] = -amplitude * math.sin(phase)
+        self.coefficients = np.array(coefficients, dtype=float)
+        if self.coefficients.shape != (2 * harmonics + 1,):
+            raise ValueError(f"系数数量应为 {2 * harmonics + 1}，实际为 {self.coefficients.size}。")
+
+        # 滑动窗口存储时间和位移数据
+        self.time_window = deque(maxlen=window_size)
+        self.position_data = deque(maxlen=window_size)
+        self._regressors = deque(maxlen=window_size)
+        self._reset_estimator()
+        self.fit_count = 0
+
+    # 回归向量与模型参数
+    def _regressor(self, t):
+        phase = self._k * (self._omega * t)
+        x = np.empty(2 * self.harmonics + 1)
+        x[0] = 1.0
+        x[1::2] = np.cos(phase)
+        x[2::2] = np.sin(phase)
+        return x
+
+    def _reset_estimator(self):
+        """
+        以当前系数为先验，用窗口内的全部数据闭式求解，重新初始化 RLS 状态。
+        """
+        n = 2 * self.harmonics + 1
+        self._prior = self.coefficients.copy()
+        information = self.regularization * np.eye(n)
+        target = self.regularization * self._prior
+        if self._regressors:
+            X = np.array(self._regressors)
+            y = np.array(self.position_data)
+            information += X.T @ X
+            target += X.T @ y
+        self._P = np.linalg.inv(information)
+        self._w = self._P @ target
+
+    @property
+    def frequency(self):
+        return self._omega / (2 * math.pi)
+
+    @frequency.setter
+    def frequency(self, frequency):
+        """
+        修改频率估计后，窗口内数据的回归向量全部重新计算，并重新求解。
+        """
+        self._omega = 2 * math.pi * frequency
+        self._regressors = deque((self._regressor(t) for t in self.time_window), maxlen=self.window_size)
+        self._reset_estimator()
+
+    @property
+    def amplitude(self):
+        """
+        基波振幅。
+        """
+        return math.hypot(self.coefficients[1], self.coefficients[2])
+
+    @amplitude.setter
+    def amplitude(self, amplitude):
+        """
+        按比例缩放所有谐波，保持波形和相位，直流分量不变。
+        """
+        current = self.amplitude
+        if current > 1e-9:
+            self.coefficients[1:] *= amplitude / current
+        else:
+            self.coefficients[1] = amplitude
+        self._reset_estimator()
+
+    @property
+    def phase(self):
+        """
+        基波相位，基波为 amplitude·cos(ωt + phase)。
+        """
+        return math.atan2(-self.coefficients[2], self.coefficients[1])
+
+    # 轨迹生成相关方法
+    def get_position(self, t):
+        """
+        获取给定时间 t 的位移。
+        """
+        return float(self._regressor(t) @ self.coefficients)
+
+    def get_velocity(self, t):
+        """
+        获取给定时间 t 的速度。
+        """
+        w = self._k * self._omega
+        phase = w * t
+        a, b = self.coefficients[1::2], self.coefficients[2::2]
+        return float(np.sum(w * (b * np.cos(phase) - a * np.sin(phase))))
+
+    def get_acceleration(self, t):
+        """
+        获取给定时间 t 的加速度。
+        """
+        w = self._k * self._omega
+        phase = w * t
+        a, b = self.coefficients[1::2], self.coefficients[2::2]
+        return float(-np.sum(w ** 2 * (a * np.cos(phase) + b * np.sin(phase))))
+
+    # 轨迹估计相关方法
+    def update_data(self, time, position):
+        """
+        更新滑动窗口中的时间和位移数据，并增量更新最小二乘解。
+
+        :param time: 时间数据
+        :param position: 位移数据
+        """
+        if len(self.time_window) == self.window_size:
+            # 窗口已满：先移除最旧的数据点
+            x_old = self._regressors[0]
+            y_old = self.position_data[0]
+            Px = self._P @ x_old
+            gain = Px / (1.0 - x_old @ Px)
+            self._w -= gain * (y_old - x_old @ self._w)
+            self._P += np.outer(gain, Px)
+
+        x = self._regressor(time)
+        Px = self._P @ x
+        gain = Px / (1.0 + x @ Px)
+        self._w += gain * (position - x @ self._w)
+        self._P -= np.outer(gain, Px)
+
+        self.time_window.append(time)
+        self.position_data.append(position)
+        self._regressors.append(x)
+
+    def fit_and_update(self):
+        """
+        发布当前的最小二乘解作为轨迹参数，每 refit_interval 次用闭式解重新求解一次。
+
+        :return: 系数 [c0, a1, b1, a2, b2, ...]
+        """
+        if len(self.time_window) < 2 * self.harmonics + 1:
+            raise ValueError(f"数据不足，无法进行傅里叶拟合。至少需要 {2 * self.harmonics + 1} 个数据点。")
+        self.fit_count += 1
+        if self.fit_count % self.refit_interval == 0:
+            prior = self._prior
+            n = 2 * self.harmonics + 1
+            X = np.array(self._regressors)
+            y = np.array(self.position_data)
+            self._P = np.linalg.inv(X.T @ X + self.regularization * np.eye(n))
+            self._w = self._P @ (X.T @ y + self.regularization * prior)
+        self.coefficients = self._w.copy()
+        return self.coefficients
+
+    def to_dict(self):
+        return {"type": "fourier", "frequency": float(self.frequency), "coefficients": self.coefficients.tolist()}
+
+    def load_dict(self, data):
+        """
+        恢复 to_dict() 保存的轨迹参数，谐波阶数不同时只恢复共同的部分。
+        """
+        coefficients = np.asarray(data["coefficients"], dtype=float)
+        n = min(coefficients.size, self.coefficients.size)
+        self.coefficients[:] = 0.0
+        self.coefficients[:n] = coefficients[:n]
+        self.frequency = data["frequency"]  # 同时以新系数为先验重新求解
+
+
+if __name__ == "__main__":
+    import time
+    from trajectory_handler.sineGenerator import SineTrajectoryHandler
+
+    # 模拟髋关节轨迹：基波 + 二、三次谐波 + 测量噪声，1 kHz 采样
+    frequency = 0.8
+    dt = 0.001
+    rng = np.random.default_rng(0)
+
+    def hip(t):
+        w = 2 * math.pi * frequency
+        return 0.05 + 0.4 * math.cos(w * t + 0.3) + 0.12 * math.cos(2 * w * t - 0.8) + 0.04 * math.sin(3 * w * t)
+
+    fourier = FourierTrajectoryHandler(frequency=frequency, harmonics=3, amplitude=0.3, window_size=2500)
+    sine = SineTrajectoryHandler(amplitude=0.3, frequency=frequency)
+    update_times, fit_times, sine_fit_times = [], [], []
+    for n in range(int(6 / dt)):
+        t = n * dt
+        measured = hip(t) + rng.normal(0, 0.01)
+        start = time.perf_counter()
+        fourier.update_data(t, measured)
+        update_times.append(time.perf_counter() - start)
+        sine.update_data(t, measured)
+        if n % 10 == 0 and len(sine.time_window) == sine.window_size:
+            start = time.perf_counter()
+            fourier.fit_and_update()
+            fit_times.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            sine.fit_and_update()
+            sine_fit_times.append(time.perf_counter() - start)
+
+    # 用拟合结果预测下一个周期
+    t_future = np.arange(6.0, 6.0 + 1 / frequency, dt)
+    truth = np.array([hip(t) for t in t_future])
+    for name, handler in (("正弦 (curve_fit)", sine), ("傅里叶 K=3 (RLS)", fourier)):
+        predicted = np.array([handler.get_position(t) for t in t_future])
+        print(f"{name}: 下一周期预测 RMS 误差 {np.sqrt(np.mean((predicted - truth) ** 2)):.4f}")
+    print(f"傅里叶 update_data 平均 {np.mean(update_times) * 1e6:.1f} us, fit_and_update 平均 "
+          f"{np.mean(fit_times) * 1e6:.1f} us；正弦 fit_and_update 平均 {np.mean(sine_fit_times) * 1e6:.1f} us")
+    v_numeric = (fourier.get_position(6.0 + 1e-6) - fourier.get_position(6.0 - 1e-6)) / 2e-6
+    print(f"解析速度 {fourier.get_velocity(6.0):.5f}，数值微分 {v_numeric:.5f}")
@@ -0,0 +1,376 @@
+import math
+import numpy as np
+
+
+def wrap_phase(phase):
+    """
+    将相位折算到 [-π, π)。
+    """
+    return (phase + math.pi) % (2 * math.pi) - math.pi
+
+
+class AdaptiveOscillator:
+    """
+    自适应振荡器：在线估计单条腿关节轨迹的相位、频率和波形。
+
+    波形用 harmonics 阶傅里叶级数表示 θ̂(φ) = a0 + Σ a_k·cos(kφ) + b_k·sin(kφ)，
+    每个采样按预测误差 e = θ - θ̂ 对相位、频率和系数做一次梯度更新，计算量与历史长度无关。
+    步态相位定义为基波的相位（φ 减去基波相位角），0 对应基波峰值，不同腿之间可以直接比较。
+    """
+    def __init__(self, frequency=1.0, amplitude=1.0, phase=0.0, harmonics=3,
+                 phase_gain=20.0, frequency_gain=10.0, shape_gain=2.0,
+                 frequency_range=(0.1, 3.0)):
+        """
+        :param frequency: 初始频率 (Hz)
+        :param amplitude: 初始振幅
+        :param phase: 初始相位，初始波形为 amplitude·cos(φ + phase)
+        :param harmonics: 傅里叶级数阶数
+        :param phase_gain: 相位修正增益
+        :param frequency_gain: 频率修正增益
+        :param shape_gain: 波形系数学习率
+        :param frequency_range: 频率范围 (Hz)
+        """
+        self.harmonics = harmonics
+        self.phase_gain = phase_gain
+        self.frequency_gain = frequency_gain
+        self.shape_gain = shape_gain
+        self.omega_range = (2 * math.pi * frequency_range[0], 2 * math.pi * frequency_range[1])
+
+        # 阶数很小，逐项用 math 计算比小数组上的 numpy 运算快得多
+        self.k = range(1, harmonics + 1)
+        self.phi = 0.0
+        self.omega = 2 * math.pi * frequency
+        self.a0 = 0.0
+        self.a = [0.0] * harmonics
+        self.b = [0.0] * harmonics
+        self._c = [0.0] * harmonics
+        self._s = [0.0] * harmonics
+        self.a[0] = amplitude * math.cos(phase)
+        self.b[0] = -amplitude * math.sin(phase)
+        self.error = 0.0
+        self.reference_amplitude = None  # 给出时 shape() 输出的波形按该基波振幅缩放，见 hold_amplitude
+
+    @property
+    def frequency(self):
+        return self.omega / (2 * math.pi)
+
+    @frequency.setter
+    def frequency(self, frequency):
+        self.omega = 2 * math.pi * frequency
+
+    @property
+    def amplitude(self):
+        """
+        基波振幅。
+        """
+        return math.hypot(self.a[0], self.b[0])
+
+    @amplitude.setter
+    def amplitude(self, amplitude):
+        """
+        按比例缩放整个波形，保持形状和相位。
+        """
+        current = self.amplitude
+        if current > 1e-9:
+            scale = amplitude / current
+            self.a = [value * scale for value in self.a]
+            self.b = [value * scale for value in self.b]
+        else:
+            self.a[0] = amplitude
+
+    def hold_amplitude(self, amplitude):
+        """
+        固定参考波形的基波振幅：振荡器继续从测量中学习相位、频率和波形，
+        shape() 输出的波形（不含直流分量）按 amplitude / 学到的振幅 缩放，学习不会把设定的振幅改回去。
+        :param amplitude: 基波振幅，None 表示恢复为学到的振幅
+        """
+        self.reference_amplitude = amplitude
+
+    def _reference_scale(self):
+        if self.reference_amplitude is None:
+            return 1.0
+        current = self.amplitude
+        return self.reference_amplitude / current if current > 1e-9 else 0.0
+
+    @property
+    def gait_phase(self):
+        """
+        当前步态相位（基波相位），范围 [-π, π)。
+        """
+        return wrap_phase(self.phi - math.atan2(self.b[0], self.a[0]))
+
+    def _evaluate(self, phi):
+        """
+        :return: (θ̂, dθ̂/dφ, d²θ̂/dφ²)，各阶的 cos、sin 写入 self._c、self._s
+        """
+        value = self.a0
+        derivative = 0.0
+        second = 0.0
+        c, s = self._c, self._s
+        for i, k in enumerate(self.k):
+            c[i] = ck = math.cos(k * phi)
+            s[i] = sk = math.sin(k * phi)
+            a, b = self.a[i], self.b[i]
+            harmonic = a * ck + b * sk
+            value += harmonic
+            derivative += k * (b * ck - a * sk)
+            second -= k * k * harmonic
+        return value, derivative, second
+
+    def update(self, theta, dt):
+        """
+        输入一个新的测量值，更新相位、频率和波形。
+        :param theta: 关节位置测量值
+        :param dt: 距上一次更新的时间 (秒)
+        :return: 更新前的预测误差
+        """
+        value, derivative, _ = self._evaluate(self.phi)
+        error = theta - value
+        # 按基波振幅归一化，增益与关节运动幅度无关
+        gradient = error * derivative / (self.a[0] ** 2 + self.b[0] ** 2 + 1e-6)
+
+        self.phi = (self.phi + dt * (self.omega + self.phase_gain * gradient)) % (2 * math.pi)
+        self.omega = min(max(self.omega + dt * self.frequency_gain * gradient, self.omega_range[0]),
+                         self.omega_range[1])
+        step = dt * self.shape_gain * error
+        self.a0 += step
+        for i in range(self.harmonics):
+            self.a[i] += step * self._c[i]
+            self.b[i] += step * self._s[i]
+        self.error = error
+        return error
+
+    def to_dict(self):
+        return {"omega": self.omega, "a0": self.a0, "a": list(self.a), "b": list(self.b)}
+
+    def load_dict(self, data):
+        """
+        恢复 to_dict() 保存的频率和波形，相位由新的测量重新锁定。阶数不同时只恢复共同的部分。
+        """
+        self.omega = min(max(data["omega"], self.omega_range[0]), self.omega_range[1])
+        self.a0 = data["a0"]
+        for i in range(min(self.harmonics, len(data["a"]))):
+            self.a[i] = data["a"][i]
+            self.b[i] = data["b"][i]
+
+    def shape(self, gait_phase):
+        """
+        按步态相位计算波形。
+        :param gait_phase: 步态相位
+        :return: (位置, 对相位的一阶导数, 二阶导数)
+        """
+        value, derivative, second = self._evaluate(gait_phase + math.atan2(self.b[0], self.a[0]))
+        scale = self._reference_scale()
+        if scale != 1.0:
+            value = self.a0 + scale * (value - self.a0)
+            derivative *= scale
+            second *= scale
+        return value, derivative, second
+
+    def shape_array(self, gait_phases):
+        """
+        按一组步态相位一次计算波形，用于预先计算整个周期，不在控制循环中使用。
+        :param gait_phases: 步态相位数组
+        :return: (位置, 一阶导数, 二阶导数) 三个数组
+        """
+        phi = np.asarray(gait_phases, dtype=float) + math.atan2(self.b[0], self.a[0])
+        value = np.full(phi.shape, self.a0)
+        derivative = np.zeros(phi.shape)
+        second = np.zeros(phi.shape)
+        for i, k in enumerate(self.k):
+            ck = np.cos(k * phi)
+            sk = np.sin(k * phi)
+            harmonic = self.a[i] * ck + self.b[i] * sk
+            value += harmonic
+            derivative += k * (self.b[i] * ck - self.a[i] * sk)
+            second -= k * k * harmonic
+        scale = self._reference_scale()
+        if scale != 1.0:
+            value = self.a0 + scale * (value - self.a0)
+            derivative *= scale
+            second *= scale
+        return value, derivative, second
+
+
+class CoupledGaitTrajectory:
+    """
+    左右腿耦合的步态轨迹。
+
+    每条腿由一个 AdaptiveOscillator 跟踪自身的步态相位和波形，两腿的相位差（正常行走约 180°）在线估计；
+    参考轨迹由共享相位一次生成：左腿相位为共享相位，右腿相位为共享相位加实测相位差，
+    每条腿的参考是本侧波形与对侧波形在同一步态相位下的加权平均（对称性假设）。
+    """
+    def __init__(self, left, right, symmetry=0.5, offset=math.pi, offset_time_constant=1.0):
+        """
+        :param left: 左腿 AdaptiveOscillator
+        :param right: 右腿 AdaptiveOscillator
+        :param symmetry: 对侧波形的权重，0 表示只使用本侧波形，0.5 表示两侧平均
+        :param offset: 初始相位差 (弧度)
+        :param offset_time_constant: 相位差估计的时间常数 (秒)
+        """
+        self.left = left
+        self.right = right
+        self.oscillators = (left, right)
+        self.symmetry = symmetry
+        self.offset_time_constant = offset_time_constant
+        self._offset_vector = complex(math.cos(offset), math.sin(offset))  # 相位差的单位圆滑动平均
+        self.offset = offset
+        self._last_time = None
+
+    @classmethod
+    def from_handlers(cls, handler_left, handler_right, harmonics=3, **options):
+        """
+        以两个正弦轨迹生成器的参数作为初始波形，右腿初始相位滞后半个周期。
+        """
+        left = AdaptiveOscillator(handler_left.frequency, handler_left.amplitude, handler_left.phase, harmonics)
+        right = AdaptiveOscillator(handler_right.frequency, handler_right.amplitude, handler_right.phase, harmonics)
+        trajectory = cls(left, right, **options)
+        right.phi = (left.phi + trajectory.offset) % (2 * math.pi)
+        return trajectory
+
+    @property
+    def frequency(self):
+        """
+        共享步态频率 (Hz)。
+        """
+        return (self.left.omega + self.right.omega) / (4 * math.pi)
+
+    @frequency.setter
+    def frequency(self, frequency):
+        for oscillator in self.oscillators:
+            oscillator.frequency = frequency
+
+    @property
+    def amplitude(self):
+        return (self.left.amplitude + self.right.amplitude) / 2
+
+    @amplitude.setter
+    def amplitude(self, amplitude):
+        for oscillator in self.oscillators:
+            oscillator.amplitude = amplitude
+
+    def hold_amplitude(self, amplitude):
+        """
+        固定左右腿参考轨迹的振幅，见 AdaptiveOscillator.hold_amplitude。
+        :param amplitude: 基波振幅，None 表示恢复为学到的振幅
+        """
+        for oscillator in self.oscillators:
+            oscillator.hold_amplitude(amplitude)
+
+    def update(self, t, positions):
+        """
+        输入左右腿的位置测量值，更新振荡器和相位差。
+        :param t: 时间
+        :param positions: (左腿位置, 右腿位置)
+        """
+        dt = 0.0 if self._last_time is None else t - self._last_time
+        self._last_time = t
+        if dt <= 0:
+            return
+        self.left.update(float(positions[0]), dt)
+        self.right.update(float(positions[1]), dt)
+
+        difference = self.right.gait_phase - self.left.gait_phase
+        weight = min(dt / self.offset_time_constant, 1.0)
+        self._offset_vector += weight * (complex(math.cos(difference), math.sin(difference)) - self._offset_vector)
+        self.offset = math.atan2(self._offset_vector.imag, self._offset_vector.real)
+
+    def references(self, t, position_out=None, velocity_out=None, acceleration_out=None):
+        """
+        一次计算左右腿的参考位置、速度和加速度（频率视为常数）。
+        :param t: 时间，晚于最近一次 update 时按共享频率外推相位
+        :param position_out: 可选，长度为 2 的数组，结果原地写入
+        :param velocity_out: 可选，长度为 2 的数组，结果原地写入
+        :param acceleration_out: 可选，长度为 2 的数组，给出时才计算加速度
+        :return: (位置数组, 速度数组)
+        """
+        position = position_out if position_out is not None else np.zeros(2)
+        velocity = velocity_out if velocity_out is not None else np.zeros(2)
+        omega = (self.left.omega + self.right.omega) / 2
+        elapsed = 0.0 if self._last_time is None else t - self._last_time
+        shared_phase = self.left.gait_phase + omega * elapsed
+
+        w = self.symmetry
+        for i, phase in enumerate((shared_phase, shared_phase + self.offset)):
+            own, own_derivative, own_second = self.oscillators[i].shape(phase)
+            other, other_derivative, other_second = self.oscillators[1 - i].shape(phase)
+            position[i] = (1 - w) * own + w * other
+            velocity[i] = ((1 - w) * own_derivative + w * other_derivative) * omega
+            if acceleration_out is not None:
+                acceleration_out[i] = ((1 - w) * own_second + w * other_second) * omega * omega
+        return position, velocity
+
+    def period_profile(self, samples=200):
+        """
+        从当前相位开始，预先计算未来一个步态周期内左右腿的参考轨迹。
+        :param samples: 一个周期内的采样点数
+        :return: (距当前的时间 (samples,), 位置, 速度, 加速度 (samples, 2))
+        """
+        omega = (self.left.omega + self.right.omega) / 2
+        phase_steps = np.linspace(0.0, 2 * math.pi, samples, endpoint=False)
+        shared_phase = self.left.gait_phase + phase_steps
+        position = np.empty((samples, 2))
+        velocity = np.empty((samples, 2))
+        acceleration = np.empty((samples, 2))
+        w = self.symmetry
+        for i, phase in enumerate((shared_phase, shared_phase + self.offset)):
+            own = self.oscillators[i].shape_array(phase)
+            other = self.oscillators[1 - i].shape_array(phase)
+            position[:, i] = (1 - w) * own[0] + w * other[0]
+            velocity[:, i] = ((1 - w) * own[1] + w * other[1]) * omega
+            acceleration[:, i] = ((1 - w) * own[2] + w * other[2]) * omega * omega
+        return phase_steps / omega, position, velocity, acceleration
+
+    def to_dict(self):
+        return {"type": "coupled_gait", "left": self.left.to_dict(), "right": self.right.to_dict(),
+                "offset": self.offset, "symmetry": self.symmetry}
+
+    def load_dict(self, data):
+        """
+        恢复 to_dict() 保存的两腿波形、频率和相位差。
+        """
+        self.left.load_dict(data["left"])
+        self.right.load_dict(data["right"])
+        self.offset = data["offset"]
+        self._offset_vector = complex(math.cos(self.offset), math.sin(self.offset))
+        self.right.phi = (self.left.phi + self.offset) % (2 * math.pi)
+
+    def report(self):
+        print(f"步态频率: {self.frequency:.3f} Hz, 左右腿相位差: {math.degrees(self.offset) % 360:.1f}°, "
+              f"振幅: 左 {self.left.amplitude:.3f} / 右 {self.right.amplitude:.3f}")
+
+
+if __name__ == "__main__":
+    import time
+    from trajectory_handler.sineGenerator import SineTrajectoryHandler
+
+    # 模拟步态：1.2 Hz，带二次谐波，右腿相位差 200°（非理想反相），中途频率变为 0.9 Hz
+    dt = 0.001
+    handler = SineTrajectoryHandler(amplitude=0.4, frequency=1.0)
+    gait = CoupledGaitTrajectory.from_handlers(handler, handler)
+    true_offset = math.radians(200)
+
+    def joint(phase):
+        return 0.5 * math.cos(phase) + 0.1 * math.cos(2 * phase + 0.5) + 0.05
+
+    phase = 0.0
+    errors = []
+    update_times = []
+    for n in range(int(20 / dt)):
+        t = n * dt
+        frequency = 1.2 if t < 10 else 0.9
+        phase += 2 * math.pi * frequency * dt
+        measured = (joint(phase), joint(phase + true_offset))
+        start = time.perf_counter()
+        gait.update(t, measured)
+        position, velocity = gait.references(t)
+        update_times.append(time.perf_counter() - start)
+        if n % int(2.5 / dt) == 0 and n > 0:
+            print(f"t = {t:5.1f} s  真实频率 {frequency:.2f} Hz  ", end="")
+            gait.report()
+        if 8 < t < 10 or 18 < t < 20:
+            errors.append(abs(gait.left.error) + abs(gait.right.error))
+
+    update_times = np.array(update_times) * 1e6
+    print(f"收敛后平均预测误差: {np.mean(errors) / 2:.4f}（关节振幅 0.5）")
+    print(f"每周期 update + references 耗时: 平均 {update_times.mean():.1f} us, P99 {np.percentile(update_times, 99):.1f} us")
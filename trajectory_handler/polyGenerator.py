@@ -1,5 +1,6 @@
 import numpy as np
 from collections import deque
+from utils.eventLog import get_event_log, TRAJECTORY_FIT_FAILED
 
 
 
@@ -69,7 +70,7 @@ class PolynomialTrajectoryHandler:
             fitted_coefficients = np.polyfit(time_data, position_data, self.degree)
             self.coefficients = fitted_coefficients
         except Exception as e:
-            print(f"多项式拟合失败: {e}")
+            get_event_log().warning(TRAJECTORY_FIT_FAILED, f"多项式拟合失败: {e}", "polynomial")
 
 
 
@@ -1,7 +1,10 @@
 import math
 from collections import deque
 import numpy as np
-from scipy.optimize import curve_fit
+from utils.lazyImport import LazyModule
+from utils.eventLog import get_event_log, TRAJECTORY_FIT_FAILED
+
+optimize = LazyModule("scipy.optimize")
 
 
 class SineTrajectoryHandler:
@@ -9,7 +12,9 @@ class SineTrajectoryHandler:
     正弦轨迹生成与估计器。
 
     该类支持生成正弦轨迹的位移、速度和加速度，同时可以通过输入的时间和位移数据拟合正弦轨迹参数（振幅、频率和相位）。
+    用 hold() 固定参数后暂停拟合，直到 release()。
     """
+    FIT_PARAMETERS = ("amplitude", "frequency", "phase")
 
     def __init__(self, amplitude=1.0, frequency=1.0, phase=0.0, window_size=5):
         """
@@ -24,12 +29,16 @@ class SineTrajectoryHandler:
         self.amplitude = amplitude
         self.frequency = frequency
         self.phase = phase
+        self.held = {}  # {参数名: 值}，不为空时暂停拟合
 
         # 滑动窗口存储时间和位移数据
         self.window_size = window_size
         self.time_window = deque(maxlen=window_size)
         self.position_data = deque(maxlen=window_size)
 
+        # 拟合时才用到 scipy.optimize，在后台预先导入
+        optimize.preload()
+
     # 正弦轨迹生成相关方法
     def get_position(self, t):
         """
@@ -51,6 +60,26 @@ class SineTrajectoryHandler:
         return -self.amplitude * omega_squared * math.cos(2 * math.pi * self.frequency * t + self.phase)
 
 
+    def hold(self, **values):
+        """
+        设置并固定部分轨迹参数（例如在线推送的振幅、频率），同时暂停拟合，其余参数保持当前的拟合结果。
+        只固定振幅时，短窗口内用其余参数去拟合振幅不符的数据会把频率拉偏，因此整体暂停而不是只拟合其余参数。
+        :param values: amplitude、frequency 或 phase
+        """
+        for name, value in values.items():
+            if name not in self.FIT_PARAMETERS:
+                raise ValueError(f"未知的轨迹参数: {name}")
+            setattr(self, name, value)
+            self.held[name] = value
+
+    def release(self, *names):
+        """
+        解除固定，全部解除后恢复拟合。
+        :param names: 参数名，不给出时解除全部
+        """
+        for name in names or tuple(self.held):
+            self.held.pop(name, None)
+
     # 轨迹估计相关方法
     def update_data(self, time, position):
         """
@@ -65,10 +94,13 @@ class SineTrajectoryHandler:
 
     def fit_and_update(self):
         """
-        对当前窗口中的数据进行正弦拟合，然后重置参数。
+        对当前窗口中的数据进行正弦拟合，然后重置参数；有 hold() 固定的参数时不拟合。
 
         :return: (amplitude, frequency, phase)
         """
+        if self.held:
+            return
+
         def sinusoidal_model(t, amplitude, frequency, phase):
             return amplitude * np.cos(2 * np.pi * frequency * t + phase)
 
@@ -79,20 +111,32 @@ class SineTrajectoryHandler:
         time_data = np.array(self.time_window)
         position_data = np.array(self.position_data)
 
-        # 初始参数估计
-        initial_guess = [1, 0.1, 0]
+        # 以当前参数作为初始估计（热启动），连续拟合时收敛更快
+        initial_guess = [self.amplitude, self.frequency, self.phase]
 
-        # 使用 curve_fit 进行拟合
-        params = curve_fit(sinusoidal_model, time_data, position_data, p0=initial_guess)
+        # 使用 curve_fit 进行拟合，拟合不收敛时保留原参数
         try:
+            params = optimize.curve_fit(sinusoidal_model, time_data, position_data, p0=initial_guess)
             self.amplitude, self.frequency, self.phase = params[0]
 
             # self.amplitude = min(self.amplitude, 2)
             # self.frequency = min(self.frequency, 0.5)
             # print("frequency:", self.frequency)
 
-        except ValueError as e:
-            print(f"轨迹拟合失败: {e}")
+        except (RuntimeError, ValueError) as e:
+            get_event_log().warning(TRAJECTORY_FIT_FAILED, f"轨迹拟合失败: {e}", "sine")
+
+    def to_dict(self):
+        return {"type": "sine", "amplitude": float(self.amplitude), "frequency": float(self.frequency),
+                "phase": float(self.phase)}
+
+    def load_dict(self, data):
+        """
+        恢复 to_dict() 保存的轨迹参数，滑动窗口数据不变。
+        """
+        self.amplitude = data["amplitude"]
+        self.frequency = data["frequency"]
+        self.phase = data["phase"]
 
 
 
@@ -1,8 +1,182 @@
-from scipy.signal import butter, filtfilt
+import math
+import numpy as np
 from collections import deque
+from utils.lazyImport import LazyModule
 
+signal = LazyModule("scipy.signal")
 
-class ButterworthFilter:
+
+def _filtfilt_last(b, a, zi, data, axis=-1):
+    """
+    与 signal.filtfilt(b, a, data, axis=axis)[-1] 结果相同（奇对称填充，默认填充长度），
+    但使用预先算好的 zi = lfilter_zi(b, a)，不在每次滤波时重新求解初始状态。
+    :param zi: lfilter_zi(b, a)
+    :return: 双向滤波结果的最后一个采样
+    """
+    x = np.moveaxis(np.asarray(data, dtype=float), axis, 0)
+    edge = 3 * max(len(a), len(b))
+    extended = np.concatenate((2 * x[0] - x[edge:0:-1], x, 2 * x[-1] - x[-2:-edge - 2:-1]))
+    zi = zi.reshape((-1,) + (1,) * (x.ndim - 1))
+    forward, _ = signal.lfilter(b, a, extended, axis=0, zi=zi * extended[0])
+    backward, _ = signal.lfilter(b, a, forward[::-1], axis=0, zi=zi * forward[-1])
+    # 反向滤波的输出是倒序的，原数据最后一个采样位于第 edge 个
+    return backward[edge]
+
+
+class CoefficientTable:
+    """
+    预先计算的巴特沃斯系数表，按键（例如速度等级）查表，切换截止频率时不需要重新调用 butter()。
+    每个键还可以指定滑动窗口长度，截止频率越低需要的窗口越长。
+    所有系数及其 lfilter_zi 在第一次查表时一次算出，切换时不再求解，scipy.signal 在后台预先导入。
+    """
+    def __init__(self, order, sampling_freq, cutoffs, windows=None):
+        """
+        :param order: 滤波器阶数
+        :param sampling_freq: 采样频率 (Hz)
+        :param cutoffs: {键: 截止频率 (Hz)}
+        :param windows: 可选，{键: 滑动窗口采样数}，未给出的键使用滤波器默认的 HISTORY_LIMIT
+        """
+        self.order = order
+        self.sampling_freq = sampling_freq
+        self.cutoffs = dict(cutoffs)
+        self.windows = dict(windows) if windows is not None else {}
+        self._coefficients = None
+        self._initial_conditions = None
+        signal.preload()
+
+    @classmethod
+    def for_gait_frequencies(cls, order, sampling_freq, gait_frequencies, cutoff_ratio=30.0, min_cutoff=5.0,
+                             max_cutoff=None, window_periods=1.5, min_window=100):
+        """
+        截止频率与步态频率成正比：各速度等级保留相同阶数的谐波，滤波延迟占步态周期的比例也相同，
+        慢速时截止频率更低、噪声更小，快速时不会滞后。
+        滑动窗口末端的误差随截止频率降低而增大，因此窗口长度取截止频率周期的 window_periods 倍，
+        并对截止频率设下限：更低的截止频率需要更长的窗口，末端误差仍然超过降噪的收益。
+        :param gait_frequencies: {键: 步态频率 (Hz)}
+        :param cutoff_ratio: 截止频率与步态频率之比
+        :param min_cutoff: 截止频率下限 (Hz)
+        :param max_cutoff: 截止频率上限 (Hz)，默认为采样频率的 0.45 倍
+        :param window_periods: 滑动窗口覆盖的截止频率周期数
+        :param min_window: 滑动窗口最少采样数
+        """
+        if max_cutoff is None:
+            max_cutoff = 0.45 * sampling_freq
+        cutoffs = {key: min(max(cutoff_ratio * frequency, min_cutoff), max_cutoff)
+                   for key, frequency in gait_frequencies.items()}
+        windows = {key: max(min_window, math.ceil(window_periods * sampling_freq / cutoff))
+                   for key, cutoff in cutoffs.items()}
+        return cls(order, sampling_freq, cutoffs, windows)
+
+    def window(self, key, default):
+        """
+        :return: 键对应的滑动窗口采样数，未指定时返回 default
+        """
+        return self.windows.get(key, default)
+
+    @property
+    def max_window(self):
+        return max(self.windows.values(), default=0)
+
+    def _design(self):
+        nyquist = 0.5 * self.sampling_freq
+        self._coefficients = {key: signal.butter(self.order, cutoff / nyquist, btype='low')
+                              for key, cutoff in self.cutoffs.items()}
+        self._initial_conditions = {key: signal.lfilter_zi(b, a) for key, (b, a) in self._coefficients.items()}
+
+    def __getitem__(self, key):
+        """
+        :return: (b, a)
+        """
+        if self._coefficients is None:
+            self._design()
+        return self._coefficients[key]
+
+    def initial_conditions(self, key):
+        """
+        :return: 键对应系数的 lfilter_zi
+        """
+        if self._initial_conditions is None:
+            self._design()
+        return self._initial_conditions[key]
+
+
+class _CoefficientSwitchMixin:
+    """
+    滤波器系数查表切换。滤波基于滑动窗口双向滤波，没有递推状态可以迁移，
+    因此切换后在 TRANSITION_SAMPLES 个采样内同时计算新旧系数（及各自的窗口长度）的输出并线性过渡，避免输出跳变。
+    历史数据按系数表中最长的窗口保存，每组系数只使用最近 window 个采样。
+    每组系数的 lfilter_zi 在设置系数时算一次，滤波时不再重复求解；使用系数表时直接取表中预先算好的值。
+    """
+    TRANSITION_SAMPLES = 50  # 切换系数时新旧输出的过渡采样数
+
+    table = None
+    key = None
+    _previous = None
+    _blend = 0
+
+    def use_table(self, table, key):
+        """
+        改用系数表中的系数，之后通过 select 切换。
+        :param table: CoefficientTable，阶数和采样频率应与本滤波器一致
+        :param key: 初始键
+        """
+        self.table = table
+        self.key = key
+        self.cutoff_freq = table.cutoffs[key]
+        self.window = table.window(key, self.HISTORY_LIMIT)
+        self._resize_history(max(table.max_window, self.HISTORY_LIMIT))
+        self.b = self.a = self.zi = None
+        self._previous = None
+
+    def _set_coefficients(self, b, a, zi=None):
+        self.b, self.a = b, a
+        self.zi = signal.lfilter_zi(b, a) if zi is None else zi
+
+    def _set_table_coefficients(self, key):
+        self._set_coefficients(*self.table[key], zi=self.table.initial_conditions(key))
+
+    def select(self, key):
+        """
+        切换到系数表中的另一组系数；已经开始滤波时新旧输出平滑过渡。
+        :param key: 系数表中的键
+        """
+        if key == self.key:
+            return
+        if self.b is not None:
+            self._previous = (self.b, self.a, self.zi, self.window)
+            self._blend = 0
+            self._set_table_coefficients(key)
+        self.key = key
+        self.cutoff_freq = self.table.cutoffs[key]
+        self.window = self.table.window(key, self.HISTORY_LIMIT)
+
+    def _design(self):
+        if self.table is not None:
+            self._set_table_coefficients(self.key)
+        else:
+            self._set_coefficients(*signal.butter(self.order, self.cutoff_freq / (0.5 * self.sampling_freq),
+                                                  btype='low'))
+
+    def _filter_last(self, data, axis=-1):
+        """
+        双向滤波并返回最后一个采样，处于过渡期时与旧系数的输出加权平均。
+        """
+        if self.b is None:
+            self._design()
+        output = _filtfilt_last(self.b, self.a, self.zi, data[-self.window:], axis=axis)
+        if self._previous is not None:
+            self._blend += 1
+            weight = self._blend / self.TRANSITION_SAMPLES
+            if weight >= 1.0:
+                self._previous = None
+            else:
+                b, a, zi, window = self._previous
+                previous = _filtfilt_last(b, a, zi, data[-window:], axis=axis)
+                output = weight * output + (1.0 - weight) * previous
+        return output
+
+
+class ButterworthFilter(_CoefficientSwitchMixin):
     """
     2阶巴特沃斯滤波器类
     """
@@ -15,9 +189,18 @@ class ButterworthFilter:
         :param cutoff_freq: 截止频率 (Hz)
         :param sampling_freq: 采样频率 (Hz)
         """
-        self.b, self.a = butter(order, cutoff_freq / (0.5 * sampling_freq), btype='low')
         self.signal_list = deque(maxlen=self.HISTORY_LIMIT)  # 使用 deque 代替列表
+        self.window = self.HISTORY_LIMIT  # 参与滤波的最近采样数
         self.order = order  # 保存滤波器阶数
+        self.cutoff_freq = cutoff_freq
+        self.sampling_freq = sampling_freq
+        self.b = self.a = self.zi = None  # 系数在第一次滤波时计算，scipy.signal 在后台预先导入
+        self.min_length = 3 * (order + 1) + 1  # filtfilt 默认填充长度要求的最少数据量
+        signal.preload()
+
+    def _resize_history(self, capacity):
+        if capacity != self.signal_list.maxlen:
+            self.signal_list = deque(self.signal_list, maxlen=capacity)
 
     def apply(self, data):
         """
@@ -25,7 +208,9 @@ class ButterworthFilter:
         :param data: 输入数据
         :return: 滤波后的数据
         """
-        return filtfilt(self.b, self.a, data)
+        if self.b is None:
+            self._design()
+        return signal.filtfilt(self.b, self.a, data)
 
     def filter_signal(self, new_value):
         """
@@ -34,7 +219,113 @@ class ButterworthFilter:
         :return: 滤波后的信号值
         """
         self.signal_list.append(new_value)
-        if len(self.signal_list) < self.order + 1:
+        if len(self.signal_list) < self.min_length:
             return new_value
         # 返回滤波后的值
-        return self.apply(list(self.signal_list))[-1]
+        return self._filter_last(list(self.signal_list))
+
+
+class MultiButterworthFilter(_CoefficientSwitchMixin):
+    """
+    多通道巴特沃斯滤波器类，每个通道对应一个轴，历史数据保存在预分配的二维数组中。
+    """
+    HISTORY_LIMIT = 100  # 历史数据存储限制
+
+    def __init__(self, order, cutoff_freq, sampling_freq, num_channels):
+        """
+        初始化滤波器参数
+        :param order: 滤波器阶数
+        :param cutoff_freq: 截止频率 (Hz)
+        :param sampling_freq: 采样频率 (Hz)
+        :param num_channels: 通道数量
+        """
+        self.order = order
+        self.cutoff_freq = cutoff_freq
+        self.sampling_freq = sampling_freq
+        self.b = self.a = self.zi = None  # 系数在第一次滤波时计算，scipy.signal 在后台预先导入
+        self.num_channels = num_channels
+        self.min_length = 3 * (order + 1) + 1
+        self.history = np.zeros((self.HISTORY_LIMIT, num_channels))
+        self.window = self.HISTORY_LIMIT  # 参与滤波的最近采样数
+        self.count = 0
+        signal.preload()
+
+    def _resize_history(self, capacity):
+        if capacity == len(self.history):
+            return
+        history = np.zeros((capacity, self.num_channels))
+        keep = min(self.count, capacity)
+        if keep:
+            history[-keep:] = self.history[-keep:]
+        self.history = history
+        self.count = keep
+
+    def filter_signal(self, new_values):
+        """
+        更新历史数据并对每个通道进行滤波
+        :param new_values: 按通道排列的新信号值
+        :return: 滤波后的信号值数组
+        """
+        # 历史数据整体前移一行，最新值写入最后一行
+        self.history[:-1] = self.history[1:]
+        self.history[-1] = new_values
+        self.count = min(self.count + 1, len(self.history))
+        if self.count < self.min_length:
+            return self.history[-1].copy()
+        return self._filter_last(self.history[-self.count:], axis=0)
+
+
+if __name__ == "__main__":
+    import time
+
+    # 对比固定 10 Hz 截止频率与按速度等级查表：各速度等级下步态信号的滤波误差，以及切换系数的耗时和输出跳变
+    fs = 1000
+    rng = np.random.default_rng(0)
+
+    def gait_frequency(level):
+        return 0.1 + (level - 1) * 1.9 / 9
+
+    table = CoefficientTable.for_gait_frequencies(2, fs, {level: gait_frequency(level) for level in range(1, 11)})
+
+    def run(signal_filter, data):
+        return np.array([signal_filter.filter_signal([value])[0] for value in data])
+
+    t = np.arange(0, 4, 1 / fs)
+    for noise in (0.01, 0.05):
+        print(f"测量噪声 {noise}:")
+        for level in range(1, 11):
+            w = 2 * np.pi * gait_frequency(level)
+            truth = 0.5 * np.sin(w * t) + 0.1 * np.sin(2 * w * t + 0.5)
+            measured = truth + rng.normal(0, noise, t.size)
+            fixed = MultiButterworthFilter(2, 10, fs, 1)
+            scheduled = MultiButterworthFilter(2, 10, fs, 1)
+            scheduled.use_table(table, level)
+            errors = [np.sqrt(np.mean((run(f, measured)[500:] - truth[500:]) ** 2)) for f in (fixed, scheduled)]
+            print(f"  速度等级 {level:2d} ({gait_frequency(level):.2f} Hz): 固定 10 Hz RMS 误差 {errors[0]:.4f}，"
+                  f"查表 {table.cutoffs[level]:4.1f} Hz / 窗口 {scheduled.window} RMS 误差 {errors[1]:.4f}")
+
+    # 切换耗时：查表 vs 重新设计
+    start = time.perf_counter()
+    for level in range(1, 11):
+        scheduled.select(level)
+    select_time = (time.perf_counter() - start) / 10
+    start = time.perf_counter()
+    for level in range(1, 11):
+        signal.butter(2, table.cutoffs[level] / (0.5 * fs), btype='low')
+    butter_time = (time.perf_counter() - start) / 10
+    print(f"切换系数: 查表 {select_time * 1e6:.1f} us，butter() 重新设计 {butter_time * 1e6:.1f} us")
+
+    # 切换时的输出跳变：无噪声步态信号，速度等级 2 -> 9，有无过渡
+    data = 0.5 * np.sin(2 * np.pi * gait_frequency(5) * t)
+    for transition in (1, MultiButterworthFilter.TRANSITION_SAMPLES):
+        signal_filter = MultiButterworthFilter(2, 10, fs, 1)
+        signal_filter.use_table(table, 2)
+        signal_filter.TRANSITION_SAMPLES = transition
+        output = []
+        for n, value in enumerate(data):
+            if n == 2000:
+                signal_filter.select(9)
+            output.append(signal_filter.filter_signal([value])[0])
+        step = np.abs(np.diff(output))
+        print(f"过渡 {transition:2d} 个采样: 切换时最大单步变化 {step[1999:2060].max():.4f}，"
+              f"切换前 {step[1900:1999].max():.4f}")
@@ -0,0 +1,170 @@
+import math
+import numpy as np
+from utils.legModel import LegModel
+
+
+class MomentumDisturbanceObserver:
+    """
+    基于广义动量的外部力矩观测器。
+
+    关节动量 p = J * v 满足 dp/dt = 电机力矩 + 外部力矩 - 摩擦力矩 - 重力力矩，观测器输出
+        r = K * (p - p0 - ∫(电机力矩 - 摩擦力矩 - 重力力矩 + r) dt)
+    其动态为 dr/dt = K * (外部力矩 - r)，即对真实外部力矩做带宽为 K 的一阶低通，
+    不需要对速度求导，也不会把加速度所需的惯性力矩或腿自身的重力力矩误判为外部力矩。
+    支持标量（单腿）或数组（多腿，按腿排列的模型列表）。
+    """
+    def __init__(self, leg_model, bandwidth=20.0, sampling_freq=1000):
+        """
+        :param leg_model: LegModel，或按腿排列的 LegModel 列表
+        :param bandwidth: 观测器带宽 (Hz)，越大响应越快、噪声越大
+        :param sampling_freq: 标称采样频率 (Hz)
+        """
+        if isinstance(leg_model, LegModel):
+            self.inertia = leg_model.inertia
+            self.viscous = leg_model.viscous
+            self.coulomb = leg_model.coulomb
+            self.coulomb_velocity = leg_model.coulomb_velocity
+            self.gravity = leg_model.gravity
+            self.gravity_offset = leg_model.gravity_offset
+            self.external_torque = 0.0
+        else:
+            self.inertia = np.array([model.inertia for model in leg_model], dtype=float)
+            self.viscous = np.array([model.viscous for model in leg_model], dtype=float)
+            self.coulomb = np.array([model.coulomb for model in leg_model], dtype=float)
+            self.coulomb_velocity = np.array([model.coulomb_velocity for model in leg_model], dtype=float)
+            self.gravity = np.array([model.gravity for model in leg_model], dtype=float)
+            self.gravity_offset = np.array([model.gravity_offset for model in leg_model], dtype=float)
+            self.external_torque = np.zeros(len(leg_model))
+        self.dt = 1.0 / sampling_freq
+        self.set_bandwidth(bandwidth)
+        self.momentum_offset = None
+        self.integral = 0.0
+
+    def set_bandwidth(self, bandwidth):
+        """
+        调整观测器带宽。
+        :param bandwidth: 带宽 (Hz)
+        """
+        gain = 2 * math.pi * bandwidth
+        if gain * self.dt >= 1.0:
+            raise ValueError(f"观测器带宽 {bandwidth} Hz 相对采样周期过高，离散化不稳定。")
+        self.bandwidth = bandwidth
+        self.gain = gain
+
+    def reset(self):
+        self.momentum_offset = None
+        self.integral = 0.0
+        self.external_torque = self.external_torque * 0.0
+
+    def friction_torque(self, velocity):
+        return self.viscous * velocity + self.coulomb * np.tanh(velocity / self.coulomb_velocity)
+
+    def gravity_torque(self, position):
+        return self.gravity * np.sin(position - self.gravity_offset)
+
+    def update(self, position, velocity, motor_torque, dt=None):
+        """
+        用本周期的位置、速度和电机力矩更新观测器。
+        :param position: 关节位置（用于扣除重力力矩）
+        :param velocity: 关节速度（未滤波的编码器速度即可）
+        :param motor_torque: 电机实际输出力矩（Iq * Kt）
+        :param dt: 可选，实际采样间隔；间隔较长（控制循环停顿）时分成多步积分，保持离散化稳定
+        :return: 外部力矩估计
+        """
+        momentum = self.inertia * velocity
+        if self.momentum_offset is None:
+            self.momentum_offset = momentum
+            return self.external_torque
+
+        if dt is None:
+            dt = self.dt
+        model_torque = motor_torque - self.friction_torque(velocity) - self.gravity_torque(position)
+        steps = max(1, math.ceil(2.0 * self.gain * dt))
+        step = dt / steps
+        for _ in range(steps):
+            self.integral = self.integral + (model_torque + self.external_torque) * step
+            self.external_torque = self.gain * (momentum - self.momentum_offset - self.integral)
+        return self.external_torque
+
+
+if __name__ == "__main__":
+    import sys
+    import csv
+    from utils.butterworthFilter import ButterworthFilter
+    from utils.legModel import load_leg_models
+
+    def legacy_estimate(measured_torque, commanded_torque, fs):
+        """
+        现有估计方法：滤波后的 Iq * Kt 减去指令力矩。
+        """
+        torque_filter = ButterworthFilter(2, 200, fs)
+        return np.array([torque_filter.filter_signal(m) - c for m, c in zip(measured_torque, commanded_torque)])
+
+    def dob_estimate(model, position, velocity, measured_torque, fs, bandwidth=20.0):
+        observer = MomentumDisturbanceObserver(model, bandwidth, fs)
+        return np.array([observer.update(p, v, m) for p, v, m in zip(position, velocity, measured_torque)])
+
+    def rms(values):
+        return float(np.sqrt(np.mean(np.square(values))))
+
+    if len(sys.argv) > 1:
+        # 实测数据：python -m utils.disturbanceObserver data_log_single.csv [leg_model.json]
+        # 采集数据时电机输出力矩为 0，关节完全由外力驱动。实测数据没有外部力矩的真实值，
+        # 这里只对比观测器与同一模型的离线（零相位求导）逆动力学，反映观测器本身的延迟和噪声，不反映模型误差；
+        # 模型精度请用 data_utils.system_identification 在另一段记录上辨识后再代入检查
+        model = LegModel()
+        if len(sys.argv) > 2:
+            model = next(iter(load_leg_models(sys.argv[2]).values()))
+        with open(sys.argv[1], mode='r') as file:
+            reader = csv.reader(file)
+            next(reader)  # 跳过表头
+            rows = np.array([list(map(float, row[:4])) for row in reader])
+        timestamp, position, velocity, torque = rows[:, 0], rows[:, 1], rows[:, 2], rows[:, 3]
+        fs = 1.0 / np.median(np.diff(timestamp))
+        dob = dob_estimate(model, position, velocity, torque, fs)
+        acceleration = np.gradient(velocity, timestamp)
+        offline = model.inertia * acceleration + model.friction_torque(velocity) + model.gravity_torque(position) - torque
+        print(f"数据点: {len(rows)}, 采样频率: {fs:.0f} Hz, 模型: {model}")
+        print(f"  动量观测器与离线逆动力学的差异 RMS: {rms(dob - offline):.4f}（同一模型，仅反映观测器延迟和噪声）")
+        sys.exit()
+
+    # 仿真数据：带重力的腿做正弦步态 + 人体助力矩，电流环为一阶滞后，电机按真实模型的逆动力学输出力矩。
+    # 观测器使用带误差的模型（与辨识误差相当），并与不扣除重力的旧模型对比
+    fs = 1000
+    dt = 1.0 / fs
+    truth = LegModel(inertia=0.05, viscous=0.02, coulomb=0.05, gravity=0.8, gravity_offset=0.1)
+    identified = LegModel(inertia=0.055, viscous=0.018, coulomb=0.06, gravity=0.85, gravity_offset=0.12)
+    no_gravity = LegModel(inertia=0.055, viscous=0.018, coulomb=0.06)
+    rng = np.random.default_rng(0)
+    t = np.arange(0, 10, dt)
+    omega = 2 * math.pi * 1.0
+    desired_position = 0.5 * np.cos(omega * t)
+    desired_velocity = -0.5 * omega * np.sin(omega * t)
+    desired_acceleration = -0.5 * omega ** 2 * np.cos(omega * t)
+    true_external = 0.4 * np.sin(0.5 * omega * t) + np.where((t % 3) > 2, 0.3, 0.0)
+    commanded = truth.inverse_dynamics(desired_position, desired_velocity, desired_acceleration) - true_external
+    motor_torque = np.zeros_like(commanded)
+    position = np.empty_like(t)
+    velocity = np.empty_like(t)
+    position[0], velocity[0] = desired_position[0], desired_velocity[0]
+    alpha = 1 - math.exp(-2 * math.pi * 300 * dt)  # 电流环带宽约 300 Hz
+    for k in range(1, t.size):
+        motor_torque[k] = motor_torque[k - 1] + alpha * (commanded[k] - motor_torque[k - 1])
+        # 真实动力学按实际电机力矩和真实外部力矩积分
+        acceleration = (motor_torque[k] + true_external[k] - truth.friction_torque(velocity[k - 1])
+                        - truth.gravity_torque(position[k - 1])) / truth.inertia
+        velocity[k] = velocity[k - 1] + acceleration * dt
+        position[k] = position[k - 1] + velocity[k] * dt
+    measured_torque = motor_torque + rng.normal(0, 0.02, t.size)
+    measured_position = position + rng.normal(0, 1e-4, t.size)
+    measured_velocity = velocity + rng.normal(0, 0.005, t.size)
+
+    legacy = legacy_estimate(measured_torque, commanded, fs)
+    print(f"仿真步态，真实模型: {truth}")
+    print(f"  观测器模型: {identified}")
+    print(f"  现有估计 RMS 误差: {rms(legacy[100:] - true_external[100:]):.4f}")
+    for bandwidth in (5.0, 10.0, 20.0, 40.0):
+        dob = dob_estimate(identified, measured_position, measured_velocity, measured_torque, fs, bandwidth)
+        without = dob_estimate(no_gravity, measured_position, measured_velocity, measured_torque, fs, bandwidth)
+        print(f"  动量观测器 {bandwidth:>4.0f} Hz RMS 误差: {rms(dob[100:] - true_external[100:]):.4f}"
+              f"（不扣除重力: {rms(without[100:] - true_external[100:]):.4f}）")
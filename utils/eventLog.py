@@ -0,0 +1,272 @@
+import atexit
+import sys
+import threading
+import time
+from typing import Optional
+
+# 级别
+INFO = 20
+WARNING = 30
+ERROR = 40
+LEVEL_NAMES = {INFO: "信息", WARNING: "警告", ERROR: "错误"}
+
+# 错误码，M 开头为电机通信，T 开头为轨迹
+MOTOR_CONNECT_FAILED = "M101"
+MOTOR_CALIBRATION_FAILED = "M102"
+MOTOR_AXIS_STATE_FAILED = "M103"
+MOTOR_MODE_FAILED = "M201"
+MOTOR_STOP_FAILED = "M202"
+MOTOR_TORQUE_WRITE_FAILED = "M203"
+MOTOR_RESET_ORIGIN_FAILED = "M204"
+MOTOR_WATCHDOG_FAILED = "M205"
+MOTOR_UNSUPPORTED = "M206"
+TRAJECTORY_FIT_FAILED = "T101"
+ERROR_CODES = {
+    MOTOR_CONNECT_FAILED: "初始化 ODrive 失败",
+    MOTOR_CALIBRATION_FAILED: "校准失败",
+    MOTOR_AXIS_STATE_FAILED: "轴状态切换失败",
+    MOTOR_MODE_FAILED: "设置力矩控制模式失败",
+    MOTOR_STOP_FAILED: "停止电机失败",
+    MOTOR_TORQUE_WRITE_FAILED: "设置输入力矩失败",
+    MOTOR_RESET_ORIGIN_FAILED: "重置原点失败",
+    MOTOR_WATCHDOG_FAILED: "看门狗设置或喂狗失败",
+    MOTOR_UNSUPPORTED: "当前通信方式不支持该操作",
+    TRAJECTORY_FIT_FAILED: "轨迹拟合失败",
+}
+
+
+class EventLog:
+    """
+    控制循环使用的异步事件日志。
+
+    记录写入预先分配的环形队列，由后台线程定期格式化并写到终端或文件；调用方只在锁内填写一个槽位，
+    不做格式化和 I/O，终端或磁盘再慢也不会拖慢控制循环。队列满时新记录被丢弃并计数，调用方从不等待。
+    同一个 (错误码, 来源) 在每个 rate_interval 内最多写出 burst 条，其余只计数，
+    窗口结束后合并为一条，例如 “设置输入力矩失败: ...（最近 1 秒 x1000）”。
+    """
+    def __init__(self, capacity: int = 1024, stream=None, path: Optional[str] = None,
+                 rate_interval: float = 1.0, burst: int = 3, flush_interval: float = 0.1):
+        """
+        :param capacity: 队列容量 (条)
+        :param stream: 输出流，默认为 sys.stdout；为 None 且给定 path 时只写文件
+        :param path: 可选，追加写入的日志文件
+        :param rate_interval: 限流窗口 (秒)
+        :param burst: 每个窗口内同一 (错误码, 来源) 最多写出的条数
+        :param flush_interval: 后台线程的写出间隔 (秒)
+        """
+        self.capacity = capacity
+        # 槽位：[时刻, 级别, 错误码, 来源, 消息, 重复次数]
+        self._slots = [[0.0, INFO, "", "", "", 1] for _ in range(capacity)]
+        self._head = 0  # 已写入的总条数
+        self._tail = 0  # 已取出的总条数
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self.stream = stream if stream is not None or path is not None else sys.stdout
+        self.path = path
+        self.rate_interval = rate_interval
+        self.burst = burst
+        self.flush_interval = flush_interval
+        self._rates = {}  # {(错误码, 来源): [窗口起点, 已写出条数, 被合并条数, 最近一条消息, 级别]}
+        self.counts = {}  # {错误码: 总次数}，包括被合并和丢弃的
+        self.suppressed = 0  # 被限流合并的条数
+        self.dropped = 0  # 队列满时丢弃的条数
+        self.write_errors = 0  # 输出流或文件写入失败的次数
+        # monotonic 时刻换算为墙上时间
+        self._wall_offset = time.time() - time.monotonic()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="event-log", daemon=True)
+        self._thread.start()
+
+    def log(self, level: int, code: str, message: str, source: str = "") -> bool:
+        """
+        记录一条事件，可以在控制循环中调用。
+        :param level: INFO、WARNING 或 ERROR
+        :param code: 错误码，见 ERROR_CODES
+        :param message: 消息
+        :param source: 可选，来源（例如 ODrive 序列号），限流按 (错误码, 来源) 分别计数
+        :return: 是否进入队列（被限流合并或丢弃时为 False）
+        """
+        now = time.monotonic()
+        key = (code, source)
+        with self._lock:
+            self.counts[code] = self.counts.get(code, 0) + 1
+            state = self._rates.get(key)
+            if state is None:
+                state = self._rates[key] = [now, 0, 0, "", level]
+            elif now - state[0] >= self.rate_interval:
+                self._close_window(key, state, now)
+            if state[1] >= self.burst:
+                state[2] += 1
+                state[3] = message
+                state[4] = level
+                self.suppressed += 1
+                return False
+            state[1] += 1
+            return self._push(now, level, code, source, message, 1)
+
+    def info(self, code: str, message: str, source: str = "") -> bool:
+        return self.log(INFO, code, message, source)
+
+    def warning(self, code: str, message: str, source: str = "") -> bool:
+        return self.log(WARNING, code, message, source)
+
+    def error(self, code: str, message: str, source: str = "") -> bool:
+        return self.log(ERROR, code, message, source)
+
+    def _push(self, now, level, code, source, message, count) -> bool:
+        # 调用方持有 self._lock
+        if self._head - self._tail >= self.capacity:
+            self.dropped += 1
+            return False
+        slot = self._slots[self._head % self.capacity]
+        slot[0] = now
+        slot[1] = level
+        slot[2] = code
+        slot[3] = source
+        slot[4] = message
+        slot[5] = count
+        self._head += 1
+        return True
+
+    def _close_window(self, key, state, now) -> None:
+        # 调用方持有 self._lock：把上一个窗口内被合并的记录写成一条汇总，开始新窗口
+        if state[2]:
+            self._push(now, state[4], key[0], key[1], state[3], state[2])
+        state[0] = now
+        state[1] = 0
+        state[2] = 0
+
+    def _take(self, final: bool = False):
+        """
+        取出队列中的全部记录，同时结束已到期（final 为 True 时为全部）的限流窗口。
+        :return: 记录元组列表
+        """
+        now = time.monotonic()
+        with self._lock:
+            for key, state in self._rates.items():
+                if state[2] and (final or now - state[0] >= self.rate_interval):
+                    self._close_window(key, state, now)
+            records = [tuple(self._slots[i % self.capacity]) for i in range(self._tail, self._head)]
+            self._tail = self._head
+        return records
+
+    def _format(self, record) -> str:
+        moment, level, code, source, message, count = record
+        wall = moment + self._wall_offset
+        stamp = time.strftime("%H:%M:%S", time.localtime(wall)) + f".{int(wall % 1 * 1000):03d}"
+        text = f"{stamp} [{LEVEL_NAMES.get(level, level)} {code}]"
+        if source:
+            text += f" ({source})"
+        text += f" {message}"
+        if count > 1:
+            text += f"（最近 {self.rate_interval:g} 秒 x{count}）"
+        return text
+
+    def flush(self, final: bool = False) -> int:
+        """
+        在调用线程中立即写出队列中的记录，不要在控制循环中调用。
+        :param final: 是否同时写出未到期限流窗口的汇总，程序退出前使用
+        :return: 写出的条数
+        """
+        with self._write_lock:
+            records = self._take(final)
+            if not records:
+                return 0
+            text = "\n".join(self._format(record) for record in records) + "\n"
+            if self.stream is not None:
+                try:
+                    self.stream.write(text)
+                    self.stream.flush()
+                except Exception:
+                    self.write_errors += 1
+            if self.path is not None:
+                try:
+                    with open(self.path, mode='a', encoding='utf-8') as file:
+                        file.write(text)
+                except OSError:
+                    self.write_errors += 1
+            return len(records)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def close(self) -> None:
+        """
+        停止后台线程并写出剩余记录。
+        """
+        self._stop.set()
+        self._thread.join()
+        self.flush(final=True)
+
+    def report(self) -> None:
+        """
+        打印各错误码的次数以及限流、丢弃统计。
+        """
+        print(f"事件日志: 合并 {self.suppressed} 条，丢弃 {self.dropped} 条，写入失败 {self.write_errors} 次")
+        for code, count in sorted(self.counts.items()):
+            print(f"  {code} {ERROR_CODES.get(code, '')}: {count} 次")
+
+
+_default_log: Optional[EventLog] = None
+_default_log_lock = threading.Lock()
+
+
+def get_event_log() -> EventLog:
+    """
+    获取进程内共享的事件日志，第一次调用时启动后台线程，程序退出时写出剩余记录。
+    """
+    global _default_log
+    with _default_log_lock:
+        if _default_log is None:
+            _default_log = EventLog()
+            atexit.register(_default_log.close)
+        return _default_log
+
+
+if __name__ == "__main__":
+    import numpy as np
+
+    class SlowStream:
+        """
+        模拟很慢的终端：每次写入阻塞 1 ms（例如远程终端）。
+        """
+        def __init__(self):
+            self.lines = []
+
+        def write(self, text):
+            time.sleep(0.001)
+            self.lines.extend(text.splitlines())
+
+        def flush(self):
+            pass
+
+    # 1 kHz 控制循环，第 0.5~1.5 秒 USB 持续故障，每个周期写入力矩都失败
+    def run(report):
+        period = 0.001
+        times = []
+        next_tick = time.perf_counter()
+        for n in range(2000):
+            next_tick += period
+            while time.perf_counter() < next_tick:
+                pass
+            start = time.perf_counter()
+            if 500 <= n < 1500:
+                report(f"设置输入力矩失败: [Errno 19] No such device (周期 {n})")
+            times.append(time.perf_counter() - start)
+        return np.array(times) * 1e3
+
+    stream = SlowStream()
+    times = run(lambda message: print(message, file=stream))
+    print(f"print 到慢终端: 每周期 平均 {times.mean():.3f} ms，最大 {times.max():.3f} ms，"
+          f"超过 1 ms 的周期 {np.sum(times > 1.0)}，输出 {len(stream.lines)} 行")
+
+    stream = SlowStream()
+    event_log = EventLog(stream=stream)
+    times = run(lambda message: event_log.error(MOTOR_TORQUE_WRITE_FAILED, message, source="serial-0"))
+    event_log.close()
+    print(f"EventLog 到慢终端: 每周期 平均 {times.mean() * 1e3:.1f} us，最大 {times.max() * 1e3:.1f} us，"
+          f"超过 1 ms 的周期 {np.sum(times > 1.0)}，输出 {len(stream.lines)} 行:")
+    for line in stream.lines:
+        print(f"  {line}")
+    event_log.report()
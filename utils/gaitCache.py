@@ -0,0 +1,101 @@
+import json
+import os
+import time
+from collections import OrderedDict
+
+CACHE_VERSION = 1  # 条目格式版本，格式变化时递增，旧版本条目读取时忽略
+
+
+class GaitParameterCache:
+    """
+    按 用户 + 速度等级 缓存收敛后的轨迹参数和控制增益，保存为 JSON 文件。
+
+    控制器启动时用缓存的参数热启动，结束时写回收敛后的值；条目按最近使用顺序保存，超过容量时淘汰最久未使用的条目。
+    每个条目记录格式版本和写入次数，格式版本不一致的条目视为不存在。
+    """
+    def __init__(self, path="gait_cache.json", capacity=64):
+        """
+        :param path: JSON 文件路径
+        :param capacity: 最多保存的条目数
+        """
+        self.path = path
+        self.capacity = capacity
+        self.entries = OrderedDict()  # {键: 条目}，越靠后越新
+        self.load()
+
+    @staticmethod
+    def key(user, speed_level=None):
+        return f"{user}/{'default' if speed_level is None else speed_level}"
+
+    def load(self):
+        """
+        从文件读取缓存，文件不存在或损坏时从空缓存开始。
+        """
+        self.entries = OrderedDict()
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, mode='r', encoding='utf-8') as file:
+                data = json.load(file)
+            for key, entry in data.get("entries", []):
+                self.entries[key] = entry
+        except (OSError, ValueError, TypeError) as e:
+            print(f"读取步态参数缓存失败，将重新建立: {e}")
+            self.entries = OrderedDict()
+
+    def save(self):
+        """
+        写入文件。先写临时文件再替换，写入中断时不会损坏已有缓存。
+        """
+        data = {"version": CACHE_VERSION, "entries": list(self.entries.items())}
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, mode='w', encoding='utf-8') as file:
+            json.dump(data, file, indent=2, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+    def get(self, user, speed_level=None):
+        """
+        :return: 条目 {"trajectory": ..., "gains": ..., "revision": ..., "updated": ...}，没有可用条目时返回 None
+        """
+        key = self.key(user, speed_level)
+        entry = self.entries.get(key)
+        if entry is None or entry.get("version") != CACHE_VERSION:
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, user, speed_level=None, trajectory=None, gains=None, save=True):
+        """
+        写入一个条目，超过容量时淘汰最久未使用的条目。
+        :param trajectory: 轨迹参数，轨迹生成器 to_dict() 的结果
+        :param gains: 控制增益 {名称: 值}
+        :param save: 是否立即写入文件
+        :return: 条目
+        """
+        key = self.key(user, speed_level)
+        previous = self.entries.pop(key, None)
+        revision = previous["revision"] + 1 if previous is not None and previous.get("version") == CACHE_VERSION else 1
+        entry = {
+            "version": CACHE_VERSION,
+            "revision": revision,
+            "updated": time.time(),
+            "trajectory": trajectory,
+            "gains": gains,
+        }
+        self.entries[key] = entry
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+        if save:
+            self.save()
+        return entry
+
+    def remove(self, user, speed_level=None, save=True):
+        self.entries.pop(self.key(user, speed_level), None)
+        if save:
+            self.save()
+
+    def report(self):
+        print(f"步态参数缓存 {self.path}: {len(self.entries)}/{self.capacity} 个条目")
+        for key, entry in reversed(self.entries.items()):
+            updated = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry.get("updated", 0)))
+            print(f"  {key}: 第 {entry.get('revision')} 次写入, 更新于 {updated}")
@@ -0,0 +1,69 @@
+import importlib
+import threading
+import time
+
+_preload_threads = []  # 所有已开始的后台导入线程
+
+
+def wait_for_preloads(timeout=None):
+    """
+    等待所有已开始的后台导入完成。在控制循环开始前调用，避免第一次用到模块时阻塞控制周期；
+    导入与设备搜索、校准重叠时通常已经完成，不需要等待。
+    :param timeout: 可选，总等待时间上限 (秒)
+    :return: 等待的时间 (秒)
+    """
+    start = time.perf_counter()
+    for thread in list(_preload_threads):
+        remaining = None if timeout is None else max(timeout - (time.perf_counter() - start), 0.0)
+        thread.join(remaining)
+    return time.perf_counter() - start
+
+
+class LazyModule:
+    """
+    延迟导入的模块。
+
+    模块在第一次访问属性时才导入，入口脚本只在真正用到时才承担 odrive、scipy、matplotlib 等重量级模块的导入开销。
+    也可以调用 preload() 在后台线程中提前导入，与设备搜索、校准等耗时操作重叠；
+    之后的属性访问在导入完成前会等待，导入完成后直接返回。
+    """
+    def __init__(self, name):
+        """
+        :param name: 模块名，例如 "scipy.signal"
+        """
+        self.__dict__.update(_name=name, _module=None, _lock=threading.Lock(), _preload_lock=threading.Lock(),
+                             _thread=None, load_time=None)
+
+    def _load(self):
+        module = self._module
+        if module is None:
+            with self._lock:
+                if self._module is None:
+                    start = time.perf_counter()
+                    self.__dict__["_module"] = importlib.import_module(self._name)
+                    self.__dict__["load_time"] = time.perf_counter() - start
+                module = self._module
+        return module
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def preload(self):
+        """
+        在后台线程中开始导入，立即返回。重复调用不会重复导入。
+        """
+        with self._preload_lock:  # 不能使用导入锁，后台线程导入期间一直持有它
+            if self._module is not None or self._thread is not None:
+                return self
+            thread = threading.Thread(target=self._load, name=f"preload-{self._name}", daemon=True)
+            self.__dict__["_thread"] = thread
+            _preload_threads.append(thread)
+        thread.start()
+        return self
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        return f"<LazyModule {self._name} ({'已导入' if self.loaded else '未导入'})>"
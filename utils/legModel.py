@@ -0,0 +1,82 @@
+import json
+import numpy as np
+
+
+class LegModel:
+    """
+    单腿关节动力学模型：
+        惯量 * 加速度 = 电机力矩 + 外部力矩 - 粘滞摩擦 * 速度 - 库仑摩擦 * sign(速度) - 重力 * sin(位置 - 重力零位)
+    单位与编码器读数一致。库仑摩擦的符号函数用 tanh(速度 / coulomb_velocity) 平滑，避免零速附近抖动。
+    """
+    def __init__(self, inertia=0.01, viscous=0.0, coulomb=0.0, coulomb_velocity=0.05, gravity=0.0, gravity_offset=0.0):
+        """
+        :param inertia: 转动惯量
+        :param viscous: 粘滞摩擦系数
+        :param coulomb: 库仑摩擦力矩
+        :param coulomb_velocity: 库仑摩擦平滑过渡的速度尺度
+        :param gravity: 重力力矩幅值（质量 * 重力加速度 * 质心到关节的距离）
+        :param gravity_offset: 重力零位，即腿自然下垂时的关节位置
+        """
+        self.inertia = inertia
+        self.viscous = viscous
+        self.coulomb = coulomb
+        self.coulomb_velocity = coulomb_velocity
+        self.gravity = gravity
+        self.gravity_offset = gravity_offset
+
+    def friction_torque(self, velocity):
+        """
+        计算摩擦力矩，支持标量或数组。
+        """
+        return self.viscous * velocity + self.coulomb * np.tanh(velocity / self.coulomb_velocity)
+
+    def gravity_torque(self, position):
+        """
+        计算重力力矩，支持标量或数组。
+        """
+        return self.gravity * np.sin(position - self.gravity_offset)
+
+    def inverse_dynamics(self, position, velocity, acceleration):
+        """
+        无外部力矩时产生给定运动所需的电机力矩。
+        """
+        return self.inertia * acceleration + self.friction_torque(velocity) + self.gravity_torque(position)
+
+    def to_dict(self):
+        return {
+            "inertia": float(self.inertia),
+            "viscous": float(self.viscous),
+            "coulomb": float(self.coulomb),
+            "coulomb_velocity": float(self.coulomb_velocity),
+            "gravity": float(self.gravity),
+            "gravity_offset": float(self.gravity_offset),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def __repr__(self):
+        params = ", ".join(f"{key}={value:.6g}" for key, value in self.to_dict().items())
+        return f"LegModel({params})"
+
+
+def save_leg_models(path, models):
+    """
+    保存多条腿的模型参数。
+    :param path: JSON 文件路径
+    :param models: {腿名称: LegModel}
+    """
+    with open(path, mode='w', encoding='utf-8') as file:
+        json.dump({name: model.to_dict() for name, model in models.items()}, file, indent=2, ensure_ascii=False)
+
+
+def load_leg_models(path):
+    """
+    读取多条腿的模型参数。
+    :param path: JSON 文件路径
+    :return: {腿名称: LegModel}
+    """
+    with open(path, mode='r', encoding='utf-8') as file:
+        data = json.load(file)
+    return {name: LegModel.from_dict(params) for name, params in data.items()}
@@ -1,12 +1,15 @@
 import time
 import math
-import matplotlib
-import matplotlib.pyplot as plt
+from utils.lazyImport import LazyModule
 
-matplotlib.use('TkAgg')  # 设置后端为 TkAgg
+matplotlib = LazyModule("matplotlib")  # 只有真正打开图像窗口时才导入 matplotlib
+BACKEND = 'TkAgg'
 
 
 class RealTimePlotterBase:
+    """
+    实时绘图基类。构造时只保存参数，图像窗口在 open() 或第一次刷新图像时才创建，不绘图的运行不会导入 matplotlib。
+    """
     def __init__(self, data_labels, window_size=40, update_interval=10, layout=(1, 1), y_lims=None, fig_width=10):
         """
         :param data_labels: 数据标签列表，例如 ["Position", "Velocity", "Torque", "External Torque"]
@@ -27,9 +30,28 @@ class RealTimePlotterBase:
         rows, cols = layout
         if rows * cols < num_plots:
             raise ValueError(f"布局 ({rows}, {cols}) 不足以容纳 {num_plots} 个子图，请调整布局参数。")
+        self.data_labels = data_labels
+        self.layout = layout
+        self.fig_width = fig_width
+        self.fig = None
+        self.plt = None
 
+    def open(self):
+        """
+        导入 matplotlib 并创建图像窗口，已创建时直接返回。
+        在控制循环开始前调用，避免第一次刷新图像时阻塞控制周期。
+        """
+        if self.fig is not None:
+            return
+        matplotlib.use(BACKEND)  # 设置后端为 TkAgg
+        import matplotlib.pyplot as plt
+        self.plt = plt
+
+        data_labels = self.data_labels
+        num_plots = len(data_labels)
+        rows, cols = self.layout
         plt.ion()
-        self.fig, self.axs = plt.subplots(rows, cols, figsize=(fig_width, 12), sharex=True)
+        self.fig, self.axs = plt.subplots(rows, cols, figsize=(self.fig_width, 12), sharex=True)
 
         # 将 axs 转换为一维列表，方便索引
         if isinstance(self.axs, plt.Axes):
@@ -79,6 +101,7 @@ class RealTimePlotterBase:
 
         self.update_counter += 1
         if self.update_counter % self.update_interval == 0:  # 每隔一定步数更新一次图像
+            self.open()
             for label, line in self.lines.items():
                 line.set_data(self.time_data, self.data[label])
 
@@ -95,8 +118,10 @@ class RealTimePlotterBase:
             self.fig.canvas.flush_events()
 
     def finalize(self):
-        plt.ioff()
-        plt.show()
+        if self.fig is None:
+            return
+        self.plt.ioff()
+        self.plt.show()
 
 
 
@@ -0,0 +1,159 @@
+import gc
+import sys
+import time
+import numpy as np
+
+
+class RingLog:
+    """
+    预分配的环形日志，按行记录定长数据，写满后覆盖最旧的记录，记录过程中不分配内存。
+    """
+    def __init__(self, capacity, width):
+        """
+        :param capacity: 最多保存的行数
+        :param width: 每行的列数
+        """
+        self.buffer = np.zeros((capacity, width))
+        self.capacity = capacity
+        self.count = 0
+
+    def append(self, row):
+        self.buffer[self.count % self.capacity] = row
+        self.count += 1
+
+    def values(self):
+        """
+        按时间顺序返回已记录的数据（拷贝）。
+        """
+        if self.count <= self.capacity:
+            return self.buffer[:self.count].copy()
+        start = self.count % self.capacity
+        return np.concatenate((self.buffer[start:], self.buffer[:start]))
+
+    def clear(self):
+        self.count = 0
+
+
+class GCGuard:
+    """
+    实时执行区的垃圾回收控制。
+
+    进入时先完整回收一次并冻结所有已有对象（gc.freeze），之后关闭自动回收，
+    控制循环只在每个周期的空闲时间内调用 collect_in_slack() 做第 0 代回收；第 0 代回收累计 gen1_threshold 次后，
+    在空闲时间足够的周期改为回收第 1 代，避免第 0 代幸存的循环引用在第 1 代中一直堆积。
+    第 2 代在区内不回收，区内产生的长寿命垃圾要到退出、恢复自动回收之后才会释放，长时间运行的区应尽量不产生这类对象。
+    退出时恢复原状态。通过 gc.callbacks 统计区内每一次回收的停顿时间。
+    """
+    def __init__(self, min_slack=0.0005, gen0_threshold=700, gen1_threshold=10, gen1_slack=0.002):
+        """
+        :param min_slack: 本周期剩余时间大于该值 (秒) 时才允许回收
+        :param gen0_threshold: 第 0 代待回收对象数量超过该值时才回收
+        :param gen1_threshold: 第 0 代回收累计达到该次数后回收第 1 代（与 CPython 的默认阈值相同）
+        :param gen1_slack: 回收第 1 代至少需要的空闲时间 (秒)；实测的第 1 代回收耗时更长时，要求空闲时间不少于实测最大值的两倍
+        """
+        self.min_slack = min_slack
+        self.gen0_threshold = gen0_threshold
+        self.gen1_threshold = gen1_threshold
+        self.gen1_slack = gen1_slack
+        self.gen1_cost = 0.0  # 实测的第 1 代回收最大耗时 (秒)
+        self.pauses = []
+        self.scheduled_collections = 0
+        self.gen1_collections = 0
+        self._gc_start = None
+        self._was_enabled = True
+
+    def _on_gc(self, phase, info):
+        if phase == "start":
+            self._gc_start = time.perf_counter()
+        elif self._gc_start is not None:
+            self.pauses.append(time.perf_counter() - self._gc_start)
+            self._gc_start = None
+
+    def __enter__(self):
+        gc.collect()
+        gc.freeze()
+        self._was_enabled = gc.isenabled()
+        gc.disable()
+        self.pauses = []
+        gc.callbacks.append(self._on_gc)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        gc.callbacks.remove(self._on_gc)
+        gc.unfreeze()
+        if self._was_enabled:
+            gc.enable()
+        return False
+
+    def collect_in_slack(self, slack):
+        """
+        在周期空闲时间内做一次第 0 代回收，第 0 代回收次数已达到 gen1_threshold 且空闲时间足够时回收第 1 代。
+        :param slack: 本周期剩余的空闲时间 (秒)
+        :return: 是否执行了回收
+        """
+        if slack < self.min_slack:
+            return False
+        count0, count1, _ = gc.get_count()
+        if count1 >= self.gen1_threshold and slack >= max(self.gen1_slack, 2 * self.gen1_cost):
+            start = time.perf_counter()
+            gc.collect(1)
+            self.gen1_cost = max(self.gen1_cost, time.perf_counter() - start)
+            self.gen1_collections += 1
+        elif count0 >= self.gen0_threshold:
+            gc.collect(0)
+        else:
+            return False
+        self.scheduled_collections += 1
+        return True
+
+    def report(self):
+        pauses = np.array(self.pauses) * 1000
+        print(f"GC: 回收 {len(pauses)} 次 (空闲时间内调度 {self.scheduled_collections} 次，"
+              f"其中第 1 代 {self.gen1_collections} 次)", end="")
+        if len(pauses):
+            print(f", 停顿 平均 {pauses.mean():.3f} ms, 最大 {pauses.max():.3f} ms")
+        else:
+            print()
+
+
+class TickMetrics:
+    """
+    控制周期指标：周期耗时，以及每个周期净分配的内存块数和 GC 跟踪对象数。
+    数据写入预分配数组，不影响被测周期。
+    """
+    def __init__(self, capacity=100000):
+        self.durations = np.zeros(capacity)
+        self.allocated_blocks = np.zeros(capacity)
+        self.tracked_objects = np.zeros(capacity)
+        self.capacity = capacity
+        self.count = 0
+        self._start = 0.0
+        self._blocks = 0
+        self._tracked = 0
+
+    def begin_tick(self):
+        self._blocks = sys.getallocatedblocks()
+        self._tracked = gc.get_count()[0]
+        self._start = time.perf_counter()
+
+    def end_tick(self):
+        """
+        :return: 本周期耗时 (秒)
+        """
+        elapsed = time.perf_counter() - self._start
+        index = self.count % self.capacity
+        self.durations[index] = elapsed
+        self.allocated_blocks[index] = sys.getallocatedblocks() - self._blocks
+        self.tracked_objects[index] = gc.get_count()[0] - self._tracked
+        self.count += 1
+        return elapsed
+
+    def report(self):
+        n = min(self.count, self.capacity)
+        if n == 0:
+            return
+        durations = self.durations[:n] * 1000
+        print(f"控制周期: {self.count} 次, 耗时 平均 {durations.mean():.3f} ms, "
+              f"P99 {np.percentile(durations, 99):.3f} ms, 最大 {durations.max():.3f} ms")
+        print(f"  每周期净分配内存块: 平均 {self.allocated_blocks[:n].mean():.1f}, "
+              f"GC 跟踪对象: 平均 {self.tracked_objects[:n].mean():.1f}")
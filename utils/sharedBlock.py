@@ -0,0 +1,131 @@
+import time
+import numpy as np
+from multiprocessing import shared_memory
+
+
+class SharedBlock:
+    """
+    固定布局的共享内存数据块，用于进程间单写多读地交换一组浮点数。
+
+    块头是一个 64 位序号（顺序锁）：写入前加一变为奇数，写完后再加一变回偶数。
+    读取方在序号为偶数且读取前后序号不变时才接受数据，因此不会读到写了一半的数据，
+    读写双方都不加锁、不会互相等待。序号除以 2 即数据版本号。
+    """
+    HEADER_SIZE = 8
+
+    def __init__(self, fields, name=None, create=False):
+        """
+        :param fields: 字段名序列，顺序即内存布局
+        :param name: 共享内存名称，create=False 时必须指定
+        :param create: 是否新建共享内存（由数据块的所有者进程新建）
+        """
+        self.fields = tuple(fields)
+        self.index = {field: i for i, field in enumerate(self.fields)}
+        size = self.HEADER_SIZE + 8 * len(self.fields)
+        self._shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+        self.name = self._shm.name
+        self.owner = create
+        self._seq = np.ndarray((1,), dtype=np.uint64, buffer=self._shm.buf)
+        self._values = np.ndarray((len(self.fields),), dtype=np.float64, buffer=self._shm.buf,
+                                  offset=self.HEADER_SIZE)
+        if create:
+            self._seq[0] = 0
+            self._values[:] = 0.0
+        self.snapshot = np.zeros(len(self.fields))  # 最近一次读取的数据，读取时原地写入
+        self.version = 0
+
+    def write(self, values=None, **fields):
+        """
+        写入数据，只能由一个进程写入。
+        :param values: 可选，按字段顺序排列的完整数据
+        :param fields: 可选，按字段名写入部分数据
+        :return: 写入后的版本号
+        """
+        seq = int(self._seq[0])
+        self._seq[0] = seq + 1
+        if values is not None:
+            self._values[:] = values
+        for field, value in fields.items():
+            self._values[self.index[field]] = value
+        self._seq[0] = seq + 2
+        return (seq + 2) // 2
+
+    def read(self, timeout=0.001):
+        """
+        读取一致的数据快照，写入 self.snapshot。
+        :param timeout: 写入方持续写入时的最长重试时间 (秒)
+        :return: 数据版本号；超时返回 None，此时 self.snapshot 保持上一次的数据
+        """
+        deadline = None
+        while True:
+            seq = int(self._seq[0])
+            if not seq & 1:
+                self.snapshot[:] = self._values
+                if int(self._seq[0]) == seq:
+                    self.version = seq // 2
+                    return self.version
+            if deadline is None:
+                deadline = time.perf_counter() + timeout
+            elif time.perf_counter() > deadline:
+                return None
+
+    def current_version(self):
+        """
+        不读取数据，只返回当前版本号，用于低成本地检测数据是否更新。
+        """
+        return int(self._seq[0]) // 2
+
+    def get(self, field):
+        """
+        从最近一次读取的快照中取出字段值。
+        """
+        return float(self.snapshot[self.index[field]])
+
+    def as_dict(self):
+        return {field: float(value) for field, value in zip(self.fields, self.snapshot)}
+
+    def close(self):
+        """
+        断开共享内存，所有者进程同时释放共享内存。
+        """
+        self._seq = None
+        self._values = None
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+
+
+class ParameterBlock(SharedBlock):
+    """
+    带版本号的参数块：写入方每次整体写入全部参数，读取方每个周期只检查一次版本号，
+    版本变化时才读取快照，因此参数更新在下一个周期原子地生效，不会读到新旧混合的参数。
+    """
+    def __init__(self, fields, name=None, create=False, initial=None):
+        """
+        :param fields: 参数名序列
+        :param name: 共享内存名称，create=False 时必须指定
+        :param create: 是否新建共享内存
+        :param initial: 可选，新建时写入的初始参数字典
+        """
+        super().__init__(fields, name, create)
+        self._pending = self._values.copy()  # 写入方保存的完整参数
+        if initial:
+            self.push(**initial)
+
+    def push(self, **changes):
+        """
+        更新部分参数，连同其余参数一起整体写入。
+        :return: 新的版本号
+        """
+        for field, value in changes.items():
+            self._pending[self.index[field]] = value
+        return self.write(values=self._pending)
+
+    def poll(self):
+        """
+        检查是否有新版本的参数，有则读取到 self.snapshot。
+        :return: 是否读取到新参数
+        """
+        if self.current_version() == self.version:
+            return False
+        return self.read() is not None
@@ -0,0 +1,103 @@
+import subprocess
+import sys
+import json
+
+HEAVY_MODULES = ("odrive", "scipy.signal", "scipy.optimize", "matplotlib", "PyQt5")
+
+# 每个入口在新的解释器中执行：导入耗时、导入后已加载的重量级模块
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"import": elapsed, "loaded": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+# 从导入到发出第一次力矩指令的耗时，使用模拟设备，不包括真实 USB 搜索和校准
+FIRST_TORQUE_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from motor.deviceManager import ODriveDeviceManager
+from motor.simulatedDevice import simulated_finder
+from trajectory_handler.sineGenerator import SineTrajectoryHandler
+from utils.lazyImport import wait_for_preloads
+{setup}
+imported = time.perf_counter() - start
+motor.initialize_odrive()
+motor.set_torque_control_mode()
+wait_for_preloads()  # 与 run() 一致，控制循环开始前等待后台导入完成
+ready = time.perf_counter() - start
+controller.control_step(0.0, 0.0)
+first = time.perf_counter() - start
+for i in range(1, 200):
+    controller.control_step(i * 0.001, 0.001)
+steady = time.perf_counter() - start
+print(json.dumps({{"import": imported, "ready": ready, "first_torque": first, "first_200": steady,
+                  "loaded": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+FIRST_TORQUE_SETUPS = {
+    "main_impedance_single": """
+from main_impedance_single import ImpedanceController
+from motor.filteredmotorController import FilteredMotorController
+manager = ODriveDeviceManager(finder=simulated_finder())
+motor = FilteredMotorController("SIM0", device_manager=manager)
+controller = ImpedanceController(motor, SineTrajectoryHandler(amplitude=0.5, frequency=0.5), 10, plot=False)
+""",
+    "main_impedance_double": """
+from main_impedance_double import DualLegImpedanceController
+from motor.doubleMotorController import FilteredDoubleMotorController
+manager = ODriveDeviceManager(finder=simulated_finder())
+motor = FilteredDoubleMotorController("SIM0", "SIM1", device_manager=manager)
+controller = DualLegImpedanceController(motor, SineTrajectoryHandler(amplitude=0.5, frequency=0.5),
+                                        SineTrajectoryHandler(amplitude=0.5, frequency=0.5), 10)
+""",
+}
+
+ENTRY_POINTS = ("main_impedance_single", "main_impedance_double", "q_learning", "controller.realtimeProcess",
+                "controller.hostRuntime", "data_utils.data_collect_single", "app2")
+
+
+def run_script(script, repeat=3):
+    """
+    在新的解释器中执行脚本，返回多次执行中首次发出力矩最快（或导入最快）的一次结果。
+    """
+    results = []
+    for _ in range(repeat):
+        completed = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True)
+        lines = completed.stdout.strip().splitlines()
+        if completed.returncode != 0 or not lines:
+            error = completed.stderr.strip().splitlines()
+            return {"error": error[-1] if error else f"退出码 {completed.returncode}"}
+        results.append(json.loads(lines[-1]))
+    key = "first_torque" if "first_torque" in results[0] else "import"
+    return min(results, key=lambda result: result[key])
+
+
+def benchmark_imports(entry_points=ENTRY_POINTS):
+    print(f"{'入口':<32}{'导入耗时(ms)':>14}  已加载的重量级模块")
+    for module in entry_points:
+        result = run_script(IMPORT_SCRIPT.format(module=module, heavy=HEAVY_MODULES))
+        if "error" in result:
+            print(f"{module:<32}{'失败':>14}  {result['error']}")
+            continue
+        print(f"{module:<32}{result['import'] * 1000:>14.1f}  {', '.join(result['loaded']) or '-'}")
+
+
+def benchmark_first_torque():
+    print(f"{'入口':<32}{'导入(ms)':>10}{'就绪(ms)':>10}{'首次力矩(ms)':>14}{'200 周期(ms)':>14}")
+    for name, setup in FIRST_TORQUE_SETUPS.items():
+        result = run_script(FIRST_TORQUE_SCRIPT.format(setup=setup, heavy=HEAVY_MODULES))
+        if "error" in result:
+            print(f"{name:<32}失败: {result['error']}")
+            continue
+        print(f"{name:<32}{result['import'] * 1000:>10.1f}{result['ready'] * 1000:>10.1f}"
+              f"{result['first_torque'] * 1000:>14.1f}{result['first_200'] * 1000:>14.1f}")
+
+
+if __name__ == "__main__":
+    # 启动耗时测试：python -m utils.startupBenchmark
+    print("各入口的导入耗时（新解释器，取 3 次中最快的一次）")
+    benchmark_imports()
+    print("\n从导入到第一次力矩指令的耗时（模拟设备）")
+    benchmark_first_torque()
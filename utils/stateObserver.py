@@ -0,0 +1,203 @@
+import math
+import numpy as np
+from scipy.linalg import solve_discrete_are
+from scipy.signal import place_poles
+
+
+class LinearStateObserver:
+    """
+    单轴状态观测器基类。
+
+    模型状态 x = [位置, 速度, 外部力矩]：
+        位置' = 速度
+        速度' = (电机力矩 + 外部力矩 - 阻尼 * 速度) / 惯量
+        外部力矩' = 0（随机游走）
+    测量值为编码器的位置和速度，输入为电机力矩（Iq * Kt，或指令力矩）。
+    观测器增益在初始化时一次性计算，每次更新只做标量运算，不分配数组。
+    """
+
+    def __init__(self, inertia, damping=0.0, sampling_freq=1000):
+        """
+        :param inertia: 转动惯量（与编码器单位一致）
+        :param damping: 粘滞阻尼系数
+        :param sampling_freq: 标称采样频率 (Hz)
+        """
+        self.inertia = inertia
+        self.damping = damping
+        self.dt = 1.0 / sampling_freq
+        self.gain = self._compute_gain()
+        (self.l_pp, self.l_pv), (self.l_vp, self.l_vv), (self.l_tp, self.l_tv) = self.gain.tolist()
+
+        self.position = 0.0
+        self.velocity = 0.0
+        self.external_torque = 0.0
+        self.initialized = False
+
+    def system_matrices(self):
+        """
+        标称采样周期下的离散模型矩阵。
+        :return: (A, C)
+        """
+        dt, inertia = self.dt, self.inertia
+        A = np.array([
+            [1.0, dt, 0.0],
+            [0.0, 1.0 - dt * self.damping / inertia, dt / inertia],
+            [0.0, 0.0, 1.0],
+        ])
+        C = np.array([
+            [1.0, 0.0, 0.0],
+            [0.0, 1.0, 0.0],
+        ])
+        return A, C
+
+    def _compute_gain(self):
+        """
+        计算 3x2 的观测器增益矩阵，由子类实现。
+        """
+        raise NotImplementedError
+
+    def reset(self, position=0.0, velocity=0.0, external_torque=0.0):
+        self.position = position
+        self.velocity = velocity
+        self.external_torque = external_torque
+        self.initialized = True
+
+    def update(self, measured_position, measured_velocity, motor_torque, dt=None):
+        """
+        执行一次预测 + 校正。
+        :param measured_position: 编码器位置
+        :param measured_velocity: 编码器速度
+        :param motor_torque: 本周期作用在关节上的电机力矩
+        :param dt: 可选，实际采样间隔，默认使用标称采样周期
+        :return: (位置, 速度, 外部力矩) 估计值
+        """
+        if not self.initialized:
+            self.reset(measured_position, measured_velocity)
+            return self.position, self.velocity, self.external_torque
+
+        if dt is None:
+            dt = self.dt
+
+        # 预测
+        position = self.position + dt * self.velocity
+        velocity = self.velocity + dt * (motor_torque + self.external_torque - self.damping * self.velocity) / self.inertia
+        external_torque = self.external_torque
+
+        # 校正
+        position_residual = measured_position - position
+        velocity_residual = measured_velocity - velocity
+        self.position = position + self.l_pp * position_residual + self.l_pv * velocity_residual
+        self.velocity = velocity + self.l_vp * position_residual + self.l_vv * velocity_residual
+        self.external_torque = external_torque + self.l_tp * position_residual + self.l_tv * velocity_residual
+        return self.position, self.velocity, self.external_torque
+
+
+class KalmanStateObserver(LinearStateObserver):
+    """
+    稳态卡尔曼滤波观测器，增益由离散 Riccati 方程求得。
+    """
+
+    def __init__(self, inertia, damping=0.0, sampling_freq=1000,
+                 position_noise=1e-4, velocity_noise=5e-2,
+                 acceleration_noise=50.0, torque_drift=20.0):
+        """
+        :param inertia: 转动惯量
+        :param damping: 粘滞阻尼系数
+        :param sampling_freq: 标称采样频率 (Hz)
+        :param position_noise: 位置测量噪声标准差
+        :param velocity_noise: 速度测量噪声标准差
+        :param acceleration_noise: 未建模加速度的标准差（过程噪声）
+        :param torque_drift: 外部力矩变化率的标准差 (力矩/秒)，越大跟踪越快、噪声越大
+        """
+        self.position_noise = position_noise
+        self.velocity_noise = velocity_noise
+        self.acceleration_noise = acceleration_noise
+        self.torque_drift = torque_drift
+        super().__init__(inertia, damping, sampling_freq)
+
+    def _compute_gain(self):
+        A, C = self.system_matrices()
+        dt = self.dt
+        Q = np.diag([
+            (0.5 * dt * dt * self.acceleration_noise) ** 2,
+            (dt * self.acceleration_noise) ** 2,
+            (dt * self.torque_drift) ** 2,
+        ])
+        R = np.diag([self.position_noise ** 2, self.velocity_noise ** 2])
+        # 预测协方差的稳态解，增益 L = P C^T (C P C^T + R)^-1
+        P = solve_discrete_are(A.T, C.T, Q, R)
+        return P @ C.T @ np.linalg.inv(C @ P @ C.T + R)
+
+
+class LuenbergerStateObserver(LinearStateObserver):
+    """
+    龙伯格观测器，按给定带宽配置误差动态的极点。
+    """
+
+    def __init__(self, inertia, damping=0.0, sampling_freq=1000, bandwidth=60.0):
+        """
+        :param inertia: 转动惯量
+        :param damping: 粘滞阻尼系数
+        :param sampling_freq: 标称采样频率 (Hz)
+        :param bandwidth: 观测器带宽 (Hz)
+        """
+        self.bandwidth = bandwidth
+        super().__init__(inertia, damping, sampling_freq)
+
+    def _compute_gain(self):
+        A, C = self.system_matrices()
+        # 三个略有区分的实极点（place_poles 不支持重极点），对应连续域带宽
+        omega = 2 * math.pi * self.bandwidth
+        poles = [math.exp(-omega * k * self.dt) for k in (0.8, 1.0, 1.25)]
+        # 校正形式 x += L (z - C x_pred) 的误差动态为 (I - L C) A，对 (A^T, A^T C^T) 配置极点
+        result = place_poles(A.T, A.T @ C.T, poles)
+        return result.gain_matrix.T
+
+
+if __name__ == "__main__":
+    import time
+    from utils.butterworthFilter import ButterworthFilter
+
+    # 仿真：正弦步态 + 阶跃外力，比较巴特沃斯滤波与观测器的误差和相位滞后。
+    # 观测器分别使用与真实对象一致的模型和带误差的模型（惯量 +20%、阻尼 -50%，与辨识误差相当），
+    # 模型误差 ΔJ·a + Δb·v 会被观测器当作外部力矩
+    fs = 1000
+    dt = 1.0 / fs
+    inertia = 0.01
+    damping = 0.02
+    rng = np.random.default_rng(0)
+    t = np.arange(0, 10, dt)
+    true_pos = 0.5 * np.cos(2 * np.pi * 1.0 * t)
+    true_vel = -0.5 * 2 * np.pi * 1.0 * np.sin(2 * np.pi * 1.0 * t)
+    true_acc = -0.5 * (2 * np.pi * 1.0) ** 2 * np.cos(2 * np.pi * 1.0 * t)
+    true_ext = np.where((t % 2) > 1, 0.3, 0.0)
+    motor_torque = inertia * true_acc + damping * true_vel - true_ext
+    pos_meas = true_pos + rng.normal(0, 1e-4, t.size)
+    vel_meas = true_vel + rng.normal(0, 5e-2, t.size)
+
+    def lag_ms(estimate, truth):
+        best = min(range(0, 80), key=lambda k: np.mean((estimate[200 + k:] - truth[200:truth.size - k]) ** 2))
+        return best * dt * 1000
+
+    vel_filter = ButterworthFilter(2, 10, fs)
+    vel_butter = np.array([vel_filter.filter_signal(v) for v in vel_meas])
+
+    for label, model_inertia, model_damping in (("模型准确", inertia, damping),
+                                                ("模型有误差", 1.2 * inertia, 0.5 * damping)):
+        print(f"{label}: 惯量 {model_inertia:.4f}, 阻尼 {model_damping:.4f}"
+              f"（真实值 {inertia:.4f}, {damping:.4f}）")
+        for observer in (KalmanStateObserver(model_inertia, model_damping),
+                         LuenbergerStateObserver(model_inertia, model_damping)):
+            estimates = np.zeros((t.size, 3))
+            start = time.perf_counter()
+            for k in range(t.size):
+                estimates[k] = observer.update(pos_meas[k], vel_meas[k], motor_torque[k])
+            elapsed = (time.perf_counter() - start) / t.size * 1e6
+            print(f"  {type(observer).__name__}: 每次更新 {elapsed:.2f} us")
+            print(f"    速度 RMS 误差: {np.sqrt(np.mean((estimates[200:, 1] - true_vel[200:]) ** 2)):.4f}, "
+                  f"滞后: {lag_ms(estimates[:, 1], true_vel):.0f} ms")
+            print(f"    外部力矩 RMS 误差: {np.sqrt(np.mean((estimates[200:, 2] - true_ext[200:]) ** 2)):.4f}")
+
+    print("Butterworth 10 Hz:")
+    print(f"  速度 RMS 误差: {np.sqrt(np.mean((vel_butter[200:] - true_vel[200:]) ** 2)):.4f}, "
+          f"滞后: {lag_ms(vel_butter, true_vel):.0f} ms")
@@ -0,0 +1,100 @@
+import time
+
+
+class ObserverClock:
+    """
+    观测器的采样间隔计时，实际间隔默认限制在标称周期的 0.2 ~ 5 倍之间。
+    控制循环的实际周期（sleep + USB 读写）通常比标称周期长，观测器按实际间隔积分才不会产生偏差。
+    """
+    def __init__(self, sampling_freq: float, min_ratio: float = 0.2, max_ratio: float = 5.0):
+        """
+        :param sampling_freq: 标称采样频率 (Hz)
+        :param min_ratio: 间隔下限与标称周期之比
+        :param max_ratio: 间隔上限与标称周期之比，长时间停顿（例如第一次导入模块）不按实际时长积分
+        """
+        self.nominal_dt = 1.0 / sampling_freq
+        self.min_dt = min_ratio * self.nominal_dt
+        self.max_dt = max_ratio * self.nominal_dt
+        self.last_time = None
+
+    def tick(self):
+        """
+        :return: 距上一次调用的间隔 (秒)，第一次调用返回 None
+        """
+        now = time.perf_counter()
+        dt = None if self.last_time is None else min(max(now - self.last_time, self.min_dt), self.max_dt)
+        self.last_time = now
+        return dt
+
+
+class TickCache:
+    """
+    控制周期内的读数缓存。
+
+    同一个周期内，同一个键只调用一次读取函数，后续读取直接返回缓存值，
+    因此硬件只采样一次、滤波器也只前进一次；调度方调用 advance() 进入下一个周期后缓存失效。
+    调度方第一次调用 advance() 之前缓存不生效，每次读取都直接访问硬件，兼容不按周期调度的旧代码。
+    """
+    def __init__(self):
+        self.enabled = False
+        self.tick = 0
+        self._values = {}
+        self.hits = {}  # {键: 命中次数}，即避免的重复读取次数
+        self.misses = {}  # {键: 实际读取次数}
+
+    def advance(self) -> None:
+        """
+        进入下一个控制周期，清空缓存。
+        """
+        self.enabled = True
+        self.tick += 1
+        self._values.clear()
+
+    def get(self, key, loader):
+        """
+        读取缓存值，本周期内没有缓存时调用 loader 读取并缓存。
+        :param key: 缓存键
+        :param loader: 无参数的读取函数
+        :return: 本周期内该键的值
+        """
+        if not self.enabled:
+            return loader()
+        try:
+            value = self._values[key]
+        except KeyError:
+            value = self._values[key] = loader()
+            self.misses[key] = self.misses.get(key, 0) + 1
+            return value
+        self.hits[key] = self.hits.get(key, 0) + 1
+        return value
+
+    def put(self, key, value) -> None:
+        """
+        直接写入本周期的值，例如流水线在上一周期提前读取的数据。
+        """
+        if self.enabled:
+            self._values[key] = value
+
+    def invalidate(self, key=None) -> None:
+        """
+        使本周期内的某个键（或全部）缓存失效。
+        """
+        if key is None:
+            self._values.clear()
+        else:
+            self._values.pop(key, None)
+
+    def avoided_reads(self, keys=None) -> int:
+        """
+        统计避免的读取次数。
+        :param keys: 可选，只统计这些键（例如只统计硬件读取的键）
+        """
+        return sum(count for key, count in self.hits.items() if keys is None or key in keys)
+
+    def report(self, name="") -> None:
+        """
+        打印缓存命中统计。
+        """
+        print(f"{name}周期缓存统计: 共 {self.tick} 个周期")
+        for key in sorted(set(self.hits) | set(self.misses)):
+            print(f"  {key}: 读取 {self.misses.get(key, 0)} 次, 命中缓存 {self.hits.get(key, 0)} 次")